@@ -0,0 +1,217 @@
+#!/bin/python3
+#
+# Executor backends used by run.py to run one process.py command per partition.
+#
+# GCPExecutor launches each partition on its own GCP instance through the
+# Life Sciences API.  LocalExecutor runs the partitions on this machine in a
+# pool of workers, each with its own CPU budget and working directory.
+import subprocess
+import os
+import os.path
+import re
+import json
+import shlex
+import shutil
+import concurrent.futures
+import queue
+import asyncio
+import time
+
+
+class Executor:
+    # Location that process.py copies each partition's results into
+    results = None
+
+    def submit(self, partition, command):
+        """Start the process.py command for one partition and return a job handle."""
+        raise NotImplementedError
+
+    def is_done(self, job):
+        raise NotImplementedError
+
+    async def poll(self, job):
+        """Non-blocking is_done, for jobmonitor.JobMonitor."""
+        return self.is_done(job)
+
+    def read_result(self, out, name):
+        """Yield the lines of file name in the results subdirectory out of one partition."""
+        raise NotImplementedError
+
+    def runtime(self, job):
+        """Seconds a finished job ran, from when it started (not when it was submitted)."""
+        return time.time() - job['start_time']
+
+
+class GCPExecutor(Executor):
+
+    def __init__(self, config, results):
+        self.machine_type = config["machine_type"]
+        self.boot_disk_size = str(config["boot_disk_size"])
+        self.logging = "gs://{}/logging/{}".format(config["bucket_id"], config["logging"])
+        self.docker_image = "mrkylesmith/ripples_pipeline:latest"
+        self.results = results
+
+    def submit(self, partition, command):
+        info = gcloud_run(command, self.machine_type, self.boot_disk_size, self.logging, self.docker_image)
+        return {'partition': partition, 'operation_id': info['operation_id'], 'start_time': time.time()}
+
+    def is_done(self, job):
+        return gcloud_describe(job['operation_id'])['done']
+
+    async def poll(self, job):
+        return (await gcloud_describe_async(job['operation_id']))['done']
+
+    def read_result(self, out, name):
+        # Stream the file from the GCP Bucket instead of copying it to local disk
+        path = "{}/{}/{}".format(self.results, out, name)
+        proc = subprocess.Popen(["gsutil", "cat", path], stdout=subprocess.PIPE, text=True)
+        for line in proc.stdout:
+            yield line
+        if proc.wait() != 0:
+            print("WARNING: could not read {}".format(path))
+
+
+class LocalExecutor(Executor):
+    """
+    Run partitions on this machine.  At most cores // cpus_per_job partitions
+    run at once; each is pinned to its own set of cpus_per_job CPUs (on Linux)
+    and told its budget through RIPPLES_THREADS, which process.py and
+    generate_report.sh use for their thread counts.  Each partition runs in
+    its own directory under workdir, since the filtration pipeline keeps its
+    intermediate files in filtering/data and its output in results/ relative
+    to the working directory.  Entries named in private (e.g. the local
+    results directory of run.py) are not linked into the run directories.
+    """
+
+    def __init__(self, cores=None, cpus_per_job=None, workdir="local_runs", private=()):
+        cores = cores or os.cpu_count()
+        self.cpus_per_job = max(1, min(cpus_per_job or cores, cores))
+        slots = max(1, cores // self.cpus_per_job)
+        self.workdir = os.path.abspath(workdir)
+        self.results = os.path.join(self.workdir, "results")
+        os.makedirs(self.results, exist_ok=True)
+        self.private = {"filtering", "results", os.path.basename(self.workdir)}
+        self.private.update(os.path.normpath(entry).split(os.sep)[0] for entry in private)
+        # Disjoint CPU sets, handed out to jobs as they start
+        self.cpu_sets = queue.Queue()
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(cores))
+        for i in range(slots):
+            # Wrap around if local_cores is more than this machine has
+            self.cpu_sets.put(sorted({cpus[j % len(cpus)] for j in range(i*self.cpus_per_job, (i+1)*self.cpus_per_job)}))
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=slots)
+        print("Running up to {} partitions at once locally, {} CPUs each.".format(slots, self.cpus_per_job))
+
+    def submit(self, partition, command):
+        rundir = self.make_rundir("{}_{}".format(partition[0], partition[1]))
+        job = {'partition': partition, 'rundir': rundir}
+        job['future'] = self.pool.submit(self.run_job, command, job)
+        return job
+
+    def is_done(self, job):
+        if not job['future'].done():
+            return False
+        returncode = job['future'].result()
+        if returncode != 0:
+            print("partition: {} exited with code {}, see {}/ripples.log".format(job['partition'], returncode, job['rundir']))
+        return True
+
+    def read_result(self, out, name):
+        path = os.path.join(self.results, out, name)
+        if not os.path.exists(path):
+            print("WARNING: could not read {}".format(path))
+            return
+        with open(path) as f:
+            for line in f:
+                yield line
+
+    def make_rundir(self, name):
+        # Mirror this directory into rundir, with its own empty filtering/data and results
+        current = os.getcwd()
+        rundir = os.path.join(self.workdir, name)
+        os.makedirs(os.path.join(rundir, "filtering", "data"), exist_ok=True)
+        for entry in self.private:
+            # Left over from a run that linked it
+            if os.path.islink(os.path.join(rundir, entry)):
+                os.unlink(os.path.join(rundir, entry))
+        os.makedirs(os.path.join(rundir, "results"), exist_ok=True)
+        for entry in os.listdir(current):
+            if entry in self.private:
+                continue
+            link(os.path.join(current, entry), os.path.join(rundir, entry))
+        for entry in os.listdir(os.path.join(current, "filtering")):
+            if entry in ("data", "fastas"):
+                continue
+            link(os.path.join(current, "filtering", entry), os.path.join(rundir, "filtering", entry))
+        return rundir
+
+    def runtime(self, job):
+        return job['end_time'] - job['start_time']
+
+    def run_job(self, command, job):
+        rundir = job['rundir']
+        cpus = self.cpu_sets.get()
+        # Jobs wait in the pool for a free CPU set; time them from here
+        job['start_time'] = time.time()
+        try:
+            env = dict(os.environ, RIPPLES_THREADS=str(self.cpus_per_job))
+            args = shlex.split(command)
+            # Pinned by taskset, before the command starts any threads or
+            # processes of its own; preexec_fn is not safe in the pool's threads
+            taskset = shutil.which("taskset")
+            if taskset:
+                args = [taskset, "-c", ",".join(str(cpu) for cpu in cpus)] + args
+            with open(os.path.join(rundir, "ripples.log"), "w") as log:
+                proc = subprocess.Popen(args, cwd=rundir, env=env, stdout=log, stderr=subprocess.STDOUT)
+                if not taskset and hasattr(os, "sched_setaffinity"):
+                    # Without taskset, pin it as soon as it has started
+                    try:
+                        os.sched_setaffinity(proc.pid, cpus)
+                    except ProcessLookupError:
+                        pass
+                return proc.wait()
+        finally:
+            job['end_time'] = time.time()
+            self.cpu_sets.put(cpus)
+
+
+def link(src, dst):
+    if not os.path.lexists(dst):
+        os.symlink(src, dst)
+
+def gcloud_run(command, machine_type, boot_disk_size, logging, docker_image):
+    cmd = ["gcloud", "beta", "lifesciences", "pipelines", "run",
+        "--location", "us-central1",
+        "--regions", "us-central1",
+        "--machine-type", machine_type,
+        "--boot-disk-size", boot_disk_size,
+        "--logging", logging,
+        "--docker-image", docker_image,
+        "--command-line", command,
+        #"--outputs", results,
+        "--format=json"]
+
+    print(" ".join(cmd))
+    out = subprocess.check_output(cmd)
+    result = json.loads(out)
+    name = result['name']
+    id = re.search("operations\/(\d+)", name).groups()[0]
+    return {'operation_id': id, 'result': result}
+
+def gcloud_describe(operation_id):
+     cmd = ["gcloud", "beta", "lifesciences",
+            "operations", "describe", "--format=json", operation_id]
+     out = subprocess.check_output(cmd)
+     result = json.loads(out)
+     done = 'done' in result and result['done'] == True
+     return {'done': done, 'result': result}
+
+async def gcloud_describe_async(operation_id):
+     cmd = ["gcloud", "beta", "lifesciences",
+            "operations", "describe", "--format=json", operation_id]
+     proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE)
+     out, _ = await proc.communicate()
+     if proc.returncode != 0:
+         raise subprocess.CalledProcessError(proc.returncode, cmd)
+     result = json.loads(out)
+     done = 'done' in result and result['done'] == True
+     return {'done': done, 'result': result}
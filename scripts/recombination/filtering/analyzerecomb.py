@@ -1,6 +1,8 @@
 import sys
 import string
 
+from fastaindex import FastaIndex, RecordCache
+
 recombination_file_name = "filtering/data/combinedCatOnlyBestWithPVals.txt"
 sampleinfo_file_names = ["filtering/data/sampleInfo.txt"]
 all_fasta_file_name = "filtering/fastas/extractedSeqs.fa" 
@@ -51,25 +53,17 @@ if not make_fasta:
 	sys.exit()
 
 
-nodes_to_get = []
-nodes_by_example = [[] for x in range(how_many_to_see)]
+# Examples that each node is part of
+examples_by_node = {}
 
 for i in range(how_many_to_see):
-	if not (lines_sorted_by_parsimony_change[i][0] in nodes_to_get):
-		nodes_to_get.append(lines_sorted_by_parsimony_change[i][0])
-	if not (lines_sorted_by_parsimony_change[i][3] in nodes_to_get):
-		nodes_to_get.append(lines_sorted_by_parsimony_change[i][3])
-	if not (lines_sorted_by_parsimony_change[i][6] in nodes_to_get):
-		nodes_to_get.append(lines_sorted_by_parsimony_change[i][6])
-	
-	nodes_by_example[i].append(lines_sorted_by_parsimony_change[i][0])
-	nodes_by_example[i].append(lines_sorted_by_parsimony_change[i][3])
-	nodes_by_example[i].append(lines_sorted_by_parsimony_change[i][6])
+	for col in [0, 3, 6]:
+		examples_by_node.setdefault(lines_sorted_by_parsimony_change[i][col], set()).add(i)
 
 
 
-samples_to_get = []
-samples_by_example = [[] for x in range(how_many_to_see)]
+# Examples that each sample is relevant to
+examples_by_sample = {}
 
 
 samplelines = []
@@ -88,22 +82,15 @@ for i in range(len(samplelines)):
 
 	samples = samplelines[i][1].split(',')
 
-	if samplelines[i][0] in nodes_to_get:
+	if samplelines[i][0] in examples_by_node:
 		for k in range(len(samples)):
-			if not samples[k] in samples_to_get:
-				samples_to_get.append(samples[k])
-		
-		for j in range(how_many_to_see):
-			if samplelines[i][0] in nodes_by_example[j]:
-				for k in range(len(samples)):
-					if not samples[k] in samples_by_example[j]:
-						samples_by_example[j].append(samples[k])
+			examples_by_sample.setdefault(samples[k], set()).update(examples_by_node[samplelines[i][0]])
 
 
 
 
-all_samples = open(all_fasta_file_name, 'r')
-sample_lines = all_samples.readlines()
+# Only the headers are scanned; the sequences of the relevant samples are read through the index
+all_samples = FastaIndex(all_fasta_file_name)
 
 reference = open(reference_file_name, 'r')
 reference_lines = reference.readlines()
@@ -113,64 +100,42 @@ reference.close()
 
 
 
-singleton_files = []
-singleton_file_lines = [[] for x in range(how_many_to_see)]
-
-
-for i in range(how_many_to_see):
-
-	for j in range(len(reference_lines)):
-		singleton_file_lines[i].append(reference_lines[j])
-	singleton_file_lines[i][len(singleton_file_lines[i]) - 1] = singleton_file_lines[i][len(singleton_file_lines[i]) - 1] + '\n'
-
-
-
+# Reference lines at the top of every file
+reference_text = ''.join(reference_lines) + '\n'
 
 
 
-in_relevent_sample = False
-sample_is_relevent_to_examples = []
 
-for i in range(len(sample_lines)):
-	possible_name = sample_lines[i]
-	possible_name.strip()
+# Records relevant to each example, in file order
+records_by_example = [[] for x in range(how_many_to_see)]
 
-	if possible_name[0] == '>':
-		in_relevent_sample = False
-		sample_is_relevent_to_examples = []
+for name in all_samples.nameToRecords:
+	possible_name = name
 
-		possible_name = possible_name[1:-1]
-
-		#Accounting for coords that jalview adds to some samplenames
-		if possible_name.rfind('/') > possible_name.rfind('|'):
-			possible_name = possible_name[:-8]
-			
-
-		
-
-		if possible_name in samples_to_get:
-			
-			in_relevent_sample = True
-			for j in range(how_many_to_see):
-				if possible_name in samples_by_example[j]:
-					sample_is_relevent_to_examples.append(j)
-					
-	
-
-	if in_relevent_sample:
-		
-		for example in sample_is_relevent_to_examples:
-			singleton_file_lines[example].append(sample_lines[i])
+	#Accounting for coords that jalview adds to some samplenames
+	if possible_name.rfind('/') > possible_name.rfind('|'):
+		possible_name = possible_name[:-8]
 
+	if possible_name in examples_by_sample:
+		for example in examples_by_sample[possible_name]:
+			records_by_example[example].extend(all_samples.nameToRecords[name])
 
 
+# Each file is written as soon as it is assembled; each record is read once
+# and kept in memory only until the last file that needs it
+record_uses = {}
+for i in range(how_many_to_see):
+	for record in records_by_example[i]:
+		record_uses[record] = record_uses.get(record, 0) + 1
 
+record_cache = RecordCache(all_samples, record_uses)
 
 for i in range(how_many_to_see):
 	a_file = open("filtering/fastas/OrderedRecombs/%d.fa" % i, 'w')
-	
-	for line in singleton_file_lines[i]:
-		a_file.write(line)
-	a_file.close()
+	a_file.write(reference_text)
 
+	for record in sorted(records_by_example[i]):
+		a_file.write(record_cache.record(record).decode().replace('\r\n', '\n'))
+	a_file.close()
 
+all_samples.close()
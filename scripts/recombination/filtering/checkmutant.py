@@ -1,969 +1,1082 @@
+# QC report of recombinant trios from their alignments in filtering/fastas/AlignedRecombs.
+#
+#   python3 filtering/checkmutant.py <index> [-r]
+#       checks the trio of parsimony-change rank <index>, from AlignedRecombs/<index>.fa
+#   python3 filtering/checkmutant.py --batch [-j <jobs>] [-r]
+#       checks every trio in AlignedRecombs with a pool of worker processes
+#
+# With -r the report row of the trio is appended to filtering/data/report.txt;
+# in batch mode, report.txt is written from the rows collected from the
+# workers, along with final_report.txt, the trios that pass the QC filters.
+# The trio, sample and informative site tables are read and indexed once per
+# process; in batch mode the workers are forked after they are loaded, so
+# they share them.
+
 import sys
+import os
+import io
 import string
 import argparse
+import traceback
+import contextlib
+import multiprocessing
 from collections import Counter
 
+import numpy
+
 recombination_file_name = "filtering/data/combinedCatOnlyBestWithPVals.txt"
 sampleinfo_file_name = "filtering/data/sampleInfo.txt"
 relevent_sites_file_name = "filtering/data/allRelevantNodesInfSites.txt"
+aligned_dir_name = "filtering/fastas/AlignedRecombs"
+report_file_name = "filtering/data/report.txt"
+final_report_file_name = "filtering/data/final_report.txt"
+empty_report_file_name = "filtering/empty_report.txt"
 
-F = open(recombination_file_name, 'r')
-lines = F.readlines()
-F.close()
-
-labels = lines[0].split('\t')
-for i in range(len(labels)):
-    labels[i] = labels[i].strip()
 
-del lines[0]
+class Tables:
+    # labels: column names of the trio table
+    # lines_sorted_by_parsimony_change: trio rows by parsimony change rank
+    # sampleinfo_by_node: node id -> (samples, mutations) from sampleInfo.txt
+    # inf_sites_by_trio: (recomb, donor, acceptor) ids -> informative sites from allRelevantNodesInfSites.txt
+    def __init__(self):
+        F = open(recombination_file_name, 'r')
+        lines = F.readlines()
+        F.close()
 
-parsimony_change = []
+        self.labels = lines[0].split('\t')
+        for i in range(len(self.labels)):
+            self.labels[i] = self.labels[i].strip()
 
-for i in range(len(lines)):
-	lines[i] = lines[i].split('\t')
-	
-	parsimony_change.append(int(lines[i][10]) - int(lines[i][11]))
+        del lines[0]
 
-lines_sorted_by_parsimony_change = [x for _, x in sorted(zip(parsimony_change, lines) , reverse=True)]
+        parsimony_change = []
 
-index_to_check = int(sys.argv[1])
+        for i in range(len(lines)):
+            lines[i] = lines[i].split('\t')
 
+            parsimony_change.append(int(lines[i][10]) - int(lines[i][11]))
 
-recomb_id   = int(lines_sorted_by_parsimony_change[index_to_check][0])
-donor_id    = int(lines_sorted_by_parsimony_change[index_to_check][3])
-acceptor_id = int(lines_sorted_by_parsimony_change[index_to_check][6])
+        self.lines_sorted_by_parsimony_change = [x for _, x in sorted(zip(parsimony_change, lines) , reverse=True)]
 
-#breakpoints
-break1_1 = int(lines_sorted_by_parsimony_change[index_to_check][1].split(',')[0][1:])
-break1_2 = int(lines_sorted_by_parsimony_change[index_to_check][1].split(',')[1][:-1])
-break2_1 = int(lines_sorted_by_parsimony_change[index_to_check][2].split(',')[0][1:])
-break2_2 = int(lines_sorted_by_parsimony_change[index_to_check][2].split(',')[1][:-1])
+        samplefile = open(sampleinfo_file_name, 'r')
+        samplelines = samplefile.readlines()
+        samplefile.close()
 
+        del samplelines[0]
 
-samplefile = open(sampleinfo_file_name, 'r')
-samplelines = samplefile.readlines()
-samplefile.close()
+        # A later row for the same node replaces an earlier one
+        self.sampleinfo_by_node = {}
+        for line in samplelines:
+            line = line.split('\t')
+            self.sampleinfo_by_node[int(line[0])] = (line[1].split(','), line[2].split(','))
 
-del samplelines[0]
+        inf_file = open(relevent_sites_file_name, 'r')
+        inf_lines = inf_file.readlines()
+        inf_file.close()
 
-recomb_sample = ""
-donor_sample = ""
-acceptor_sample = ""
+        # The first row of a trio is the one used
+        self.inf_sites_by_trio = {}
+        for line in inf_lines:
+            line = line.split('\t')
+            key = (int(line[0]), int(line[1]), int(line[2]))
+            if not key in self.inf_sites_by_trio:
+                self.inf_sites_by_trio[key] = line[7].split(',')
 
-recomb_samples = []
-donor_samples = []
-acceptor_samples = []
 
-recomb_mutations = []
-donor_mutations = []
-acceptor_mutations = []
+def reference_gaps(dna_lines):
+    """
+    Gap count of the aligned reference (the first record of dna_lines) up to
+    and including each column, as an array.
+    """
+    ref_columns = []
+    for i in range(1, len(dna_lines)):
+        line = dna_lines[i].strip()
 
+        if line[0] == '>':
+            break
 
-for i in range(len(samplelines)):
-    samplelines[i] = samplelines[i].split('\t')
+        ref_columns.append(line)
+    return numpy.cumsum(numpy.frombuffer(''.join(ref_columns).encode(), dtype=numpy.uint8) == ord('-'))
+
+
+def to_alignment_coords(coords, ref_gaps):
+    """
+    Alignment columns of reference coordinates: coordinate c is shifted by
+    one for each reference gap at or before its new column, which makes it
+    the column of the (c+1)-th reference base.  Coordinates past the end of
+    the reference are shifted by every gap, negative ones by none.
+    """
+    coords = numpy.array(coords, dtype=numpy.int64)
+    if len(coords) == 0:
+        return []
+    # ungapped[j]: number of reference bases up to and including column j
+    ungapped = numpy.arange(1, len(ref_gaps) + 1) - ref_gaps
+    # Column of the (c+1)-th reference base, i.e. c plus the gaps before it
+    columns = numpy.searchsorted(ungapped, coords + 1)
+    total_gaps = int(ref_gaps[-1]) if len(ref_gaps) > 0 else 0
+    new_coords = numpy.where(columns < len(ref_gaps), columns, coords + total_gaps)
+    return numpy.where(coords < 0, coords, new_coords).tolist()
+
+
+def aligned_records(dna_lines):
+    """
+    (name, text) of each record of the alignment, in order, where text is
+    the record's sequence followed by the next header line: reads of a
+    sample running past the end of its sequence take their bases from that
+    header.
+    """
+    records = []
+    for line in dna_lines:
+        if line[0] == '>':
+            if len(records) > 0:
+                records[-1][1].append(line.strip())
+
+            possible_name = line[1:-1]
+
+            #Accounting for coords that jalview adds to some samplenames
+            if possible_name.rfind('/') > possible_name.rfind('|'):
+                possible_name = possible_name[:-8]
+
+            records.append((possible_name, []))
+        elif len(records) > 0:
+            records[-1][1].append(line.strip())
+    return [(name, ''.join(text)) for (name, text) in records]
+
+
+def to_codes(text):
+    return numpy.frombuffer(text.encode('utf-32-le'), dtype=numpy.uint32)
+
+def to_text(codes):
+    return numpy.ascontiguousarray(codes, dtype=numpy.uint32).tobytes().decode('utf-32-le')
+
+
+def sample_windows(records, samples, coords):
+    """
+    Reads of each of samples around each alignment coordinate, as
+    reads[sample][coordinate]: the bases at 1-based positions coord-50 to
+    coord+50 of the sample's records, in file order, up to 101 of them
+    (empty for a sample with no record).  Samples whose first record covers
+    every window are read at once, as a 2-D array indexed by the window
+    columns; others are read record by record.
+    """
+    sample_records = [[] for x in samples]
+    for (name, text) in records:
+        if name in samples:
+            sample_records[samples.index(name)].append(text)
+
+    coords = numpy.array(coords, dtype=numpy.int64)
+    columns = coords[:, None] + numpy.arange(-51, 50)
+    reads = [None for x in samples]
+
+    full = []
+    if len(coords) > 0 and columns.min() >= 0:
+        full = [i for i in range(len(samples)) if len(sample_records[i]) > 0 and len(sample_records[i][0]) > columns.max()]
+    if len(full) > 0:
+        width = int(columns.max()) + 1
+        bases = numpy.vstack([to_codes(sample_records[i][0][:width]) for i in full])
+        windows = bases[:, columns]
+        for k in range(len(full)):
+            text = to_text(windows[k])
+            reads[full[k]] = [text[101*h:101*(h+1)] for h in range(len(coords))]
+
+    for i in range(len(samples)):
+        if reads[i] is None:
+            reads[i] = []
+            for c in coords.tolist():
+                read = ''.join([text[max(0, c-51):max(0, c+50)] for text in sample_records[i]])
+                reads[i].append(read[:101])
+    return reads
+
+
+def consensus(reads):
+    """
+    Consensus of reads[sample][mutation] at each position of the first
+    sample's reads: the most common base, ties going to the base seen in the
+    earliest sample, except that an 'n' or '-' gives way to a real base
+    tied with it in second place.
+    """
+    consensus_reads = [None for x in reads[0]]
+    widths = [len(read) for read in reads[0]]
+    for width in sorted(set(widths)):
+        if width == 0:
+            for h in range(len(widths)):
+                if widths[h] == 0:
+                    consensus_reads[h] = ''
+            continue
+        # Mutations whose reads have this width, as a samples x mutations x width array
+        mutations = [h for h in range(len(widths)) if widths[h] == width]
+        for sample in reads:
+            for h in mutations:
+                if len(sample[h]) < width:
+                    raise IndexError("read of mutation %d is shorter than the first sample's" % h)
+        bases = to_codes(''.join([sample[h][:width] for sample in reads for h in mutations]))
+        bases = bases.reshape(len(reads), len(mutations), width)
+        calls = to_text(consensus_bases(bases))
+        for k in range(len(mutations)):
+            consensus_reads[mutations[k]] = calls[width*k:width*(k+1)]
+    return consensus_reads
+
+
+def consensus_bases(bases):
+    """consensus() of a samples x mutations x positions array of base codes."""
+    chars = numpy.unique(bases)
+    is_char = bases[None] == chars[:, None, None, None]
+    counts = is_char.sum(axis=1)
+    # Rank of each base in Counter.most_common(): by count, then by first sample
+    first = is_char.argmax(axis=1)
+    rank = numpy.where(counts == counts.max(axis=0), first, len(bases))
+    ranked = numpy.argsort(rank, axis=0, kind='stable')
+    calls = chars[ranked[0]]
+    if len(chars) > 1:
+        next_best = chars[ranked[1]]
+        tied = numpy.take_along_axis(rank, ranked[1:2], axis=0)[0] < len(bases)
+        gap_or_n = (calls == ord('n')) | (calls == ord('-'))
+        next_is_base = (next_best != ord('n')) & (next_best != ord('-'))
+        calls = numpy.where(gap_or_n & tied & next_is_base, next_best, calls)
+    return calls
+
+
+def nearest_weirdness_of(recomb_reads, donor_reads, acceptor_reads):
+    """
+    Distance from each mutation (position 50 of its consensus reads) to the
+    nearest '-' or 'n' in any of the three reads, at positions where they are
+    not all '-', up to 50; None for mutations whose reads are shorter than 101.
+    """
+    nearest_weirdness = [None for x in recomb_reads]
+    full = [i for i in range(len(recomb_reads)) if min(len(recomb_reads[i]), len(donor_reads[i]), len(acceptor_reads[i])) >= 101]
+    if len(full) == 0:
+        return nearest_weirdness
+    bases = read_codes([recomb_reads, donor_reads, acceptor_reads], full)
+    dashes = bases == ord('-')
+    weird = (dashes | (bases == ord('n'))).any(axis=0) & ~dashes.all(axis=0)
+    distance = numpy.abs(numpy.arange(101) - 50)
+    nearest = numpy.where(weird, distance, 50).min(axis=1).tolist()
+    for k in range(len(full)):
+        nearest_weirdness[full[k]] = nearest[k]
+    return nearest_weirdness
+
+
+def weirdness_counts(recomb_reads, donor_reads, acceptor_reads, nearest_weirdness):
+    """
+    For each mutation, the positions 50 +- (nearest weirdness + 0..4) that
+    are 'bad' (some but not all three reads '-', and then again any 'n') and
+    'iffy' (all three '-'), as two lists; only set for nearest weirdness <= 5.
+    """
+    bad = [0 for x in nearest_weirdness]
+    iffy = [0 for x in nearest_weirdness]
+    near = [i for i in range(len(nearest_weirdness)) if nearest_weirdness[i] is not None and nearest_weirdness[i] <= 5]
+    if len(near) == 0:
+        return bad, iffy
+    bases = read_codes([recomb_reads, donor_reads, acceptor_reads], near)
+    offsets = numpy.array([nearest_weirdness[i] for i in near])[:, None] + numpy.arange(5)
+    positions = numpy.hstack([50 + offsets, 50 - offsets])
+    bases = numpy.take_along_axis(bases, numpy.broadcast_to(positions, (3,) + positions.shape), axis=2)
+    dashes = (bases == ord('-')).sum(axis=0)
+    ns = (bases == ord('n')).sum(axis=0)
+    near_bad = (((0 < dashes) & (dashes < 3)).sum(axis=1) + (0 < ns).sum(axis=1)).tolist()
+    near_iffy = (dashes == 3).sum(axis=1).tolist()
+    for k in range(len(near)):
+        bad[near[k]] = near_bad[k]
+        iffy[near[k]] = near_iffy[k]
+    return bad, iffy
+
+
+def read_codes(groups, mutations):
+    """Base codes of the first 101 positions of reads[mutation] of each group, as a groups x mutations x 101 array."""
+    bases = to_codes(''.join([reads[i][:101] for reads in groups for i in mutations]))
+    return bases.reshape(len(groups), len(mutations), 101)
+
+
+def sites_within(sites, span):
+    """
+    For each site of the sorted list sites, how many sites lie from
+    sites[i] - span up to it (itself and earlier ones), and the index of the
+    first earlier one of those (0 if none), as two lists.
+    """
+    counts = []
+    lower_index = []
+    lower = 0
+    for i in range(len(sites)):
+        while sites[lower] < sites[i] - span:
+            lower += 1
+        counts.append(i - lower + 1)
+        lower_index.append(lower if lower < i else 0)
+    return counts, lower_index
+
+
+def check_trio(index_to_check, tables):
+    """
+    Prints the QC of the trio of parsimony change rank index_to_check and
+    returns (checked, report row), where checked is False if all samples of
+    the recombinant, donor or acceptor are missing.  The row holds the values
+    of the report columns, as bools, ints and strs; a trio that is not
+    checked only has its node ids, its rank and what is missing.
+    """
+    trio = tables.lines_sorted_by_parsimony_change[index_to_check]
+
+    recomb_id   = int(trio[0])
+    donor_id    = int(trio[3])
+    acceptor_id = int(trio[6])
+
+    #breakpoints
+    break1_1 = int(trio[1].split(',')[0][1:])
+    break1_2 = int(trio[1].split(',')[1][:-1])
+    break2_1 = int(trio[2].split(',')[0][1:])
+    break2_2 = int(trio[2].split(',')[1][:-1])
+
+
+    recomb_sample = ""
+    donor_sample = ""
+    acceptor_sample = ""
+
+    recomb_samples = []
+    donor_samples = []
+    acceptor_samples = []
 
-    samples = samplelines[i][1].split(',')
+    recomb_mutations = []
+    donor_mutations = []
+    acceptor_mutations = []
 
 
-    if int(samplelines[i][0]) == recomb_id:
+    if recomb_id in tables.sampleinfo_by_node:
+        samples, recomb_mutations = tables.sampleinfo_by_node[recomb_id]
         recomb_sample = samples[0]
         recomb_samples = samples[:10]
-        recomb_mutations = samplelines[i][2].split(',')
 
-    if int(samplelines[i][0]) == donor_id:
+    if donor_id in tables.sampleinfo_by_node:
+        samples, donor_mutations = tables.sampleinfo_by_node[donor_id]
         donor_sample = samples[0]
         donor_samples = samples[:10]
-        donor_mutations = samplelines[i][2].split(',')
 
-    if int(samplelines[i][0]) == acceptor_id:
+    if acceptor_id in tables.sampleinfo_by_node:
+        samples, acceptor_mutations = tables.sampleinfo_by_node[acceptor_id]
         acceptor_sample = samples[0]
         acceptor_samples = samples[:10]
-        acceptor_mutations = samplelines[i][2].split(',')
 
 
-inf_file = open(relevent_sites_file_name, 'r')
-inf_lines = inf_file.readlines()
-inf_file.close()
+    mutagens = tables.inf_sites_by_trio.get((recomb_id, donor_id, acceptor_id), [])
 
-mutagens = []
 
-for line in inf_lines:
-    line = line.split('\t')
-    if int(line[0]) == recomb_id and int(line[1]) == donor_id and int(line[2]) == acceptor_id:
-        mutagens = line[7].split(',')
-        break
+    mutagens = [int(x) for x in mutagens]
+    mutagens.sort()
 
+    mutations = list(set().union(recomb_mutations, donor_mutations, acceptor_mutations))
+    mutations = [int(x) for x in mutations]
+    mutations.sort()
 
-mutagens = [int(x) for x in mutagens]
-mutagens.sort()
+    if len(mutagens) > 0:
+        mutations = mutagens
+        recomb_mutations = []
+        donor_mutations = []
+        acceptor_mutations = []
 
-mutations = list(set().union(recomb_mutations, donor_mutations, acceptor_mutations))
-mutations = [int(x) for x in mutations]
-mutations.sort()
+    mutations_new_coords = []
+    for x in mutations:
+        mutations_new_coords.append(int(x))
 
-if len(mutagens) > 0:
-    mutations = mutagens
-    recomb_mutations = []
-    donor_mutations = []
-    acceptor_mutations = []
-    
-mutations_new_coords = []
-for x in mutations:
-    mutations_new_coords.append(int(x))
-
-pre_recomb_mutations = []
-pre_donor_mutations = []
-pre_acceptor_mutations = []
-
-trecomb_mutations = []
-for x in recomb_mutations:
-    pre_recomb_mutations.append(int(x))
-    trecomb_mutations.append(int(x))
-    
-tdonor_mutations = []
-for x in donor_mutations:
-    pre_donor_mutations.append(int(x))
-    tdonor_mutations.append(int(x))
-
-tacceptor_mutations = []
-for x in acceptor_mutations:
-    pre_acceptor_mutations.append(int(x))
-    tacceptor_mutations.append(int(x))
-
-
-dna = open("filtering/fastas/AlignedRecombs/%d.fa" % index_to_check)
-dna_lines = dna.readlines()
-
-base_count = 0
-
-#Matching mutations to reference
-for i in range(1, len(dna_lines)):
-    line = dna_lines[i].strip()
-    
-    if line[0] == '>':
-        break
-    
-    for j in range(len(line)):
-        if line[j] == '-':
-            for k in range(len(mutations_new_coords)):
-                if (mutations_new_coords[k] >= base_count):
-                    mutations_new_coords[k] += 1
-            for k in range(len(trecomb_mutations)):
-                if (trecomb_mutations[k] >= base_count):
-                    trecomb_mutations[k] += 1 
-            for k in range(len(tdonor_mutations)):
-                if (tdonor_mutations[k] >= base_count):
-                    tdonor_mutations[k] += 1
-            for k in range(len(tacceptor_mutations)):
-                if (tacceptor_mutations[k] >= base_count):
-                    tacceptor_mutations[k] += 1
-        base_count += 1
-
-
-trecomb_mutations.sort()
-tdonor_mutations.sort()
-tacceptor_mutations.sort()
-
-recomb_mutations = trecomb_mutations
-donor_mutations = tdonor_mutations
-acceptor_mutations = tacceptor_mutations
-
-
-base_count = 0
-
-in_recomb = False
-in_donor = False
-in_acceptor = False
-
-
-recomb_reads = [[] for x in mutations]
-donor_reads = [[] for x in mutations]
-acceptor_reads = [[] for x in mutations]
-
-trecomb_reads   = [[[] for y in mutations] for x in recomb_samples]
-tdonor_reads    = [[[] for y in mutations] for x in donor_samples]
-tacceptor_reads = [[[] for y in mutations] for x in acceptor_samples]
-
-recomb_index   = 0
-donor_index    = 0
-acceptor_index = 0
-
-
-
-#grabbing reads, nearest 50 bp to mutation sites
-for i in range(len(dna_lines)):
-    possible_name = dna_lines[i]
-
-    possible_name.strip()
-
-    if in_recomb or in_donor or in_acceptor:
-        base_list = dna_lines[i]
-        base_list = base_list.strip()
-        base_list = [char for char in base_list]
-        
-        
-
-        for j in range(len(base_list)):
-            base_count += 1
-            for h in range(len(mutations)):
-                if int(mutations_new_coords[h]) + 50 >= base_count and int(mutations_new_coords[h]) - 50 <= base_count:
-                    if in_recomb:
-                        #recomb_reads[h].append(base_list[j])
-                        trecomb_reads[recomb_index][h].append(base_list[j])
-                    if in_donor:
-                        #donor_reads[h].append(base_list[j])
-                        tdonor_reads[donor_index][h].append(base_list[j])
-                    if in_acceptor:
-                        #acceptor_reads[h].append(base_list[j])
-                        tacceptor_reads[acceptor_index][h].append(base_list[j])
-    
-    if possible_name[0] == '>':
-        base_count = 0
-        in_recomb = False
-        in_donor = False
-        in_acceptor = False
-
-        possible_name = possible_name[1:-1]
+    pre_recomb_mutations = []
+    pre_donor_mutations = []
+    pre_acceptor_mutations = []
 
-        #Accounting for coords that jalview adds to some samplenames
-        if possible_name.rfind('/') > possible_name.rfind('|'):
-            possible_name = possible_name[:-8]
+    trecomb_mutations = []
+    for x in recomb_mutations:
+        pre_recomb_mutations.append(int(x))
+        trecomb_mutations.append(int(x))
 
-        if possible_name in recomb_samples:
-            recomb_index = recomb_samples.index(possible_name)
-            in_recomb = True
-        if possible_name in donor_samples:
-            donor_index = donor_samples.index(possible_name)
-            in_donor = True
-        if possible_name in acceptor_samples:
-            acceptor_index = acceptor_samples.index(possible_name)
-            in_acceptor = True
-
-        if possible_name == recomb_sample:
-            in_recomb = True
-        if possible_name == donor_sample:
-            in_donor = True
-        if possible_name == acceptor_sample:
-            in_acceptor = True
-    
+    tdonor_mutations = []
+    for x in donor_mutations:
+        pre_donor_mutations.append(int(x))
+        tdonor_mutations.append(int(x))
 
+    tacceptor_mutations = []
+    for x in acceptor_mutations:
+        pre_acceptor_mutations.append(int(x))
+        tacceptor_mutations.append(int(x))
 
 
-#removing empty reads
-recomb_sample_missing = [True for x in recomb_samples]
-donor_sample_missing = [True for x in donor_samples]
-acceptor_sample_missing = [True for x in acceptor_samples]
+    dna = open(os.path.join(aligned_dir_name, "%d.fa" % index_to_check))
+    dna_lines = dna.readlines()
+    dna.close()
 
+    #Matching mutations to reference
+    ref_gaps = reference_gaps(dna_lines)
+    mutations_new_coords = to_alignment_coords(mutations_new_coords, ref_gaps)
+    trecomb_mutations = to_alignment_coords(trecomb_mutations, ref_gaps)
+    tdonor_mutations = to_alignment_coords(tdonor_mutations, ref_gaps)
+    tacceptor_mutations = to_alignment_coords(tacceptor_mutations, ref_gaps)
 
-temp_recomb_reads   = []
-temp_donor_reads    = []
-temp_acceptor_reads = []
 
-for i in range(len(trecomb_reads)):
-    if len(trecomb_reads[i][0]) > 1:
-        temp_recomb_reads.append(trecomb_reads[i])
-        recomb_sample_missing[i] = False
-trecomb_reads = temp_recomb_reads
+    trecomb_mutations.sort()
+    tdonor_mutations.sort()
+    tacceptor_mutations.sort()
 
-for i in range(len(tdonor_reads)):
-    if len(tdonor_reads[i][0]) > 1:
-        temp_donor_reads.append(tdonor_reads[i])
-        donor_sample_missing[i] = False
-tdonor_reads = temp_donor_reads
+    recomb_mutations = trecomb_mutations
+    donor_mutations = tdonor_mutations
+    acceptor_mutations = tacceptor_mutations
 
-for i in range(len(tacceptor_reads)):
-    if len(tacceptor_reads[i][0]) > 1:
-        temp_acceptor_reads.append(tacceptor_reads[i])
-        acceptor_sample_missing[i] = False
-tacceptor_reads = temp_acceptor_reads
 
+    recomb_reads = [[] for x in mutations]
+    donor_reads = [[] for x in mutations]
+    acceptor_reads = [[] for x in mutations]
 
-for i in range(len(trecomb_reads)):
-    for j in range(len(trecomb_reads[0])):
-        trecomb_reads[i][j] = trecomb_reads[i][j][:101]
 
-for i in range(len(tdonor_reads)):
-    for j in range(len(tdonor_reads[0])):
-        tdonor_reads[i][j] = tdonor_reads[i][j][:101]
+    #grabbing reads, nearest 50 bp to mutation sites
+    records = aligned_records(dna_lines)
+    trecomb_reads   = sample_windows(records, recomb_samples, mutations_new_coords)
+    tdonor_reads    = sample_windows(records, donor_samples, mutations_new_coords)
+    tacceptor_reads = sample_windows(records, acceptor_samples, mutations_new_coords)
 
-for i in range(len(tacceptor_reads)):
-    for j in range(len(tacceptor_reads[0])):
-        tacceptor_reads[i][j] = tacceptor_reads[i][j][:101]
 
+    #removing empty reads
+    recomb_sample_missing = [True for x in recomb_samples]
+    donor_sample_missing = [True for x in donor_samples]
+    acceptor_sample_missing = [True for x in acceptor_samples]
 
-error_string = "%d\t%d\t%d\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t%d\t" % (recomb_id, donor_id, acceptor_id, index_to_check)
-error = False
-
-if len(trecomb_reads) == 0:
-    error_string += "Missing all recomb samples\t"
-    print("Missing all recomb samples")
-    error = True
-
-if len(tdonor_reads) == 0:
-    error_string += "Missing all donor samples\t"
-    print("Missing all donor samples")
-    error = True
-
-if len(tacceptor_reads) == 0:
-    error_string += "Missing all acceptor samples\t"
-    print("Missing all acceptor samples")
-    error = True
 
-error_string += "\n"
+    temp_recomb_reads   = []
+    temp_donor_reads    = []
+    temp_acceptor_reads = []
 
+    for i in range(len(trecomb_reads)):
+        if len(trecomb_reads[i][0]) > 1:
+            temp_recomb_reads.append(trecomb_reads[i])
+            recomb_sample_missing[i] = False
+    trecomb_reads = temp_recomb_reads
 
-if error:
-    if(len(sys.argv) > 2):
-        report_file = open("filtering/data/report.txt", 'a')
-        report_file.write(error_string)
-        report_file.close()
+    for i in range(len(tdonor_reads)):
+        if len(tdonor_reads[i][0]) > 1:
+            temp_donor_reads.append(tdonor_reads[i])
+            donor_sample_missing[i] = False
+    tdonor_reads = temp_donor_reads
 
-    sys.exit()
+    for i in range(len(tacceptor_reads)):
+        if len(tacceptor_reads[i][0]) > 1:
+            temp_acceptor_reads.append(tacceptor_reads[i])
+            acceptor_sample_missing[i] = False
+    tacceptor_reads = temp_acceptor_reads
 
 
+    for i in range(len(trecomb_reads)):
+        for j in range(len(trecomb_reads[0])):
+            trecomb_reads[i][j] = trecomb_reads[i][j][:101]
 
-#Creating consensus sequence
-for mutation in range(len(trecomb_reads[0])):
+    for i in range(len(tdonor_reads)):
+        for j in range(len(tdonor_reads[0])):
+            tdonor_reads[i][j] = tdonor_reads[i][j][:101]
 
-    for b in range(len(trecomb_reads[0][mutation])):
-        
+    for i in range(len(tacceptor_reads)):
+        for j in range(len(tacceptor_reads[0])):
+            tacceptor_reads[i][j] = tacceptor_reads[i][j][:101]
 
-        base_over_samples = []
 
-        for i in range(len(trecomb_reads)):
-            base = trecomb_reads[i][mutation][b]
-            base_over_samples.append(base)
-        
-        c = Counter(base_over_samples)
-        common = c.most_common(2)
-        base = common[0][0]
-        
-        
-        if (base == 'n' or base == '-') and len(common) > 1:
-            next_best_base = common[1][0]
+    error_string = "%d\t%d\t%d\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t%d\t" % (recomb_id, donor_id, acceptor_id, index_to_check)
+    error = False
 
-            if next_best_base != 'n' and next_best_base != '-' and common[0][1] == common[1][1]:
-                base = next_best_base
+    if len(trecomb_reads) == 0:
+        error_string += "Missing all recomb samples\t"
+        print("Missing all recomb samples")
+        error = True
 
-        recomb_reads[mutation].append(base)
+    if len(tdonor_reads) == 0:
+        error_string += "Missing all donor samples\t"
+        print("Missing all donor samples")
+        error = True
 
-for mutation in range(len(tdonor_reads[0])):
+    if len(tacceptor_reads) == 0:
+        error_string += "Missing all acceptor samples\t"
+        print("Missing all acceptor samples")
+        error = True
 
-    for b in range(len(tdonor_reads[0][mutation])):
+    error_string += "\n"
 
-        base_over_samples = []
 
-        for i in range(len(tdonor_reads)):
-            base = tdonor_reads[i][mutation][b]
-            base_over_samples.append(base)
+    if error:
+        return (False, [recomb_id, donor_id, acceptor_id] + [None]*23 + [index_to_check] + error_string.split('\t')[27:-1])
 
-        c = Counter(base_over_samples)
-        common = c.most_common(2)
-        base = common[0][0]
-        
-        
-        if (base == 'n' or base == '-') and len(common) > 1:
-            next_best_base = common[1][0]
 
-            if next_best_base != 'n' and next_best_base != '-' and common[0][1] == common[1][1]:
-                base = next_best_base
-        
-        donor_reads[mutation].append(base)
 
+    #Creating consensus sequence
+    recomb_reads   = consensus(trecomb_reads)
+    donor_reads    = consensus(tdonor_reads)
+    acceptor_reads = consensus(tacceptor_reads)
 
-for mutation in range(len(tacceptor_reads[0])):
 
-    for b in range(len(tacceptor_reads[0][mutation])):
 
-        base_over_samples = []
+    #finding specific mutations
+    if len(mutagens) > 0:
+        recomb_mutations = []
+        donor_mutations = []
+        acceptor_mutations = []
 
-        for i in range(len(tacceptor_reads)):
-            base = tacceptor_reads[i][mutation][b]
-            base_over_samples.append(base)
+        for i in range(len(mutations)):
+            if recomb_reads[i][50] != donor_reads[i][50] and recomb_reads[i][50] != acceptor_reads[i][50]:
+                recomb_mutations.append(mutations[i])
 
-        c = Counter(base_over_samples)
-        common = c.most_common(2)
-        base = common[0][0]
-        
-        
-        if (base == 'n' or base == '-') and len(common) > 1:
-            next_best_base = common[1][0]
+            if donor_reads[i][50] != recomb_reads[i][50] and donor_reads[i][50] != acceptor_reads[i][50]:
+                donor_mutations.append(mutations[i])
 
-            if next_best_base != 'n' and next_best_base != '-' and common[0][1] == common[1][1]:
-                base = next_best_base
-        
-        acceptor_reads[mutation].append(base)
-            
+            if acceptor_reads[i][50] != recomb_reads[i][50] and acceptor_reads[i][50] != donor_reads[i][50]:
+                acceptor_mutations.append(mutations[i])
 
 
-#finding specific mutations
-if len(mutagens) > 0:
-    recomb_mutations = []
-    donor_mutations = []
-    acceptor_mutations = []
 
-    for i in range(len(mutations)):
-        if recomb_reads[i][50] != donor_reads[i][50] and recomb_reads[i][50] != acceptor_reads[i][50]:
-            recomb_mutations.append(mutations[i])
-    
-        if donor_reads[i][50] != recomb_reads[i][50] and donor_reads[i][50] != acceptor_reads[i][50]:
-            donor_mutations.append(mutations[i])
-    
-        if acceptor_reads[i][50] != recomb_reads[i][50] and acceptor_reads[i][50] != donor_reads[i][50]:
-            acceptor_mutations.append(mutations[i])
 
+    nearest_weirdness = nearest_weirdness_of(recomb_reads, donor_reads, acceptor_reads)
+
+    #region 1 is before breakpoint 1
+    #region 2 is within breakpoint 1 interval
+    #region 3 is after breakpoint 1, before breakpoint 2
+    #region 4 is within breakpoint 1 interval
+    #region 5 is after breakpoint 2
+
+    acptr_matches_in_region_1 = 0
+    donor_matches_in_region_1 = 0
+    acptr_matches_in_region_2 = 0
+    donor_matches_in_region_2 = 0
+    acptr_matches_in_region_3 = 0
+    donor_matches_in_region_3 = 0
+    acptr_matches_in_region_4 = 0
+    donor_matches_in_region_4 = 0
+    acptr_matches_in_region_5 = 0
+    donor_matches_in_region_5 = 0
+
+
+    INDEL_in_wrong_place = False
+    too_many_mutations_near_indel = False
+    mutations_on_indels = 0
 
 
 
-nearest_weirdness = [50] * len(mutations)
+    for i in range(len(mutations)):
+
+        #finding nearest weirdness
+        if nearest_weirdness[i] is None:
+            raise IndexError("consensus reads of mutation %d are shorter than 101" % mutations[i])
+
+        weird = nearest_weirdness[i] < 5
+
+        if nearest_weirdness[i] == 0:
+            if recomb_reads[i][50] != '-' or donor_reads[i][50] != '-' or acceptor_reads[i][50] != '-':
+                mutations_on_indels += 1
+
+        print()
+        where_we_are_string = ""
+
+        in_good_region = 200 < mutations[i] and mutations[i] < 29800
+
+        if(mutations[i] <= break1_1):
+            where_we_are_string = "before breakpoint 1, should match acceptor"
+            donor_matches_in_region_1 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
+            acptr_matches_in_region_1 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
+
+
+            if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if acceptor_reads[i][50 + j] != '-' and acceptor_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+            if acceptor_reads[i][50] != '-' and acceptor_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+        if(break1_1 < mutations[i] and mutations[i] < break1_2):
+            where_we_are_string = "within breakpoint 1 interval"
+            donor_matches_in_region_2 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
+            acptr_matches_in_region_2 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
+
+        if(break1_2 <= mutations[i] and mutations[i] <= break2_1):
+            where_we_are_string = "after breakpoint 1, before breakpoint 2, should match donor"
+            donor_matches_in_region_3 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
+            acptr_matches_in_region_3 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
+
+
+            if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if donor_reads[i][50 + j] != '-' and donor_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+            if donor_reads[i][50] != '-' and donor_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+        if(break2_1 < mutations[i] and mutations[i] < break2_2):
+            where_we_are_string = "within breakpoint 2 interval"
+            donor_matches_in_region_4 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
+            acptr_matches_in_region_4 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
+
+        if(break2_2 <= mutations[i]):
+            where_we_are_string = "after breakpoint 2, should match acceptor"
+            donor_matches_in_region_5 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
+            acptr_matches_in_region_5 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
+
+            if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if acceptor_reads[i][50 + j] != '-' and acceptor_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+            if acceptor_reads[i][50] != '-' and acceptor_reads[i][50] != 'n' and in_good_region:
+                INDEL = True
+                for j in range(-5,6):
+                    if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
+                        INDEL = False
+                if INDEL:
+                    INDEL_in_wrong_place = True
+
+
+
+        print("mutation site", mutations[i], where_we_are_string)
+        print("\t\t", "                                                  v")
+
+        recomb_read = ""
+        recomb_read = recomb_read.join(recomb_reads[i])
+        print(recomb_id, "\trecomb\t", recomb_read)
+        donor_read = ""
+        donor_read = donor_read.join(donor_reads[i])
+        print(donor_id, "\tdonor\t", donor_read)
+        acceptor_read = ""
+        acceptor_read = acceptor_read.join(acceptor_reads[i])
+        print(acceptor_id, "\taccptr\t", acceptor_read)
+        print()
+        for j in range(len(trecomb_reads)):
+            recomb_read = ""
+            recomb_read = recomb_read.join(trecomb_reads[j][i])
+            print(recomb_id, "\trecomb\t", recomb_read)
+        for j in range(len(tdonor_reads)):
+            donor_read = ""
+            donor_read = donor_read.join(tdonor_reads[j][i])
+            print(donor_id, "\tdonor\t", donor_read)
+        for j in range(len(tacceptor_reads)):
+            acceptor_read = ""
+            acceptor_read = acceptor_read.join(tacceptor_reads[j][i])
+            print(acceptor_id, "\taccptr\t", acceptor_read)
 
-#region 1 is before breakpoint 1
-#region 2 is within breakpoint 1 interval
-#region 3 is after breakpoint 1, before breakpoint 2
-#region 4 is within breakpoint 1 interval
-#region 5 is after breakpoint 2
 
-acptr_matches_in_region_1 = 0
-donor_matches_in_region_1 = 0
-acptr_matches_in_region_2 = 0
-donor_matches_in_region_2 = 0
-acptr_matches_in_region_3 = 0
-donor_matches_in_region_3 = 0
-acptr_matches_in_region_4 = 0
-donor_matches_in_region_4 = 0
-acptr_matches_in_region_5 = 0
-donor_matches_in_region_5 = 0
+    print()
+    print("Nearest weirdness to mutations:")
+    print("site\tNearest weirdness")
 
+    weird_mutations = 0
 
-INDEL_in_wrong_place = False
-too_many_mutations_near_indel = False
-mutations_on_indels = 0
+    bad_near_weirdness, iffy_near_weirdness = weirdness_counts(recomb_reads, donor_reads, acceptor_reads, nearest_weirdness)
 
+    for i in range(len(mutations)):
+        print(mutations[i], '\t', nearest_weirdness[i])
+        if nearest_weirdness[i] < 2:
+            weird_mutations += 1
+        if nearest_weirdness[i] <= 5:
+            if bad_near_weirdness[i] + iffy_near_weirdness[i] >= 5 and iffy_near_weirdness[i] < 5:
+                too_many_mutations_near_indel = True
 
 
-for i in range(len(mutations)):
 
-    #finding nearest weirdness
-    for j in range(51):
-        not_all_dashes_p = recomb_reads[i][50+j] != '-' or donor_reads[i][50+j] != '-' or acceptor_reads[i][50+j] != '-'
-        not_all_dashes_n = recomb_reads[i][50-j] != '-' or donor_reads[i][50-j] != '-' or acceptor_reads[i][50-j] != '-'
 
-        if (recomb_reads[i][50+j] == '-' or recomb_reads[i][50+j] == 'n') and not_all_dashes_p:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
-        if (recomb_reads[i][50-j] == '-' or recomb_reads[i][50-j] == 'n') and not_all_dashes_n:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
-        if (donor_reads[i][50+j] == '-' or donor_reads[i][50+j] == 'n') and not_all_dashes_p:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
-        if (donor_reads[i][50-j] == '-' or donor_reads[i][50-j] == 'n') and not_all_dashes_n:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
-        if (acceptor_reads[i][50+j] == '-' or acceptor_reads[i][50+j] == 'n') and not_all_dashes_p:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
-        if (acceptor_reads[i][50-j] == '-' or acceptor_reads[i][50-j] == 'n') and not_all_dashes_n:
-            nearest_weirdness[i] = min(nearest_weirdness[i], j)
 
-    weird = nearest_weirdness[i] < 5
+    if weird_mutations >= 6:
+        too_many_mutations_near_indel = True
+    if mutations_on_indels >= 1:
+        too_many_mutations_near_indel = True
 
-    if nearest_weirdness[i] == 0:
-        if recomb_reads[i][50] != '-' or donor_reads[i][50] != '-' or acceptor_reads[i][50] != '-':
-            mutations_on_indels += 1
 
+    #matches are only with no weirdness 4 bp near
     print()
-    where_we_are_string = ""
-
-    in_good_region = 200 < mutations[i] and mutations[i] < 29800
-
-    if(mutations[i] <= break1_1):
-        where_we_are_string = "before breakpoint 1, should match acceptor"
-        donor_matches_in_region_1 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
-        acptr_matches_in_region_1 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
-
-
-        if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if acceptor_reads[i][50 + j] != '-' and acceptor_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-        
-        if acceptor_reads[i][50] != '-' and acceptor_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-
-    if(break1_1 < mutations[i] and mutations[i] < break1_2):
-        where_we_are_string = "within breakpoint 1 interval"
-        donor_matches_in_region_2 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
-        acptr_matches_in_region_2 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
-
-    if(break1_2 <= mutations[i] and mutations[i] <= break2_1):
-        where_we_are_string = "after breakpoint 1, before breakpoint 2, should match donor"
-        donor_matches_in_region_3 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
-        acptr_matches_in_region_3 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
-        
-
-        if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if donor_reads[i][50 + j] != '-' and donor_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-        
-        if donor_reads[i][50] != '-' and donor_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-
-    if(break2_1 < mutations[i] and mutations[i] < break2_2):
-        where_we_are_string = "within breakpoint 2 interval"
-        donor_matches_in_region_4 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
-        acptr_matches_in_region_4 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
-
-    if(break2_2 <= mutations[i]):
-        where_we_are_string = "after breakpoint 2, should match acceptor"
-        donor_matches_in_region_5 += (recomb_reads[i][50] == donor_reads[i][50]) and not weird
-        acptr_matches_in_region_5 += (recomb_reads[i][50] == acceptor_reads[i][50]) and not weird
-
-        if recomb_reads[i][50] != '-' and recomb_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if acceptor_reads[i][50 + j] != '-' and acceptor_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-        
-        if acceptor_reads[i][50] != '-' and acceptor_reads[i][50] != 'n' and in_good_region:
-            INDEL = True
-            for j in range(-5,6):
-                if recomb_reads[i][50 + j] != '-' and recomb_reads[i][50 + j] != 'n':
-                    INDEL = False
-            if INDEL:
-                INDEL_in_wrong_place = True
-
-    
-
-    print("mutation site", mutations[i], where_we_are_string)
-    print("\t\t", "                                                  v")
-
-    recomb_read = ""
-    recomb_read = recomb_read.join(recomb_reads[i])
-    print(recomb_id, "\trecomb\t", recomb_read)
-    donor_read = ""
-    donor_read = donor_read.join(donor_reads[i])
-    print(donor_id, "\tdonor\t", donor_read)
-    acceptor_read = ""
-    acceptor_read = acceptor_read.join(acceptor_reads[i])
-    print(acceptor_id, "\taccptr\t", acceptor_read)
+    print("Matches:")
+    print("region\tdonor\taccptr\tshould skew")
+    print("1\t", donor_matches_in_region_1,"\t", acptr_matches_in_region_1, "\tacceptor")
+    print("2\t", donor_matches_in_region_2,"\t", acptr_matches_in_region_2)
+    print("3\t", donor_matches_in_region_3,"\t", acptr_matches_in_region_3, "\tdonor")
+    print("4\t", donor_matches_in_region_4,"\t", acptr_matches_in_region_4)
+    print("5\t", donor_matches_in_region_5,"\t", acptr_matches_in_region_5, "\tacceptor")
+
+    print()
+    for j in range(len(recomb_samples)):
+        print("recomb sample", recomb_samples[j] , "\tMISSING" if recomb_sample_missing[j] else "")
+    for j in range(len(donor_samples)):
+        print("donor  sample", donor_samples[j] , "\tMISSING" if donor_sample_missing[j]  else "")
+    for j in range(len(acceptor_samples)):
+        print("accptr sample", acceptor_samples[j], "\tMISSING" if acceptor_sample_missing[j]  else "")
     print()
-    for j in range(len(trecomb_reads)):
-        recomb_read = ""
-        recomb_read = recomb_read.join(trecomb_reads[j][i])
-        print(recomb_id, "\trecomb\t", recomb_read)
-    for j in range(len(tdonor_reads)):
-        donor_read = ""
-        donor_read = donor_read.join(tdonor_reads[j][i])
-        print(donor_id, "\tdonor\t", donor_read)
-    for j in range(len(tacceptor_reads)):
-        acceptor_read = ""
-        acceptor_read = acceptor_read.join(tacceptor_reads[j][i])
-        print(acceptor_id, "\taccptr\t", acceptor_read)
 
+    for j in range(len(tables.labels)):
+        print(tables.labels[j], trio[j])
 
-print()
-print("Nearest weirdness to mutations:")
-print("site\tNearest weirdness")
-
-weird_mutations = 0
-
-for i in range(len(mutations)):
-    print(mutations[i], '\t', nearest_weirdness[i])
-    if nearest_weirdness[i] < 2:
-        weird_mutations += 1
-    if nearest_weirdness[i] <= 5:
-        
-        bad = 0
-        iffy = 0
-
-        for j in range(5):
-            dashes = 0
-            ns = 0
-            if recomb_reads[i][50+nearest_weirdness[i] + j] == '-':
-                dashes += 1
-            if donor_reads[i][50+nearest_weirdness[i] + j] == '-':
-                dashes += 1
-            if acceptor_reads[i][50+nearest_weirdness[i] + j] == '-':
-                dashes += 1
-            if recomb_reads[i][50+nearest_weirdness[i] + j] == 'n':
-                ns += 1
-            if donor_reads[i][50+nearest_weirdness[i] + j] == 'n':
-                ns += 1
-            if acceptor_reads[i][50+nearest_weirdness[i] + j] == 'n':
-                ns += 1
-            if 0 < dashes and dashes < 3:
-                bad += 1
-            if dashes == 3:
-                iffy +=1
-            if 0 < ns:
-                bad += 1
-            
-            dashes = 0
-            ns = 0
-            if recomb_reads[i][50-nearest_weirdness[i] - j] == '-':
-                dashes += 1
-            if donor_reads[i][50-nearest_weirdness[i] - j] == '-':
-                dashes += 1
-            if acceptor_reads[i][50-nearest_weirdness[i] - j] == '-':
-                dashes += 1
-            if recomb_reads[i][50-nearest_weirdness[i] - j] == 'n':
-                ns += 1
-            if donor_reads[i][50-nearest_weirdness[i] - j] == 'n':
-                ns += 1
-            if acceptor_reads[i][50-nearest_weirdness[i] - j] == 'n':
-                ns += 1
-            if 0 < dashes and dashes < 3:
-                bad += 1
-            if dashes == 3:
-                iffy +=1
-            if 0 < ns:
-                bad += 1
-        
-        if bad + iffy >= 5 and iffy < 5:
-            too_many_mutations_near_indel = True
-            
-
-
-
-
-if weird_mutations >= 6:
-    too_many_mutations_near_indel = True
-if mutations_on_indels >= 1:
-    too_many_mutations_near_indel = True
-
-
-#matches are only with no weirdness 4 bp near
-print()
-print("Matches:")
-print("region\tdonor\taccptr\tshould skew")
-print("1\t", donor_matches_in_region_1,"\t", acptr_matches_in_region_1, "\tacceptor")
-print("2\t", donor_matches_in_region_2,"\t", acptr_matches_in_region_2)
-print("3\t", donor_matches_in_region_3,"\t", acptr_matches_in_region_3, "\tdonor")
-print("4\t", donor_matches_in_region_4,"\t", acptr_matches_in_region_4)
-print("5\t", donor_matches_in_region_5,"\t", acptr_matches_in_region_5, "\tacceptor")
-
-print()
-for j in range(len(recomb_samples)):
-    print("recomb sample", recomb_samples[j] , "\tMISSING" if recomb_sample_missing[j] else "")
-for j in range(len(donor_samples)):
-    print("donor  sample", donor_samples[j] , "\tMISSING" if donor_sample_missing[j]  else "")
-for j in range(len(acceptor_samples)):
-    print("accptr sample", acceptor_samples[j], "\tMISSING" if acceptor_sample_missing[j]  else "")
-print()
-
-for j in range(len(labels)):
-	print(labels[j], lines_sorted_by_parsimony_change[index_to_check][j])
-
-
-
-pre_b1_skew                 = acptr_matches_in_region_1 - donor_matches_in_region_1
-btw_b1_b2_skew              = donor_matches_in_region_3 - acptr_matches_in_region_3
-post_b2_skew                = acptr_matches_in_region_5 - donor_matches_in_region_5
-
-not_enough_acceptor_matches = pre_b1_skew <= 0 and post_b2_skew <= 0
-not_enough_donor_matches    = btw_b1_b2_skew <= 0
-
-unnecessary_breakpoint = (pre_b1_skew < 0 and post_b2_skew > 0) or (pre_b1_skew > 0 and post_b2_skew < 0)
-
-
-#detecting mutation clumping ########################################
-                                                                    #
-most_mutations_in_20 = 0
-site_of_most_mutations = 0
-lower_index_of_most_mutations = 0
-index_of_most_mutations = 0
-most_clumps_in = ""
-
-for i in range(len(recomb_mutations)):
-    mutations_in_20 = 1
-    temp_lower_index = 0
-    for j in range(i):
-        if recomb_mutations[j] >= recomb_mutations[i] - 20:
-            if mutations_in_20 == 1:
-                temp_lower_index = j
-            mutations_in_20 += 1
-    if mutations_in_20 >= most_mutations_in_20:
-        most_mutations_in_20 = mutations_in_20
-        site_of_most_mutations = recomb_mutations[i]
-        lower_index_of_most_mutations = temp_lower_index
-        index_of_most_mutations = i
-        most_clumps_in = "recomb"
-
-for i in range(len(donor_mutations)):
-    mutations_in_20 = 1
-    temp_lower_index = 0
-    for j in range(i):
-        if donor_mutations[j] >= donor_mutations[i] - 20:
-            if mutations_in_20 == 1:
-                temp_lower_index = j
-            mutations_in_20 += 1
-    if mutations_in_20 >= most_mutations_in_20:
-        most_mutations_in_20 = mutations_in_20
-        site_of_most_mutations = donor_mutations[i]
-        lower_index_of_most_mutations = temp_lower_index
-        index_of_most_mutations = i
-        most_clumps_in = "donor"
-
-for i in range(len(acceptor_mutations)):
-    mutations_in_20 = 1
-    temp_lower_index = 0
-    for j in range(i):
-        if acceptor_mutations[j] >= acceptor_mutations[i] - 20:
-            if mutations_in_20 == 1:
-                temp_lower_index = j
-            mutations_in_20 += 1
-    if mutations_in_20 >= most_mutations_in_20:
-        most_mutations_in_20 = mutations_in_20
-        site_of_most_mutations = acceptor_mutations[i]
-        lower_index_of_most_mutations = temp_lower_index
-        index_of_most_mutations = i
-        most_clumps_in = "acceptor"
-                                                                    #
-#####################################################################
-
-
-
-#Find out size of indel near clump, near meaning less than 1 base pair away####
-                                                                              #
-indel_near_clump_size = 0
-indel_near_clump = False
-
-clump_reads = [[],[],[],[],[],[]]
-
-for i in range(len(mutations)):
-    if most_clumps_in == "recomb":
-        if mutations[i] == recomb_mutations[lower_index_of_most_mutations]:
-            clump_reads[0] = recomb_reads[i]
-            clump_reads[1] = donor_reads[i]
-            clump_reads[2] = acceptor_reads[i]
-        if mutations[i] == recomb_mutations[index_of_most_mutations]:
-            clump_reads[3] = recomb_reads[i]
-            clump_reads[4] = donor_reads[i]
-            clump_reads[5] = acceptor_reads[i]
-    if most_clumps_in == "donor":
-        if mutations[i] == donor_mutations[lower_index_of_most_mutations]:
-            clump_reads[0] = recomb_reads[i]
-            clump_reads[1] = donor_reads[i]
-            clump_reads[2] = acceptor_reads[i]
-        if mutations[i] == donor_mutations[index_of_most_mutations]:
-            clump_reads[3] = recomb_reads[i]
-            clump_reads[4] = donor_reads[i]
-            clump_reads[5] = acceptor_reads[i]
-    if most_clumps_in == "acceptor":
-        if mutations[i] == acceptor_mutations[lower_index_of_most_mutations]:
-            clump_reads[0] = recomb_reads[i]
-            clump_reads[1] = donor_reads[i]
-            clump_reads[2] = acceptor_reads[i]
-        if mutations[i] == acceptor_mutations[index_of_most_mutations]:
-            clump_reads[3] = recomb_reads[i]
-            clump_reads[4] = donor_reads[i]
-            clump_reads[5] = acceptor_reads[i]
-
-
-
-
-temp_indel_near_clump_size = 0
-for j in range(50):
-
-    if j > 5 and not indel_near_clump:
-        break
-
-    lbase = clump_reads[0][50 - j]
-    rbase = clump_reads[3][50 + j]
-
-        
-    if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
-        if (j <= 5):
-            indel_near_clump = True
-            
-        temp_indel_near_clump_size += 1
 
-    else:
-        if (j <= 5):
-            temp_indel_near_clump_size = 0
-        else:
+
+    pre_b1_skew                 = acptr_matches_in_region_1 - donor_matches_in_region_1
+    btw_b1_b2_skew              = donor_matches_in_region_3 - acptr_matches_in_region_3
+    post_b2_skew                = acptr_matches_in_region_5 - donor_matches_in_region_5
+
+    not_enough_acceptor_matches = pre_b1_skew <= 0 and post_b2_skew <= 0
+    not_enough_donor_matches    = btw_b1_b2_skew <= 0
+
+    unnecessary_breakpoint = (pre_b1_skew < 0 and post_b2_skew > 0) or (pre_b1_skew > 0 and post_b2_skew < 0)
+
+
+    #detecting mutation clumping ########################################
+                                                                        #
+    most_mutations_in_20 = 0
+    site_of_most_mutations = 0
+    lower_index_of_most_mutations = 0
+    index_of_most_mutations = 0
+    most_clumps_in = ""
+
+    mutations_in_20, lower_index = sites_within(recomb_mutations, 20)
+    for i in range(len(recomb_mutations)):
+        if mutations_in_20[i] >= most_mutations_in_20:
+            most_mutations_in_20 = mutations_in_20[i]
+            site_of_most_mutations = recomb_mutations[i]
+            lower_index_of_most_mutations = lower_index[i]
+            index_of_most_mutations = i
+            most_clumps_in = "recomb"
+
+    mutations_in_20, lower_index = sites_within(donor_mutations, 20)
+    for i in range(len(donor_mutations)):
+        if mutations_in_20[i] >= most_mutations_in_20:
+            most_mutations_in_20 = mutations_in_20[i]
+            site_of_most_mutations = donor_mutations[i]
+            lower_index_of_most_mutations = lower_index[i]
+            index_of_most_mutations = i
+            most_clumps_in = "donor"
+
+    mutations_in_20, lower_index = sites_within(acceptor_mutations, 20)
+    for i in range(len(acceptor_mutations)):
+        if mutations_in_20[i] >= most_mutations_in_20:
+            most_mutations_in_20 = mutations_in_20[i]
+            site_of_most_mutations = acceptor_mutations[i]
+            lower_index_of_most_mutations = lower_index[i]
+            index_of_most_mutations = i
+            most_clumps_in = "acceptor"
+                                                                        #
+    #####################################################################
+
+
+
+    #Find out size of indel near clump, near meaning less than 1 base pair away####
+                                                                                  #
+    indel_near_clump_size = 0
+    indel_near_clump = False
+
+    clump_reads = [[],[],[],[],[],[]]
+
+    for i in range(len(mutations)):
+        if most_clumps_in == "recomb":
+            if mutations[i] == recomb_mutations[lower_index_of_most_mutations]:
+                clump_reads[0] = recomb_reads[i]
+                clump_reads[1] = donor_reads[i]
+                clump_reads[2] = acceptor_reads[i]
+            if mutations[i] == recomb_mutations[index_of_most_mutations]:
+                clump_reads[3] = recomb_reads[i]
+                clump_reads[4] = donor_reads[i]
+                clump_reads[5] = acceptor_reads[i]
+        if most_clumps_in == "donor":
+            if mutations[i] == donor_mutations[lower_index_of_most_mutations]:
+                clump_reads[0] = recomb_reads[i]
+                clump_reads[1] = donor_reads[i]
+                clump_reads[2] = acceptor_reads[i]
+            if mutations[i] == donor_mutations[index_of_most_mutations]:
+                clump_reads[3] = recomb_reads[i]
+                clump_reads[4] = donor_reads[i]
+                clump_reads[5] = acceptor_reads[i]
+        if most_clumps_in == "acceptor":
+            if mutations[i] == acceptor_mutations[lower_index_of_most_mutations]:
+                clump_reads[0] = recomb_reads[i]
+                clump_reads[1] = donor_reads[i]
+                clump_reads[2] = acceptor_reads[i]
+            if mutations[i] == acceptor_mutations[index_of_most_mutations]:
+                clump_reads[3] = recomb_reads[i]
+                clump_reads[4] = donor_reads[i]
+                clump_reads[5] = acceptor_reads[i]
+
+
+
+
+    temp_indel_near_clump_size = 0
+    for j in range(50):
+
+        if j > 5 and not indel_near_clump:
             break
-    
-indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
-temp_indel_near_clump_size = 0
-for j in range(50):
 
-    if j > 5 and not indel_near_clump:
-        break
+        lbase = clump_reads[0][50 - j]
+        rbase = clump_reads[3][50 + j]
 
-    lbase = clump_reads[1][50 - j]
-    rbase = clump_reads[4][50 + j]
 
+        if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
+            if (j <= 5):
+                indel_near_clump = True
 
-        
-    if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
-        if (j <= 5):
-            indel_near_clump = True
-            
-        temp_indel_near_clump_size += 1
+            temp_indel_near_clump_size += 1
 
-    else:
-        if (j <= 5):
-            temp_indel_near_clump_size = 0
         else:
+            if (j <= 5):
+                temp_indel_near_clump_size = 0
+            else:
+                break
+
+    indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
+    temp_indel_near_clump_size = 0
+    for j in range(50):
+
+        if j > 5 and not indel_near_clump:
             break
 
-indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
-temp_indel_near_clump_size = 0
-for j in range(50):
+        lbase = clump_reads[1][50 - j]
+        rbase = clump_reads[4][50 + j]
 
-    if j > 5 and not indel_near_clump:
-        break
 
-    lbase = clump_reads[2][50 - j]
-    rbase = clump_reads[5][50 + j]
 
-    if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
-        if (j <= 5):
-            indel_near_clump = True
-            
-        temp_indel_near_clump_size += 1
+        if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
+            if (j <= 5):
+                indel_near_clump = True
+
+            temp_indel_near_clump_size += 1
 
-    else:
-        if (j <= 5):
-            temp_indel_near_clump_size = 0
         else:
+            if (j <= 5):
+                temp_indel_near_clump_size = 0
+            else:
+                break
+
+    indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
+    temp_indel_near_clump_size = 0
+    for j in range(50):
+
+        if j > 5 and not indel_near_clump:
             break
-    
-indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
 
-                                                                              #
-#indel_near_clump_size is populated############################################
-
-
-
-suspicious_mutation_clump = most_mutations_in_20 >= 6 or (most_mutations_in_20 >= 3 and indel_near_clump_size >= 10)
+        lbase = clump_reads[2][50 - j]
+        rbase = clump_reads[5][50 + j]
+
+        if lbase == '-' or lbase == 'n' or rbase == '-' or rbase == 'n':
+            if (j <= 5):
+                indel_near_clump = True
 
+            temp_indel_near_clump_size += 1
+
+        else:
+            if (j <= 5):
+                temp_indel_near_clump_size = 0
+            else:
+                break
 
+    indel_near_clump_size = max(temp_indel_near_clump_size,indel_near_clump_size)
 
+                                                                                  #
+    #indel_near_clump_size is populated############################################
 
-most_informative_sites_in_20 = 0
-informative_clump_site = 0
 
-for i in range(len(mutations_new_coords)):
-    informative_sites_in_20 = 1
 
-    for j in range(i):
-        if mutations_new_coords[j] >= mutations_new_coords[i] - 20:
-            informative_sites_in_20 += 1
-    
-    if most_informative_sites_in_20 <= informative_sites_in_20:
-        most_informative_sites_in_20 = informative_sites_in_20
-        informative_clump_site = mutations_new_coords[i]
+    suspicious_mutation_clump = most_mutations_in_20 >= 6 or (most_mutations_in_20 >= 3 and indel_near_clump_size >= 10)
 
-informative_sites_clump = most_informative_sites_in_20 >= 6
 
 
 
+    most_informative_sites_in_20 = 0
+    informative_clump_site = 0
 
-should_check = False
+    informative_sites_in_20, lower_index = sites_within(mutations_new_coords, 20)
+    for i in range(len(mutations_new_coords)):
+        if most_informative_sites_in_20 <= informative_sites_in_20[i]:
+            most_informative_sites_in_20 = informative_sites_in_20[i]
+            informative_clump_site = mutations_new_coords[i]
 
-if not_enough_acceptor_matches:
-    should_check = True
-if not_enough_donor_matches:
-    should_check = True
-if unnecessary_breakpoint:
-    should_check = True
+    informative_sites_clump = most_informative_sites_in_20 >= 6
 
-if too_many_mutations_near_indel:
-    should_check = True
 
-if suspicious_mutation_clump:
-    should_check = True
 
-if informative_sites_clump:
-    should_check = True
 
-if INDEL_in_wrong_place:
-    should_check = True
+    should_check = False
 
+    if not_enough_acceptor_matches:
+        should_check = True
+    if not_enough_donor_matches:
+        should_check = True
+    if unnecessary_breakpoint:
+        should_check = True
 
+    if too_many_mutations_near_indel:
+        should_check = True
 
-print()
-print("Report:")
-print("recomb_node_id")
-print("donor_node_id")
-print("acceptor_node_id")
-print("should check") #3
-print("Not enough acceptor matches")
-print("Not enough donor matches")
-print("Unnecessary breakpoint")
-print("pre_b1_skew") #
-print("btw_b1_b2_skew") #
-print("post_b2_skew") #
-print("Too many mutations near INDEL")
-print("Mutations near INDEL") #
-print("Mutations on INDEL")
-print("Suspicious mutation clump")
-print("Mutations clumped") #
-print("Mutation clump site") #
-print("Clump in") #
-print("Size of INDEL near clump") #
+    if suspicious_mutation_clump:
+        should_check = True
 
-print("Informative sites clump")
-print("Informative sites clumped")
-print("site of informative sites clump")
+    if informative_sites_clump:
+        should_check = True
+
+    if INDEL_in_wrong_place:
+        should_check = True
+
+
+
+    print()
+    print("Report:")
+    print("recomb_node_id")
+    print("donor_node_id")
+    print("acceptor_node_id")
+    print("should check") #3
+    print("Not enough acceptor matches")
+    print("Not enough donor matches")
+    print("Unnecessary breakpoint")
+    print("pre_b1_skew") #
+    print("btw_b1_b2_skew") #
+    print("post_b2_skew") #
+    print("Too many mutations near INDEL")
+    print("Mutations near INDEL") #
+    print("Mutations on INDEL")
+    print("Suspicious mutation clump")
+    print("Mutations clumped") #
+    print("Mutation clump site") #
+    print("Clump in") #
+    print("Size of INDEL near clump") #
+
+    print("Informative sites clump")
+    print("Informative sites clumped")
+    print("site of informative sites clump")
+
+    print("INDEL in the wrong region") #
+    print(tables.labels[1])
+    print(tables.labels[2])
+    print(tables.labels[9])
+    print(tables.labels[10])
+    print(tables.labels[11])
+    print(tables.labels[12])
+    print(tables.labels[13]) #
+    #print(tables.labels[14])
+    #print(tables.labels[15])
+    print("Parsimony change rank") #
+    print()
+
+    to_report = [recomb_id, donor_id, acceptor_id, should_check,
+    not_enough_acceptor_matches, not_enough_donor_matches, unnecessary_breakpoint,
+    pre_b1_skew, btw_b1_b2_skew, post_b2_skew,
+    too_many_mutations_near_indel, weird_mutations, mutations_on_indels,
+    suspicious_mutation_clump, most_mutations_in_20, site_of_most_mutations, most_clumps_in, indel_near_clump_size,
+    informative_sites_clump, most_informative_sites_in_20, informative_clump_site,
+    INDEL_in_wrong_place,
+    trio[1],
+    trio[2],
+    trio[9],
+    trio[10],
+    trio[11],
+    trio[12],
+    trio[13],
+    #trio[14],
+    #trio[15],
+    index_to_check, '\n']
+
+    report_str = '\t'.join([str(x) for x in to_report])
+
+    print(report_str)
+
+    return (True, [x.strip() if isinstance(x, str) else x for x in to_report[:-1]])
+
+
+class ReportWriter:
+    # Writes report.txt, with the header of empty_report.txt, and in the same
+    # pass final_report.txt: the checked trios without too many mutations
+    # near INDELs, a suspicious mutation clump or an informative sites clump
+    def __init__(self):
+        header_file = open(empty_report_file_name, 'r')
+        header = header_file.readline()
+        header_file.close()
+        self.report_file = open(report_file_name, 'w')
+        self.report_file.write(header)
+        self.final_report_file = open(final_report_file_name, 'w')
+
+    def write(self, checked, report_row):
+        line = report_line(report_row)
+        self.report_file.write(line)
+        if checked and final_report_kept(report_row):
+            self.final_report_file.write(line)
+
+    def close(self):
+        self.report_file.close()
+        self.final_report_file.close()
+
+
+def final_report_kept(report_row):
+    """
+    Whether a checked trio goes in final_report.txt: too_many_mutations_near_indel,
+    suspicious_mutation_clump and informative_sites_clump are all False.
+    The columns are split on whitespace, as generate_report.sh's awk filter
+    did, so a row with an empty column before them (e.g. most_clumps_in when
+    there is no clump) or one with spaces is left out as it was.
+    """
+    fields = '\t'.join([str(x) for x in report_row]).split()
+    return len(fields) > 18 and fields[10] == 'False' and fields[13] == 'False' and fields[18] == 'False'
+
+
+def report_line(report_row):
+    return '\t'.join(['' if x is None else str(x) for x in report_row]) + '\n'
+
+
+# Tables of the batch, loaded before the pool forks
+batch_tables = None
+
+def check_trio_captured(index_to_check):
+    """
+    check_trio() with its printed output returned instead, as (output,
+    checked, report row).  A trio that fails gets no report row, as when each
+    trio had its own process.
+    """
+    output = io.StringIO()
+    checked, report_row = False, None
+    with contextlib.redirect_stdout(output):
+        try:
+            checked, report_row = check_trio(index_to_check, batch_tables)
+        except Exception:
+            traceback.print_exc()
+            print("Failed to check trio", index_to_check, file=sys.stderr)
+    return (output.getvalue(), checked, report_row)
+
+
+def main():
+    global batch_tables
+
+    parser = argparse.ArgumentParser(description='QC report of recombinant trios.')
+    parser.add_argument('index', nargs='?', type=int, help='parsimony change rank of the trio to check')
+    parser.add_argument('-r', '--report', action='store_true',
+                        help='append the report row to ' + report_file_name + '; with --batch, write ' + report_file_name +
+                        ' and the filtered ' + final_report_file_name)
+    parser.add_argument('--batch', action='store_true', help='check every trio aligned in ' + aligned_dir_name)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='worker processes in batch mode')
+    args = parser.parse_args()
+
+    if args.batch:
+        indices = sorted([int(name.split('.')[0]) for name in os.listdir(aligned_dir_name)])
+        batch_tables = Tables()
+        # Workers only print into their buffers and return their report rows;
+        # both are written here alone, in rank order
+        report_writer = ReportWriter() if args.report else None
+        with multiprocessing.get_context('fork').Pool(args.jobs) as pool:
+            for output, checked, report_row in pool.imap(check_trio_captured, indices, chunksize=4):
+                sys.stdout.write(output)
+                if report_writer is not None and report_row is not None:
+                    report_writer.write(checked, report_row)
+        if report_writer is not None:
+            report_writer.close()
+    else:
+        checked, report_row = check_trio(args.index, Tables())
+        if args.report:
+            report_file = open(report_file_name, 'a')
+            report_file.write(report_line(report_row))
+            report_file.close()
 
-print("INDEL in the wrong region") #
-print(labels[1])
-print(labels[2])
-print(labels[9])
-print(labels[10])
-print(labels[11])
-print(labels[12])
-print(labels[13]) #
-#print(labels[14])
-#print(labels[15])
-print("Parsimony change rank") #
-print()
 
-to_report = [recomb_id, donor_id, acceptor_id, should_check,
-not_enough_acceptor_matches, not_enough_donor_matches, unnecessary_breakpoint,
-pre_b1_skew, btw_b1_b2_skew, post_b2_skew,
-too_many_mutations_near_indel, weird_mutations, mutations_on_indels,
-suspicious_mutation_clump, most_mutations_in_20, site_of_most_mutations, most_clumps_in, indel_near_clump_size,
-informative_sites_clump, most_informative_sites_in_20, informative_clump_site,
-INDEL_in_wrong_place,
-lines_sorted_by_parsimony_change[index_to_check][1],
-lines_sorted_by_parsimony_change[index_to_check][2],
-lines_sorted_by_parsimony_change[index_to_check][9],
-lines_sorted_by_parsimony_change[index_to_check][10],
-lines_sorted_by_parsimony_change[index_to_check][11],
-lines_sorted_by_parsimony_change[index_to_check][12],
-lines_sorted_by_parsimony_change[index_to_check][13],
-#lines_sorted_by_parsimony_change[index_to_check][14],
-#lines_sorted_by_parsimony_change[index_to_check][15],
-index_to_check, '\n']
-
-report_str = '\t'.join([str(x) for x in to_report])
-
-print(report_str)
-
-
-output_to_report_file = len(sys.argv) > 2
-if not output_to_report_file:
-    sys.exit()
-
-report_file = open("filtering/data/report.txt", 'a')
-report_file.write(report_str)
-report_file.close()
+if __name__ == "__main__":
+    main()
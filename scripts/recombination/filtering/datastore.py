@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+#
+# Table store shared by the filtration stages.
+#
+# Every stage reads and writes its filtering/data/ tables through a DataStore.
+# When a stage script is run on its own the store behaves exactly like the
+# open()/write() calls it replaces.  run_filtration.py shares one store across
+# all stages, so rows written by one stage are handed to the next one already
+# split, and only the tables an external tool needs are written to disk.
+# Tables with one trio per row can also be read as a TrioTable, whose typed
+# columns are parsed once and cached with the table.
+
+import io
+import os
+from triotable import TrioTable, COMBINED_TRIO
+
+
+class DataStore:
+
+    def __init__(self, dataDir='filtering/data', writeAll=True, alwaysWrite=()):
+        self.dataDir = dataDir
+        # Write every table on put, as the standalone scripts always did
+        self.writeAll = writeAll
+        # Tables read by ripplesUtils, 3seq or the QC scripts must be on disk
+        self.alwaysWrite = set(alwaysWrite)
+        self.rows = {}
+        self.texts = {}
+        self.tables = {}
+
+    def path(self, name):
+        return os.path.join(self.dataDir, name)
+
+    def getRows(self, name, sep='\t'):
+        """
+        Return the rows of a table as fresh lists of strings, split exactly
+        as (line.strip()).split(sep) would split the lines of the file.
+        """
+        if sep == '\t' and name in self.rows:
+            return [list(r) for r in self.rows[name]]
+        if name in self.texts:
+            myLines = io.StringIO(self.texts[name])
+        elif name in self.rows:
+            myLines = io.StringIO(''.join('\t'.join(r)+'\n' for r in self.rows[name]))
+        else:
+            myLines = open(self.path(name))
+        rows = []
+        with myLines as f:
+            for line in f:
+                rows.append((line.strip()).split(sep))
+        if sep == '\t':
+            self.rows[name] = rows
+            return [list(r) for r in rows]
+        return rows
+
+    def getTable(self, name, trioCols=COMBINED_TRIO):
+        """
+        Return the table as a TrioTable.  The same TrioTable is returned until
+        the table is stored again, so its rows must not be modified.
+        """
+        if name not in self.tables or self.tables[name].trioCols != trioCols:
+            self.tables[name] = TrioTable(self.getRows(name), trioCols)
+        return self.tables[name]
+
+    def putTable(self, name, table):
+        if self.putRows(name, table.allRows()):
+            self.tables[name] = table
+
+    def putRows(self, name, rows, sep='\t'):
+        """
+        Store a table given as rows of values; each row becomes one line of
+        str() values joined by sep.  Returns False if a row had to be re-split
+        because its line starts or ends with whitespace.
+        """
+        unchanged = True
+        myLines = []
+        myRows = []
+        for r in rows:
+            myRow = [str(k) for k in r]
+            myLine = sep.join(myRow)
+            myLines.append(myLine)
+            if sep == '\t':
+                # keep the row as a reader of the written file would see it
+                if myLine != myLine.strip():
+                    myRow = (myLine.strip()).split('\t')
+                    unchanged = False
+                myRows.append(myRow)
+        self.texts.pop(name, None)
+        self.tables.pop(name, None)
+        if sep == '\t':
+            self.rows[name] = myRows
+        else:
+            self.rows.pop(name, None)
+            self.texts[name] = ''.join(l+'\n' for l in myLines)
+        if self.shouldWrite(name):
+            with open(self.path(name), 'w') as f:
+                for l in myLines:
+                    f.write(l+'\n')
+        return unchanged
+
+    def putText(self, name, text):
+        self.rows.pop(name, None)
+        self.tables.pop(name, None)
+        self.texts[name] = text
+        if self.shouldWrite(name):
+            open(self.path(name), 'w').write(text)
+
+    def shouldWrite(self, name):
+        return self.writeAll or name in self.alwaysWrite
@@ -11,6 +11,8 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from triotable import parseSites
 
 """
 Strategy:
@@ -27,70 +29,75 @@ Strategy:
 ##### MAIN FUNCTIONS #####
 ##########################
 
-def applyPval():
-    myOutString = ''
-    with open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3SeqP02.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if float(splitLine[20]) <= 0.2:
-                if splitLine[13].startswith('0/') or splitLine[13].startswith('NA') or float(splitLine[13]) < 0.05:
-                    myOutString += joiner(splitLine)+'\n'
-    open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3seqP02RussPval005.txt','w').write(myOutString)
-
-
-def doNewTiebreakers():
+def applyPval(store=None):
+    if store is None:
+        store = DataStore()
+    p02 = store.getTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3SeqP02.txt')
+    my3seqPvals = p02.column(20, float, numpy.float64)
+    myRows = []
+    for i in range(0, len(p02)):
+        splitLine = p02.rows[i]
+        if my3seqPvals[i] <= 0.2:
+            if splitLine[13].startswith('0/') or splitLine[13].startswith('NA') or float(splitLine[13]) < 0.05:
+                myRows.append(i)
+    store.putTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3seqP02RussPval005.txt', p02.select(myRows))
+
+
+def doNewTiebreakers(store=None):
+    if store is None:
+        store = DataStore()
     nodeToLeaves = {}
     # NOTE: Replaced "optimized-large-radius-pruneCatExcludeB30.usher.no-long-branches.leaves.txt.gz" with "leaves.txt",
     # which the pipeline generated by the input protobuf 
     #with gzip.open('filtering/leaves.txt') as f:
-    with open('filtering/data/leaves.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if splitLine[0].isdigit():
-                nodeToLeaves[int(splitLine[0])] = int(splitLine[1])
+    for splitLine in store.getRows('leaves.txt'):
+        if splitLine[0].isdigit():
+            nodeToLeaves[int(splitLine[0])] = int(splitLine[1])
 
+    russP005 = store.getTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3seqP02RussPval005.txt')
+    (bp1Starts, bp1Ends, bp2Starts, bp2Ends) = [c.tolist() for c in russP005.breakpoints()]
+    recombs = russP005.nodes(0).tolist()
     bp1 = {}
     bp2 = {}
     recombToBPs = {}
     recombToStringSize = {}
     recombToLines = {}
-    with open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3seqP02RussPval005.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                if not int(splitLine[0]) in recombToBPs:
-                    recombToBPs[int(splitLine[0])] = []
-                    recombToStringSize[int(splitLine[0])] = []
-                    recombToLines[int(splitLine[0])] = []
-                tempPreStart = 0
-                tempStart = 0
-                tempMid = 0
-                tempEnd = 0
-                tempPostEnd = 0
-                myInfSites = toInt(splitLine[15].split(','))
-                myStart1 = int(splitLine[1].split(',')[0][1:])
-                myStart2 = int(splitLine[1].split(',')[1][:-1])
-                myEnd1 = int(splitLine[2].split(',')[1][:-1])
-                myEnd2 = int(splitLine[2].split(',')[0][1:])
-                for k in myInfSites:
-                    if k <= myStart1:
-                        tempPreStart += 1
-                    elif k >= myStart1 and k <= myStart2:
-                        tempStart += 1
-                    elif k > myStart2 and k < myEnd1:
-                        tempMid += 1
-                    elif k >= myEnd1 and k <= myEnd2:
-                        tempEnd += 1
-                    elif k > myEnd2:
-                        tempPostEnd += 1
-                if tempPreStart == 0 or tempPostEnd == 0:
-                    recombToBPs[int(splitLine[0])].append(1)
-                    recombToStringSize[int(splitLine[0])].append(len(myInfSites))
-                    recombToLines[int(splitLine[0])].append(splitLine)
-                else:
-                    recombToBPs[int(splitLine[0])].append(2)
-                    recombToStringSize[int(splitLine[0])].append(len(myInfSites))
-                    recombToLines[int(splitLine[0])].append(splitLine)
+    for lineNum in range(0, len(russP005)):
+        splitLine = russP005.rows[lineNum]
+        r = recombs[lineNum]
+        if not r in recombToBPs:
+            recombToBPs[r] = []
+            recombToStringSize[r] = []
+            recombToLines[r] = []
+        tempPreStart = 0
+        tempStart = 0
+        tempMid = 0
+        tempEnd = 0
+        tempPostEnd = 0
+        myInfSites = russP005.column(15, parseSites, None)[lineNum]
+        myStart1 = bp1Starts[lineNum]
+        myStart2 = bp1Ends[lineNum]
+        myEnd1 = bp2Ends[lineNum]
+        myEnd2 = bp2Starts[lineNum]
+        for k in myInfSites:
+            if k <= myStart1:
+                tempPreStart += 1
+            elif k >= myStart1 and k <= myStart2:
+                tempStart += 1
+            elif k > myStart2 and k < myEnd1:
+                tempMid += 1
+            elif k >= myEnd1 and k <= myEnd2:
+                tempEnd += 1
+            elif k > myEnd2:
+                tempPostEnd += 1
+        if tempPreStart == 0 or tempPostEnd == 0:
+            recombToBPs[r].append(1)
+            recombToStringSize[r].append(len(myInfSites))
+            recombToLines[r].append(splitLine)
+        else:
+            recombToBPs[r].append(2)
+            recombToStringSize[r].append(len(myInfSites))
+            recombToLines[r].append(splitLine)
 
     myOutString = ''
     for k in recombToBPs:
@@ -182,7 +189,7 @@ def doNewTiebreakers():
                                         tempLeaves.append(nodeToLeaves[int(newL[i][3])]+nodeToLeaves[int(newL[i][6])])
                                         tempP.append(set([int(newL[i][3]),int(newL[i][6])]))
                                 myOutString += joiner(getBiggestBreakpointInterval(tempL))
-    open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt','w').write(myOutString)
+    store.putText('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt', myOutString)
 
 
 ##########################
@@ -223,8 +230,9 @@ def joiner(entry):
 #########################
 
 def main():
-    applyPval()
-    doNewTiebreakers()
+    store = DataStore()
+    applyPval(store)
+    doNewTiebreakers(store)
 
 if __name__ == "__main__":
     """
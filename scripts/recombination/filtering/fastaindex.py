@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+#
+# Random access to the records of a large FASTA file through a faidx index.
+#
+# The index has the columns of a samtools faidx index: one line per record
+# of name, sequence length, offset of the sequence, bases per line and bytes
+# per line, then the offset of the header line, which samtools does not
+# keep.  Names are whole header lines, without the '>', where samtools
+# keeps only the first word, so the index is kept apart as
+# <fasta>.ripples.fai.  It is built on first use by one pass over the file
+# and rebuilt whenever the FASTA is newer; afterwards only the requested
+# records are read.  Plain files are memory-mapped.  BGZF files (bgzip -c
+# seqs.fa > seqs.fa.gz) are read block by block through <fasta>.gzi, the
+# samtools table of the compressed and uncompressed offset of every block,
+# which is also built on first use.  nameToRecords maps each name to its
+# records, in file order.
+
+import bisect
+import collections
+import gzip
+import mmap
+import os
+import struct
+import zlib
+
+MAX_CACHE_BYTES = int(os.environ.get('RIPPLES_FASTA_CACHE_BYTES', str(256 << 20)))
+
+
+class FastaIndex:
+
+    def __init__(self, path):
+        # Through symlinks, so the index sits next to the actual file and is reused by every run reading it
+        path = os.path.realpath(path)
+        self.path = path
+        self.data = openData(path)
+        fai = path + '.ripples.fai'
+        if not os.path.exists(fai) or os.path.getmtime(fai) < os.path.getmtime(path):
+            writeFai(self.data, fai)
+        rows = readFai(fai)
+        if rows and len(rows[0]) < 6:
+            # Written before the index had the header offsets
+            writeFai(self.data, fai)
+            rows = readFai(fai)
+        self.names = [row[0] for row in rows]
+        self.lengths = [int(row[1]) for row in rows]
+        self.offsets = [int(row[2]) for row in rows]
+        self.lineBases = [int(row[3]) for row in rows]
+        self.lineWidths = [int(row[4]) for row in rows]
+        self.starts = [int(row[5]) for row in rows]
+        self.nameToRecords = {}
+        for i in range(len(self.names)):
+            self.nameToRecords.setdefault(self.names[i], []).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def recordStart(self, i):
+        return self.starts[i]
+
+    def recordEnd(self, i):
+        return self.recordStart(i + 1) if i + 1 < len(self.names) else self.data.size()
+
+    def record(self, i):
+        """Record i exactly as it is in the file: header line and sequence lines."""
+        return self.data.read(self.recordStart(i), self.recordEnd(i))
+
+    def sequence(self, i):
+        """Sequence of record i, without line breaks."""
+        raw = self.data.read(self.offsets[i], self.recordEnd(i))
+        return raw.replace(b'\r', b'').replace(b'\n', b'').decode()
+
+    def close(self):
+        self.data.close()
+
+
+class RecordCache:
+    # Records of a FastaIndex read once and served from memory while they are
+    # still needed: uses[i] is how many more times record i will be asked
+    # for, and a record is dropped after its last use.  Beyond maxBytes, the
+    # least recently used records are dropped too, and read again if needed.
+    def __init__(self, index, uses, maxBytes=MAX_CACHE_BYTES):
+        self.index = index
+        self.uses = dict(uses)
+        self.maxBytes = maxBytes
+        self.records = collections.OrderedDict()
+        self.size = 0
+
+    def record(self, i):
+        if i in self.records:
+            self.records.move_to_end(i)
+            myRecord = self.records[i]
+        else:
+            myRecord = self.index.record(i)
+            self.records[i] = myRecord
+            self.size += len(myRecord)
+        self.uses[i] = self.uses.get(i, 1) - 1
+        if self.uses[i] <= 0:
+            self.size -= len(self.records.pop(i))
+        while self.size > self.maxBytes:
+            self.size -= len(self.records.popitem(last=False)[1])
+        return myRecord
+
+
+class PlainData:
+    # Memory-mapped uncompressed FASTA
+    def __init__(self, path):
+        self.f = open(path, 'rb')
+        self.length = os.path.getsize(path)
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ) if self.length > 0 else b''
+
+    def size(self):
+        return self.length
+
+    def read(self, start, end):
+        return self.mm[start:end]
+
+    def lines(self):
+        self.f.seek(0)
+        return iter(self.f)
+
+    def close(self):
+        if self.length > 0:
+            self.mm.close()
+        self.f.close()
+
+
+class BgzfData:
+    # BGZF-compressed FASTA, addressed by uncompressed offsets
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'rb')
+        gzi = path + '.gzi'
+        if not os.path.exists(gzi) or os.path.getmtime(gzi) < os.path.getmtime(path):
+            writeGzi(path, gzi)
+        self.compressed = [0]
+        self.uncompressed = [0]
+        with open(gzi, 'rb') as f:
+            (count,) = struct.unpack('<Q', f.read(8))
+            for k in range(count):
+                (c, u) = struct.unpack('<QQ', f.read(16))
+                self.compressed.append(c)
+                self.uncompressed.append(u)
+        self.cachedBlock = None
+        self.cachedData = b''
+
+    def block(self, k):
+        if self.cachedBlock != k:
+            self.f.seek(self.compressed[k])
+            header = self.f.read(18)
+            (bsize,) = struct.unpack('<H', header[16:18])
+            # Raw deflate data between the 18-byte header and the 8-byte CRC32/ISIZE trailer
+            self.cachedData = zlib.decompress(self.f.read(bsize + 1 - 18)[:-8], -15)
+            self.cachedBlock = k
+        return self.cachedData
+
+    def size(self):
+        last = len(self.compressed) - 1
+        return self.uncompressed[last] + len(self.block(last))
+
+    def read(self, start, end):
+        k = bisect.bisect_right(self.uncompressed, start) - 1
+        parts = []
+        while start < end and k < len(self.compressed):
+            data = self.block(k)
+            parts.append(data[start - self.uncompressed[k]:end - self.uncompressed[k]])
+            k += 1
+            if k < len(self.compressed):
+                start = self.uncompressed[k]
+        return b''.join(parts)
+
+    def lines(self):
+        return iter(gzip.open(self.path, 'rb'))
+
+    def close(self):
+        self.f.close()
+
+
+def openData(path):
+    with open(path, 'rb') as f:
+        header = f.read(16)
+    if header[:2] == b'\x1f\x8b':
+        # BGZF: gzip members with a 'BC' extra subfield holding the block size
+        if len(header) < 16 or not (header[3] & 4) or header[12:14] != b'BC':
+            raise ValueError("%s is gzipped but not BGZF; recompress it with bgzip for random access" % path)
+        return BgzfData(path)
+    return PlainData(path)
+
+def readFai(fai):
+    with open(fai) as f:
+        return [line.rstrip('\n').split('\t') for line in f]
+
+def writeFai(data, fai):
+    """
+    One pass over the FASTA, writing name, length, offset, bases per line,
+    bytes per line and header offset of each record.
+    """
+    rows = []
+    pos = 0
+    for line in data.lines():
+        if line.startswith(b'>'):
+            rows.append([line[1:].rstrip(b'\r\n').decode(), 0, pos + len(line), 0, 0, pos])
+        elif rows:
+            bases = len(line.rstrip(b'\r\n'))
+            if rows[-1][3] == 0:
+                rows[-1][3] = bases
+                rows[-1][4] = len(line)
+            rows[-1][1] += bases
+        pos += len(line)
+    tmp = fai + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp, 'w') as f:
+        for row in rows:
+            f.write('\t'.join([str(x) for x in row]) + '\n')
+    os.replace(tmp, fai)
+
+def writeGzi(path, gzi):
+    """The samtools .gzi of a BGZF file: the number of blocks after the first, then their compressed and uncompressed offsets."""
+    entries = []
+    compressed = 0
+    uncompressed = 0
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(18)
+            if len(header) < 18:
+                break
+            (bsize,) = struct.unpack('<H', header[16:18])
+            f.seek(compressed + bsize + 1 - 4)
+            (isize,) = struct.unpack('<I', f.read(4))
+            compressed += bsize + 1
+            uncompressed += isize
+            entries.append((compressed, uncompressed))
+    # The end of the last block is not the start of another one
+    entries = entries[:-1]
+    tmp = gzi + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(struct.pack('<Q', len(entries)))
+        for (c, u) in entries:
+            f.write(struct.pack('<QQ', c, u))
+    os.replace(tmp, gzi)
@@ -11,113 +11,109 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from triotable import NODES_TRIO
+from threeseq import PValueTable
+from pvalcache import PValueCache
 
 ##########################
 ##### MAIN FUNCTIONS #####
 ##########################
 
-#Run 3seq first
-
-def addPVals():
+# 3SEQ p-values of the distinct (m, n, k) triples in mnk_no_dups.txt are
+# computed in-process by threeseq.PValueTable, replacing 3seq -c and mnk.log;
+# the cross-run cache in pvalcache.py is consulted first
+
+def addPVals(store=None, pValueSource=None):
+    if store is None:
+        store = DataStore()
+    if pValueSource is None:
+        pValueSource = PValueCache(PValueTable())
+    myKeys = [splitLine for splitLine in store.getRows('mnk_no_dups.txt', sep=' ') if len(splitLine) == 3]
+    myPVals = pValueSource.pVals([int(k[0]) for k in myKeys], [int(k[1]) for k in myKeys], [int(k[2]) for k in myKeys]).tolist()
     keyToP = {}
-    with open('filtering/data/mnk.log') as f:
-        for line in f:
-            splitLine = (line.strip()).split()
-            if len(splitLine) > 1:
-                if splitLine[0].startswith('Enter'):
-                    myKey = '_'.join(splitLine[-3:])
-                else:
-                    keyToP[myKey] = float(splitLine[-1])
-
-    myOutString = ''
+    for i in range(0, len(myKeys)):
+        keyToP['_'.join(myKeys[i])] = myPVals[i]
+
+    myOutRows = []
     alreadyUsed = {}
-    with open('filtering/data/allRelevantNodesMNK.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split()
-            myKey = '_'.join(splitLine[-3:])
-            if not myKey in keyToP:
-                print(myKey)
-            else:
-                myOutString += joiner(splitLine)+'\t'+str(keyToP[myKey])+'\n'
-    open('filtering/data/allRelevantNodesMNKPval.txt','w').write(myOutString)
-
-
-def combinePValueFiles():
+    for splitLine in store.getRows('allRelevantNodesMNK.txt', sep=None):
+        myKey = '_'.join(splitLine[-3:])
+        if not myKey in keyToP:
+            print(myKey)
+        else:
+            myOutRows.append(splitLine+[keyToP[myKey]])
+    store.putRows('allRelevantNodesMNKPval.txt', myOutRows)
+
+
+def combinePValueFiles(store=None):
+    if store is None:
+        store = DataStore()
+    pvals = store.getTable('combinedCatOnlyBestWithPVals.txt')
     recombToParents = {}
-    with open('filtering/data/combinedCatOnlyBestWithPVals.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                if not int(splitLine[0]) in recombToParents:
-                    recombToParents[int(splitLine[0])] = {}
-                recombToParents[int(splitLine[0])][str(splitLine[3])+'_'+str(splitLine[6])] = True
+    for (r, d, a) in pvals.trios():
+        if not r in recombToParents:
+            recombToParents[r] = {}
+        recombToParents[r][(d, a)] = True
 
     recombTo3seqPval = {}
     recombToBestParents = {}
     recombToAB = {}
     recombToPrinted = {}
-    with open('filtering/data/allRelevantNodesMNKPval.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                if int(splitLine[0]) in recombToParents:
-                    if (str(splitLine[1])+'_'+str(splitLine[2]) in recombToParents[int(splitLine[0])]):
-                        if int(splitLine[0]) not in recombTo3seqPval or float(splitLine[11]) < recombTo3seqPval[int(splitLine[0])]:
-                            recombTo3seqPval[int(splitLine[0])] = float(splitLine[11])
-                            recombToBestParents[int(splitLine[0])] = str(splitLine[1])+'_'+str(splitLine[2])
-                            recombToAB[int(splitLine[0])] = splitLine[7]
-                            recombToPrinted[int(splitLine[0])] = False
-
-    myOutString = ''
-    myOutString2 = ''
-    with open('filtering/data/combinedCatOnlyBestWithPVals.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                if int(splitLine[0]) in recombTo3seqPval:
-                    if recombToBestParents[int(splitLine[0])] == str(splitLine[3])+'_'+str(splitLine[6]):
-                        myOutString += '\t'.join(splitLine[:-1])+'\t'+str(recombTo3seqPval[int(splitLine[0])])+'\t'+recombToAB[int(splitLine[0])]+'\t'+str(splitLine[-1])+'\n'
-                        if splitLine[12].startswith('0/'):
-                            splitLine[12] = '0.0'
-                        if splitLine[13].startswith('0/'):
-                            splitLine[13] = '0.0'
-                        myOutString2 += '\t'.join(splitLine[:-1])+'\t'+str(recombTo3seqPval[int(splitLine[0])])+'\t'+recombToAB[int(splitLine[0])]+'\t'+str(splitLine[-1])+'\n'
-                        recombToPrinted[int(splitLine[0])] = True
-    open('filtering/data/combinedCatOnlyBestWithAll3PValsTiesBroken.txt','w').write(myOutString)
-    open('filtering/data/combinedCatOnlyBestWithAll3PValsRealTiesBroken.txt','w').write(myOutString2)
+    mnkPval = store.getTable('allRelevantNodesMNKPval.txt', NODES_TRIO)
+    my3seqPvals = mnkPval.column(11, float, numpy.float64).tolist()
+    for i in range(0, len(mnkPval)):
+        (r, d, a) = mnkPval.trios()[i]
+        if r in recombToParents:
+            if (d, a) in recombToParents[r]:
+                if r not in recombTo3seqPval or my3seqPvals[i] < recombTo3seqPval[r]:
+                    recombTo3seqPval[r] = my3seqPvals[i]
+                    recombToBestParents[r] = (d, a)
+                    recombToAB[r] = mnkPval.rows[i][7]
+                    recombToPrinted[r] = False
+
+    myOutRows = []
+    myOutRows2 = []
+    for i in range(0, len(pvals)):
+        splitLine = pvals.rows[i]
+        (r, d, a) = pvals.trios()[i]
+        if r in recombTo3seqPval:
+            if recombToBestParents[r] == (d, a):
+                myOutRows.append(splitLine[:-1]+[recombTo3seqPval[r],recombToAB[r],splitLine[-1]])
+                splitLine = list(splitLine)
+                if splitLine[12].startswith('0/'):
+                    splitLine[12] = '0.0'
+                if splitLine[13].startswith('0/'):
+                    splitLine[13] = '0.0'
+                myOutRows2.append(splitLine[:-1]+[recombTo3seqPval[r],recombToAB[r],splitLine[-1]])
+                recombToPrinted[r] = True
+    store.putRows('combinedCatOnlyBestWithAll3PValsTiesBroken.txt', myOutRows)
+    store.putRows('combinedCatOnlyBestWithAll3PValsRealTiesBroken.txt', myOutRows2)
 
     for k in recombToPrinted:
         if recombToPrinted[k] == False:
-            print(k, recombToBestParents[k])
-
-def addInfSites():
-    finalReportTrios = {}
-    with open('filtering/data/final_report.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            finalReportTrios[str(splitLine[0])+'_'+str(splitLine[1])+'_'+str(splitLine[2])] = True
-
-    trioToInfSites = {}
-    with open('filtering/data/allRelevantNodesInfSites.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            trioToInfSites[str(splitLine[0])+'_'+str(splitLine[1])+'_'+str(splitLine[2])] = splitLine[7]
-
-    trioToInfSeq = {}
-    with open('filtering/data/allRelevantNodesInfSeq.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            trioToInfSeq[str(splitLine[0])+'_'+str(splitLine[1])+'_'+str(splitLine[2])] = splitLine[7]
-
-    myOutString = ''
-    with open('filtering/data/combinedCatOnlyBestWithPVals.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6]) in trioToInfSites and str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6]) in finalReportTrios:
-                splitLine.append(trioToInfSites[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])])
-                splitLine.append(trioToInfSeq[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])])
-                myOutString += joiner(splitLine)+'\n'
-    open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSites.txt','w').write(myOutString)
+            print(k, joinerU(recombToBestParents[k]))
+
+def addInfSites(store=None):
+    if store is None:
+        store = DataStore()
+    finalReport = store.getTable('final_report.txt', NODES_TRIO)
+    infSites = store.getTable('allRelevantNodesInfSites.txt', NODES_TRIO)
+    infSeq = store.getTable('allRelevantNodesInfSeq.txt', NODES_TRIO)
+    pvals = store.getTable('combinedCatOnlyBestWithPVals.txt')
+
+    # Join the trios of combinedCatOnlyBestWithPVals.txt with the other three tables
+    inFinalReport = pvals.join(finalReport)
+    siteRows = pvals.join(infSites)
+    myRows = []
+    mySites = []
+    mySeqs = []
+    for i in range(0, len(pvals)):
+        if siteRows[i] >= 0 and inFinalReport[i] >= 0:
+            myRows.append(i)
+            mySites.append(infSites.rows[siteRows[i]][7])
+            mySeqs.append(infSeq.rows[infSeq.index()[pvals.trios()[i]]][7])
+    store.putTable('combinedCatOnlyBestWithPValsFinalReportWithInfSites.txt', pvals.select(myRows, [mySites, mySeqs]))
 
 
 
@@ -125,22 +121,6 @@ def addInfSites():
 #### HELPER FUNCTIONS ####
 ##########################
 
-def getK(seq, a, b):
-    myPath = []
-    currentPlace = 0
-    for k in seq:
-        if k == a:
-            currentPlace += 1
-        else:
-            currentPlace -= 1
-        myPath.append(currentPlace)
-    maxDesc = 0
-    for i in range(1,len(myPath)):
-        if max(myPath[:i])-myPath[i] > maxDesc:
-            maxDesc = max(myPath[:i])-myPath[i]
-    return(maxDesc)
-
-
 def getPos(myInds, intLineNumToPos):
     myReturn = []
     for k in myInds:
@@ -159,14 +139,21 @@ def joinerC(entry):
         newList.append(str(k))
     return(','.join(newList))
 
+def joinerU(entry):
+    newList = []
+    for k in entry:
+        newList.append(str(k))
+    return('_'.join(newList))
+
 #########################
 ##### FUNCTION CALL #####
 #########################
 
 def main():
-    addPVals()
-    combinePValueFiles()
-    addInfSites()
+    store = DataStore()
+    addPVals(store)
+    combinePValueFiles(store)
+    addInfSites(store)
 
 
 if __name__ == "__main__":
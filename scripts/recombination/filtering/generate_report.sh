@@ -9,8 +9,8 @@ all_sequences_fasta=$1
 # SARS-CoV-2 reference genome copied from GCP Storage Bucket to local directory, 
 # passed to this script through second argument.
 reference=$2  
-startDir=$PWD
-cores=`grep -c ^processor /proc/cpuinfo`
+# CPU budget set by LocalExecutor, otherwise all cores
+cores=${RIPPLES_THREADS:-`grep -c ^processor /proc/cpuinfo`}
 
 # Check correct number of args passed
 if [ "$#" -ne 2 ]; then
@@ -19,20 +19,21 @@ fi
 
 mkdir -p filtering/fastas
 cp $reference filtering/fastas/reference.fa
-cp $all_sequences_fasta filtering/fastas/extractedSeqs.fa
+# Linked rather than copied: analyzerecomb.py reads it through an index kept
+# next to the raw file, so the index is only built once for that file
+ln -sf `readlink -f $all_sequences_fasta` filtering/fastas/extractedSeqs.fa
 
 mkdir -p filtering/fastas/OrderedRecombs
 mkdir -p filtering/fastas/AlignedRecombs
 python3 filtering/analyzerecomb.py -a
 
-# Align raw sequences using mafft
-cd filtering/fastas/OrderedRecombs
-ls . |  parallel -j $cores "mafft --auto {} > ../AlignedRecombs/{} "
-cd $startDir
+# Align raw sequences using mafft: each unique sample is aligned to the
+# reference once (and cached across runs), and the alignment of each trio is
+# assembled from those of its samples
+python3 filtering/refalign.py -j $cores
 
-# Generate report
-cp filtering/empty_report.txt filtering/data/report.txt
-ls filtering/fastas/AlignedRecombs | parallel -j $cores python3 filtering/checkmutant.py {.} -r 
-
-awk '$19 == "False"' filtering/data/report.txt | awk '$14 == "False"' | awk '$11 == "False"' > filtering/data/final_report.txt
+# Generate report: one process loads the trio tables once, checks every
+# alignment with a pool of workers and writes report.txt and the filtered
+# final_report.txt from their results
+python3 filtering/checkmutant.py --batch -j $cores -r
 echo "DONE"
@@ -11,6 +11,11 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from vcfreader import VcfReader
+
+# Trios whose genotypes are compared at once
+CHUNK_SIZE = 256
 
 """
 - for each recombinant node, get the sites where it matches one parent but not the other
@@ -23,114 +28,114 @@ check to see if the grandparent on that side matches the recombinant node. if it
 ##### MAIN FUNCTIONS #####
 ##########################
 
-def getABABA():
+def getABABA(store=None, matPath=None):
+    if store is None:
+        store = DataStore()
     recombToParents = {}
     recombToEndRow = {}
     recombToParentSib = {}
-    with open('filtering/data/combinedCatOnlyBestWithPVals.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                if not int(splitLine[0]) in recombToParents:
-                    recombToParents[int(splitLine[0])] = []
-                    recombToEndRow[int(splitLine[0])] = []
-                recombToParents[int(splitLine[0])].append([int(splitLine[3]),int(splitLine[6])])
-                recombToEndRow[int(splitLine[0])].append(splitLine[10:-1])
-                if splitLine[4] == 'y':
-                    if not int(splitLine[0]) in recombToParentSib:
-                        recombToParentSib[(int(splitLine[0]))] = {}
-                    recombToParentSib[(int(splitLine[0]))][int(splitLine[3])] = True
-                if splitLine[7] == 'y':
-                    if not int(splitLine[0]) in recombToParentSib:
-                        recombToParentSib[(int(splitLine[0]))] = {}
-                    recombToParentSib[(int(splitLine[0]))][int(splitLine[6])] = True
+    pvals = store.getTable('combinedCatOnlyBestWithPVals.txt')
+    for i in range(0, len(pvals)):
+        splitLine = pvals.rows[i]
+        (r, d, a) = pvals.trios()[i]
+        if not r in recombToParents:
+            recombToParents[r] = []
+            recombToEndRow[r] = []
+        recombToParents[r].append([d,a])
+        recombToEndRow[r].append(splitLine[10:-1])
+        if splitLine[4] == 'y':
+            if not r in recombToParentSib:
+                recombToParentSib[r] = {}
+            recombToParentSib[r][d] = True
+        if splitLine[7] == 'y':
+            if not r in recombToParentSib:
+                recombToParentSib[r] = {}
+            recombToParentSib[r][a] = True
 
     parentToGrand = {}
-    with open('filtering/data/nodeToParent_no_underscore.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0] == 'node':
-                parentToGrand[int(splitLine[0])] = int(splitLine[1])
-
+    for splitLine in store.getRows('nodeToParent_no_underscore.txt'):
+        if not splitLine[0] == 'node':
+            parentToGrand[int(splitLine[0])] = int(splitLine[1])
+
+    ### Only the recombinants, their parents and the grandparents of sibling parents are read from the VCF
+    myNodes = set(recombToParents.keys())
+    for r in recombToParents:
+        for myParents in recombToParents[r]:
+            myNodes.update(myParents)
+            for p in myParents:
+                if r in recombToParentSib and p in recombToParentSib[r] and p in parentToGrand:
+                    myNodes.add(parentToGrand[p])
+    ### Genotypes come from the MAT if given, else from the VCF of matUtils extract
+    if matPath is None:
+        (indexToNode, myPositions, myAlleles, myGenotypes) = readGenotypes('filtering/data/allRelevantNodes.vcf', myNodes)
+    else:
+        import matreader
+        (indexToNode, myPositions, myAlleles, myGenotypes) = matreader.readGenotypes(matPath, myNodes)
     nodeToIndex = {}
-    indexToNode = {}
-    myRecombIndices = {}
-    recombToInformativeSites = {}
-    recombToInformativeSeq = {}
-    recombToSiteChanges = {}
-    with open('filtering/data/allRelevantNodes.vcf') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if splitLine[0] == '#CHROM':
-                for i in range(9,len(splitLine)):
-                    splitLine[i] = splitLine[i].replace('node_', '')
-                    indexToNode[i] = int(splitLine[i])
-                    nodeToIndex[int(splitLine[i])] = i
-                    if int(splitLine[i]) in recombToParents:
-                        myRecombIndices[i] = []
-                        recombToInformativeSites[i] = []
-                        recombToInformativeSeq[i] = []
-                        recombToSiteChanges[i] = []
-                for i in myRecombIndices:
-                    for p in recombToParents[int(indexToNode[i])]:
-                        myRecombIndices[i].append([nodeToIndex[p[0]], nodeToIndex[p[1]]])
-                        recombToInformativeSeq[i].append([])
-                        recombToInformativeSites[i].append([])
-                        recombToSiteChanges[i].append([])
-
-            elif splitLine[0] == 'NC_045512v2':
-                myGTs = [splitLine[3]+str(splitLine[1])+splitLine[3]]+splitLine[2].split(',')
-                for i in myRecombIndices.keys():
-                    for p in range(0,len(myRecombIndices[i])):
-                        parentInds = (myRecombIndices[i])[p]
-                        parentInd0 = parentInds[0]
-                        parentInd1 = parentInds[1]
-
-                        """
-                        IF IT IS PLACED AS A SIBLING, INCLUDE ALL MUTATIONS THAT ARE ON THE BRANCH LEADING TO THE PARENT NODE THAT MATCH THE RECOMBINANT,
-                        NO MATTER WHAT THE VCF SAYS, regardless of if it's a match or not
-                        """
-
-                        if int(splitLine[i]) != (int(splitLine[parentInds[0]])): # if recomb does not match parent0, get grandparent and check for match:
-                            if indexToNode[i] in recombToParentSib and indexToNode[(int(parentInds[0]))] in recombToParentSib[indexToNode[i]]: # if non-matching parent is sib, get grandparent
-                                grandParentInd = nodeToIndex[parentToGrand[indexToNode[parentInds[0]]]]
-                                if int(splitLine[i]) == (int(splitLine[grandParentInd])): # if it matches recombinant, use grandparent
-                                    parentInd0 = nodeToIndex[parentToGrand[indexToNode[parentInds[0]]]] # else, keep parentInd0 as default
-                                    ((recombToSiteChanges[i])[p]).append(str(indexToNode[int(parentInds[0])])+':'+myGTs[int(splitLine[i])])
-
-
-                        if int(splitLine[i]) != (int(splitLine[parentInds[1]])):
-                            if indexToNode[i] in recombToParentSib and indexToNode[(int(parentInds[1]))] in recombToParentSib[indexToNode[i]]: # if non-matching parent is sib, get grandparent
-                                grandParentInd = nodeToIndex[parentToGrand[indexToNode[parentInds[1]]]]
-                                if int(splitLine[i]) == (int(splitLine[grandParentInd])): # if it matches recombinant, use grandparent
-                                    parentInd1 = nodeToIndex[parentToGrand[indexToNode[parentInds[1]]]] # else, keep parentInd0 as default
-                                    ((recombToSiteChanges[i])[p]).append(str(indexToNode[int(parentInds[1])])+':'+myGTs[int(splitLine[i])])
-
-                        if int(splitLine[i]) == int(splitLine[parentInd0]) and int(splitLine[i]) != int(splitLine[parentInd1]):
-                            ((recombToInformativeSeq[i])[p]).append('A')
-                            ((recombToInformativeSites[i])[p]).append(int(splitLine[1]))
-                        if int(splitLine[i]) == int(splitLine[parentInd1]) and int(splitLine[i]) != int(splitLine[parentInd0]):
-                            ((recombToInformativeSeq[i])[p]).append('B')
-                            ((recombToInformativeSites[i])[p]).append(int(splitLine[1]))
-    myOutInfSeq = ''
-    myOutInfSites = ''
-    myOutSiteChanges = ''
-    # Num of rows in allRelevantNodesInfSites.txt
-    count = 0
-    for recInd in recombToInformativeSeq:
-        myRecombNode = indexToNode[recInd]
-        for i in range(0,len(recombToParents[myRecombNode])):
-            myParents = recombToParents[myRecombNode][i]
-            myOutInfSites += str(myRecombNode)+'\t'+joiner(myParents)+'\t'+joiner(recombToEndRow[myRecombNode][i])+'\t'+joinerC(recombToInformativeSites[recInd][i])+'\n'
-            myOutInfSeq += str(myRecombNode)+'\t'+joiner(myParents)+'\t'+joiner(recombToEndRow[myRecombNode][i])+'\t'+''.join(recombToInformativeSeq[recInd][i])+'\n'
-            myOutSiteChanges += str(myRecombNode)+'\t'+joiner(myParents)+'\t'+joiner(recombToEndRow[myRecombNode][i])+'\t'+joinerC(recombToSiteChanges[recInd][i])+'\n'
+    for i in range(0, len(indexToNode)):
+        nodeToIndex[indexToNode[i]] = i
+
+    ### One entry per output row: recombinants in VCF column order, then their parent pairs in input order
+    myTrios = []
+    myCols = []
+    for i in range(0, len(indexToNode)):
+        myRecombNode = indexToNode[i]
+        if myRecombNode in recombToParents:
+            for p in range(0, len(recombToParents[myRecombNode])):
+                myParents = recombToParents[myRecombNode][p]
+                myTrios.append([myRecombNode, p])
+                myCols.append([i, nodeToIndex[myParents[0]], nodeToIndex[myParents[1]]])
+
+    myOutInfSeq = []
+    myOutInfSites = []
+    myOutSiteChanges = []
+    for c in range(0, len(myTrios), CHUNK_SIZE):
+        myChunk = myTrios[c:c+CHUNK_SIZE]
+        myChunkCols = numpy.array(myCols[c:c+CHUNK_SIZE], dtype=numpy.int64).reshape(-1,3)
+        myRecomb = myGenotypes[myChunkCols[:,0]]
+        myParentGTs = []
+        myChanges = []
+        for k in [1,2]:
+            myParent = myGenotypes[myChunkCols[:,k]]
+            myMismatch = (myRecomb != myParent)
+            myGrandCols = getGrandParentCols(myChunk, myChunkCols[:,k], myMismatch,
+                recombToParentSib, parentToGrand, indexToNode, nodeToIndex)
+
+            """
+            IF IT IS PLACED AS A SIBLING, INCLUDE ALL MUTATIONS THAT ARE ON THE BRANCH LEADING TO THE PARENT NODE THAT MATCH THE RECOMBINANT,
+            NO MATTER WHAT THE VCF SAYS, regardless of if it's a match or not
+            """
+            # Sites where the recombinant does not match a sibling parent but matches its grandparent use the grandparent
+            myChange = myMismatch & (myRecomb == myGenotypes[myGrandCols])
+            myParentGTs.append(numpy.where(myChange, myRecomb, myParent))
+            myChanges.append(myChange)
+
+        myA = (myRecomb == myParentGTs[0]) & (myRecomb != myParentGTs[1])
+        myB = (myRecomb == myParentGTs[1]) & (myRecomb != myParentGTs[0])
+        for t in range(0, len(myChunk)):
+            (myRecombNode, p) = myChunk[t]
+            myParents = recombToParents[myRecombNode][p]
+            myStart = [myRecombNode]+myParents+recombToEndRow[myRecombNode][p]
+
+            myInfSites = numpy.flatnonzero(myA[t] | myB[t])
+            mySeq = numpy.where(myA[t][myInfSites], ord('A'), ord('B')).astype(numpy.uint8).tobytes().decode()
+            myOutInfSites.append(myStart+[joinerC(myPositions[myInfSites].tolist())])
+            myOutInfSeq.append(myStart+[mySeq])
+
+            mySiteChanges = []
+            for s in numpy.flatnonzero(myChanges[0][t] | myChanges[1][t]).tolist():
+                for k in [0,1]:
+                    if myChanges[k][t,s]:
+                        mySiteChanges.append(str(myParents[k])+':'+myAlleles[s][myRecomb[t,s]])
+            myOutSiteChanges.append(myStart+[joinerC(mySiteChanges)])
 
-            count += 1
+    # Num of rows in allRelevantNodesInfSites.txt
+    count = len(myTrios)
 
-    open('filtering/data/count.txt', 'w').write(str(count))
-    open('filtering/data/allRelevantNodesInfSites.txt','w').write(myOutInfSites)
-    open('filtering/data/allRelevantNodesInfSeq.txt','w').write(myOutInfSeq)
-    open('filtering/data/allRelevantNodesSiteChanges.txt','w').write(myOutSiteChanges)
+    store.putText('count.txt', str(count))
+    store.putRows('allRelevantNodesInfSites.txt', myOutInfSites)
+    store.putRows('allRelevantNodesInfSeq.txt', myOutInfSeq)
+    store.putRows('allRelevantNodesSiteChanges.txt', myOutSiteChanges)
 
 
 
@@ -138,6 +143,47 @@ def getABABA():
 #### HELPER FUNCTIONS ####
 ##########################
 
+def readGenotypes(vcfPath, myNodes):
+    """
+    Returns the node of each sample column of the VCF that is in myNodes, the
+    position of each site, the alleles of each site (indexed by genotype) and
+    a columns x sites matrix of their genotypes, so each node's genotypes are
+    one contiguous row.  Genotypes of other columns are never parsed.
+    """
+    with VcfReader(vcfPath) as vcf:
+        myCols = []
+        for i in range(0, len(vcf.samples)):
+            if int(vcf.samples[i].replace('node_', '')) in myNodes:
+                myCols.append(i)
+        indexToNode = [int(vcf.samples[i].replace('node_', '')) for i in myCols]
+        myPositions = []
+        myAlleles = []
+        myRows = []
+        for (splitLine, myGTs) in vcf.records(myCols):
+            if splitLine[0] == 'NC_045512v2':
+                myPositions.append(int(splitLine[1]))
+                myAlleles.append([splitLine[3]+str(splitLine[1])+splitLine[3]]+splitLine[2].split(','))
+                myRows.append(myGTs)
+    myGenotypes = numpy.zeros((len(indexToNode), len(myRows)), dtype=numpy.int16)
+    if myRows:
+        myGenotypes = numpy.ascontiguousarray(numpy.array(myRows).T)
+    return(indexToNode, numpy.array(myPositions, dtype=numpy.int64), myAlleles, myGenotypes)
+
+def getGrandParentCols(myChunk, myParentCols, myMismatch, recombToParentSib, parentToGrand, indexToNode, nodeToIndex):
+    """
+    Column of the grandparent of each parent placed as a sibling of its
+    recombinant, or of the parent itself otherwise (so nothing changes).  A
+    grandparent is only looked up if the recombinant mismatches its parent
+    somewhere, so a missing one fails exactly where it is needed.
+    """
+    myGrandCols = myParentCols.copy()
+    for t in range(0, len(myChunk)):
+        myRecombNode = myChunk[t][0]
+        myParentNode = indexToNode[myParentCols[t]]
+        if myRecombNode in recombToParentSib and myParentNode in recombToParentSib[myRecombNode] and myMismatch[t].any():
+            myGrandCols[t] = nodeToIndex[parentToGrand[myParentNode]]
+    return(myGrandCols)
+
 def getPos(myInds, intLineNumToPos):
     myReturn = []
     for k in myInds:
@@ -161,7 +207,8 @@ def joinerC(entry):
 #########################
 
 def main():
-    getABABA()
+    # Optional argument: the MAT protobuf, to read genotypes without allRelevantNodes.vcf
+    getABABA(matPath=(sys.argv[1] if len(sys.argv) > 1 else None))
 
 
 if __name__ == "__main__":
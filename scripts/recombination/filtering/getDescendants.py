@@ -7,83 +7,71 @@ import sys
 import os
 import datetime
 import numpy
-from numpy import random
+import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from treeindex import TreeIndex
+
+# Seed of the descendant samples; each relevant node draws from its own stream
+SEED = 0
 
 ##########################
 ##### MAIN FUNCTIONS #####
 ##########################
 
-def getNClosest():
-    nodeToDescendants = {}
-    nodeToDescendantsPlusOne = {}
-    nodeToDescendantsPlusTwo = {}
-    nodeToDescendantsPlusThree = {}
+def getNClosest(store=None, matPath=None):
+    if store is None:
+        store = DataStore()
+    if matPath is None:
+        myTree = TreeIndex.fromSamplePaths('filtering/data/sample_paths.txt')
+    else:
+        myTree = TreeIndex.fromMat(matPath)
+    nodeToIndex = {}
     with open('filtering/data/allRelevantNodeNames.txt') as f:
         for line in f:
-            nodeToDescendants['('+str(line.strip()[5:])+')'] = {}
-            nodeToDescendantsPlusOne['('+str(line.strip()[5:])+')'] = {}
-            nodeToDescendantsPlusTwo['('+str(line.strip()[5:])+')'] = {}
-            nodeToDescendantsPlusThree['('+str(line.strip()[5:])+')'] = {}
-    with open('filtering/data/sample_paths.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0] == 'sample_id':
-                mySplit = (splitLine[1]).split('>')
-                myParent = mySplit[-2].strip().split()[-1]
-                if myParent in nodeToDescendants:
-                    nodeToDescendants[myParent][splitLine[0]] = True
-                if len(mySplit) >= 3:
-                    myParent1 = mySplit[-3].strip().split()[-1]
-                    if myParent1 in nodeToDescendantsPlusOne:
-                        nodeToDescendantsPlusOne[myParent1][splitLine[0]] = True
-                    if len(mySplit) >= 4:
-                        myParent2 = mySplit[-4].strip().split()[-1]
-                        if myParent2 in nodeToDescendantsPlusTwo:
-                            nodeToDescendantsPlusTwo[myParent2][splitLine[0]] = True
-                        if len(mySplit) >= 5:
-                            myParent3 = mySplit[-5].strip().split()[-1]
-                            if myParent3 in nodeToDescendantsPlusThree:
-                                nodeToDescendantsPlusTwo[myParent3][splitLine[0]] = True
-
-    myOutString = ''
-    allDescendants = ''
-    for n in nodeToDescendants:
-        myDescendantsList = list(nodeToDescendants[n].keys())
-        myKey = 0
-
-        if len(myDescendantsList) > 10:
-            myList = random.choice(myDescendantsList, 10, replace=False)
-        else:
-            myList = myDescendantsList
-
-        if len(myList) < 1:
-            if len(list(nodeToDescendantsPlusOne[n].keys())) > 10:
-                myList = random.choice(list(nodeToDescendantsPlusOne[n].keys()), 10, replace=False)
-            else:
-                myList = list(nodeToDescendantsPlusOne[n].keys())
-            myKey = 1
-
-            if len(myList) < 1:
-                if len(list(nodeToDescendantsPlusTwo[n].keys())) > 10:
-                    myList = random.choice(list(nodeToDescendantsPlusTwo[n].keys()), 10, replace=False)
-                else:
-                    myList = list(nodeToDescendantsPlusTwo[n].keys())
-                myKey = 2
-
+            myNode = '('+str(line.strip()[5:])+')'
+            nodeToIndex[myNode] = myTree.internalToIndex.get(myNode[1:-1])
 
-        myOutString += n+'\t'+joinerC(myList)+'\t'+str(myKey)+'\n'
+    """
+    - up to 10 samples that are children of the node (key 0)
+    - if there are none, up to 10 of its grandchildren (key 1)
+    - if there are none, up to 10 samples 3 or 4 levels below it (key 2)
+    """
+    myOutRows = []
+    allDescendants = ''
+    for n in nodeToIndex:
+        for (myKey, myDepths) in [(0, [1]), (1, [2]), (2, [3, 4])]:
+            myList = []
+            if nodeToIndex[n] is not None:
+                myRandom = random.Random(str(SEED)+n)
+                myList = reservoirSample((d for k in myDepths for d in myTree.leavesAt(nodeToIndex[n], k)), 10, myRandom)
+            if len(myList) > 0:
+                break
+
+        myOutRows.append([n,joinerC(myList),myKey])
         allDescendants += joinerN(myList)+'\n'
-    open('filtering/data/allRelevantNodesToDescendants.txt','w').write(myOutString)
-    open('filtering/data/allDescendants.txt','w').write(allDescendants)
+    store.putRows('allRelevantNodesToDescendants.txt', myOutRows)
+    store.putText('allDescendants.txt', allDescendants)
 
 
 ##########################
 #### HELPER FUNCTIONS ####
 ##########################
 
+def reservoirSample(myItems, k, myRandom):
+    """Up to k items drawn uniformly without replacement from the iterable myItems, in one pass."""
+    myReturn = []
+    for i, myItem in enumerate(myItems):
+        if i < k:
+            myReturn.append(myItem)
+        else:
+            j = myRandom.randrange(0, i+1)
+            if j < k:
+                myReturn[j] = myItem
+    return(myReturn)
+
 def getPos(myInds, intLineNumToPos):
     myReturn = []
     for k in myInds:
@@ -11,54 +11,78 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from triotable import NODES_TRIO
+
+# Characters of informative sequence walked at once by getMNK
+MNK_BLOCK = 1 << 22
 
 ##########################
 ##### MAIN FUNCTIONS #####
 ##########################
 
 
-def makeMNK():
-    myOutString = ''
-    with open('filtering/data/allRelevantNodesInfSeq.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            # seq = BAABAAAABBABBBBAAAABBB
-            seq = splitLine[-1]
-            if seq.startswith('A'):
-                myOutString += joiner(splitLine)+'\t'+joiner([seq.count('A'),seq.count('B'),getK(seq,'A','B')])+'\n'
-            else:
-                myOutString += joiner(splitLine)+'\t'+joiner([seq.count('B'),seq.count('A'),getK(seq,'B','A')])+'\n'
-    open('filtering/data/allRelevantNodesMNK.txt','w').write(myOutString)
-
-def removeDups():
+def makeMNK(store=None):
+    if store is None:
+        store = DataStore()
+    infSeq = store.getTable('allRelevantNodesInfSeq.txt', NODES_TRIO)
+    # seq = BAABAAAABBABBBBAAAABBB
+    (myM, myN, myK) = getMNK([splitLine[-1] for splitLine in infSeq.rows])
+    store.putTable('allRelevantNodesMNK.txt', infSeq.select(range(0, len(infSeq)), [myM.tolist(), myN.tolist(), myK.tolist()]))
+
+def removeDups(store=None):
+    if store is None:
+        store = DataStore()
     alreadyDone = {}
-    myOutString = ''
-    with open('filtering/data/allRelevantNodesMNK.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not str(splitLine[-3])+'_'+str(splitLine[-2])+'_'+str(splitLine[-1]) in alreadyDone:
-                myOutString += str(splitLine[-3])+' '+str(splitLine[-2])+' '+str(splitLine[-1])+'\n'
-            alreadyDone[str(splitLine[-3])+'_'+str(splitLine[-2])+'_'+str(splitLine[-1])] = True
-    open('filtering/data/mnk_no_dups.txt','w').write(myOutString)
+    myOutRows = []
+    for splitLine in store.getRows('allRelevantNodesMNK.txt'):
+        if not str(splitLine[-3])+'_'+str(splitLine[-2])+'_'+str(splitLine[-1]) in alreadyDone:
+            myOutRows.append(splitLine[-3:])
+        alreadyDone[str(splitLine[-3])+'_'+str(splitLine[-2])+'_'+str(splitLine[-1])] = True
+    store.putRows('mnk_no_dups.txt', myOutRows, sep=' ')
 
 ##########################
 #### HELPER FUNCTIONS ####
 ##########################
 
-def getK(seq, a, b):
-    myPath = []
-    currentPlace = 0
-    for k in seq:
-        if k == a:
-            currentPlace += 1
-        else:
-            currentPlace -= 1
-        myPath.append(currentPlace)
-    maxDesc = 0
-    for i in range(1,len(myPath)):
-        if max(myPath[:i])-myPath[i] > maxDesc:
-            maxDesc = max(myPath[:i])-myPath[i]
-    return(maxDesc)
+def getMNK(mySeqs):
+    """
+    3SEQ m, n and k of each informative sequence, as int arrays.  m counts the
+    letter the sequence starts with (a), n the other letter (b), and k is the
+    maximum descent of the walk that steps +1 on a and -1 otherwise: the
+    largest drop from an earlier high point, max over i of
+    max(path[:i])-path[i], or 0.  Sequences of similar length are walked
+    together as the rows of a padded matrix, using the running maximum of
+    each row.
+    """
+    myM = numpy.zeros(len(mySeqs), dtype=numpy.int64)
+    myN = numpy.zeros(len(mySeqs), dtype=numpy.int64)
+    myK = numpy.zeros(len(mySeqs), dtype=numpy.int64)
+    myLengths = numpy.array([len(seq) for seq in mySeqs], dtype=numpy.int64)
+    myOrder = numpy.argsort(myLengths, kind='stable')
+    c = 0
+    while c < len(myOrder):
+        # Up to MNK_BLOCK characters per block, padded to the longest sequence
+        d = c+1
+        while d < len(myOrder) and (d-c+1)*max(int(myLengths[myOrder[d]]), 1) <= MNK_BLOCK:
+            d += 1
+        myWidth = max(int(myLengths[myOrder[d-1]]), 1)
+        myRows = myOrder[c:d]
+        mySeqMatrix = numpy.array([mySeqs[i] for i in myRows.tolist()], dtype='S'+str(myWidth)).view(numpy.uint8).reshape(len(myRows), myWidth)
+        myValid = numpy.arange(myWidth) < myLengths[myRows][:,None]
+
+        myA = numpy.where(mySeqMatrix[:,:1] == ord('A'), ord('A'), ord('B'))
+        myB = numpy.where(myA == ord('A'), ord('B'), ord('A'))
+        myM[myRows] = ((mySeqMatrix == myA) & myValid).sum(axis=1)
+        myN[myRows] = ((mySeqMatrix == myB) & myValid).sum(axis=1)
+
+        myPath = numpy.cumsum(numpy.where(mySeqMatrix == myA, 1, -1), axis=1)
+        myDescent = numpy.maximum.accumulate(myPath, axis=1)[:,:-1]-myPath[:,1:]
+        myDescent[~myValid[:,1:]] = 0
+        if myWidth > 1:
+            myK[myRows] = numpy.maximum(myDescent.max(axis=1), 0)
+        c = d
+    return(myM, myN, myK)
 
 
 def getPos(myInds, intLineNumToPos):
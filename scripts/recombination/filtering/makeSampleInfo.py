@@ -11,6 +11,8 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
+from triotable import NODES_TRIO
 
 """
 goal of this is to give him the information in a digestible form.
@@ -30,48 +32,39 @@ he needs:
 ##### MAIN FUNCTIONS #####
 ##########################
 
-def makeSampleInfo():
+def makeSampleInfo(store=None):
+    if store is None:
+        store = DataStore()
     nodeToSites = {}
     nodeToClosestSamples = {}
-    with open('filtering/data/allRelevantNodesToDescendants.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            nodeToSites[int(splitLine[0][1:-1])] = {}
-            nodeToClosestSamples[int(splitLine[0][1:-1])] = splitLine[1]
+    for splitLine in store.getRows('allRelevantNodesToDescendants.txt'):
+        nodeToSites[int(splitLine[0][1:-1])] = {}
+        nodeToClosestSamples[int(splitLine[0][1:-1])] = splitLine[1]
 
     nodeToRelatives = {}
-    with open('filtering/data/combinedCatOnlyBestWithPVals.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            if not splitLine[0].startswith('#'):
-                for i in [0,3,6]:
-                    if not int(splitLine[i]) in nodeToRelatives:
-                        nodeToRelatives[int(splitLine[i])] = {}
-                    if i == 0:
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[3])] = True
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[6])] = True
-                    elif i == 3:
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[0])] = True
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[6])] = True
-                    elif i == 6:
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[3])] = True
-                        nodeToRelatives[int(splitLine[i])][int(splitLine[6])] = True
-
-    with open('filtering/data/allRelevantNodesInfSites.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            for k in splitLine[-1].split(','):
-                if int(splitLine[0]) in nodeToSites:
-                    nodeToSites[int(splitLine[0])][int(k)] = True
-                if int(splitLine[1]) in nodeToSites:
-                    nodeToSites[int(splitLine[1])][int(k)] = True
-                if int(splitLine[2]) in nodeToSites:
-                    nodeToSites[int(splitLine[2])][int(k)] = True
-
-    myOutString = 'node\tdescendants\tinformative_sites\n'
+    for (r, d, a) in store.getTable('combinedCatOnlyBestWithPVals.txt').trios():
+        for n in [r, d, a]:
+            if not n in nodeToRelatives:
+                nodeToRelatives[n] = {}
+        nodeToRelatives[r][d] = True
+        nodeToRelatives[r][a] = True
+        nodeToRelatives[d][r] = True
+        nodeToRelatives[d][a] = True
+        nodeToRelatives[a][d] = True
+        nodeToRelatives[a][a] = True
+
+    infSites = store.getTable('allRelevantNodesInfSites.txt', NODES_TRIO)
+    for i in range(0, len(infSites)):
+        mySites = toInt(infSites.rows[i][-1].split(','))
+        for n in infSites.trios()[i]:
+            if n in nodeToSites:
+                for k in mySites:
+                    nodeToSites[n][k] = True
+
+    myOutRows = [['node','descendants','informative_sites']]
     for n in sorted(nodeToSites.keys()):
-        myOutString += str(n)+'\t'+nodeToClosestSamples[n]+'\t'+joinerC(nodeToSites[n].keys())+'\n'
-    open('filtering/data/sampleInfo.txt','w').write(myOutString)
+        myOutRows.append([n,nodeToClosestSamples[n],joinerC(nodeToSites[n].keys())])
+    store.putRows('sampleInfo.txt', myOutRows)
 
 # def getSubset():
 #     mySamples = {}
@@ -119,6 +112,12 @@ def joiner(entry):
         newList.append(str(k))
     return('\t'.join(newList))
 
+def toInt(myList):
+    myReturn = []
+    for k in myList:
+        myReturn.append(int(k))
+    return(myReturn)
+
 def joinerC(entry):
     newList = []
     for k in entry:
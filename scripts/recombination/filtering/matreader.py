@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+#
+# Genotypes of selected internal nodes, read straight from a MAT protobuf.
+#
+# A MAT (parsimony_pb2.data) holds the newick tree and the mutations of every
+# node in preorder.  Internal nodes get the ids node_1, node_2, ... in the
+# order their '(' appears in the newick, as in UShER's
+# create_tree_from_newick_string(), so the preorder index of each node id is
+# known from one pass over the newick.  The genotype of a node at a site is
+# the last mutation at that site on its root-to-node path; only the paths of
+# the requested nodes are visited.
+#
+# Condensed nodes are uncondensed as UShER's uncondense_leaves() does for
+# ripples and ripplesUtils: a condensed node with mutations becomes a new
+# internal node with its samples as children, and one without mutations
+# becomes its first sample with the others as its siblings.  The new internal
+# nodes are numbered after the newick's in UShER's hash order of the condensed
+# node names, so when there is more than one, their ids are taken from
+# sample_paths.txt, written by ripplesUtils from the same uncondensed tree.
+#
+# readGenotypes() returns what getABABA.readGenotypes() reads from the VCF of
+# matUtils extract -v: the same sample columns (in preorder), sites, site
+# labels and genotype comparisons, without writing and parsing the VCF.
+# Genotypes are encoded as UShER nucleotide ids (A=1, C=2, G=4, T=8, IUPAC
+# codes as their sums) instead of VCF allele numbers.
+
+import gzip
+import os
+import re
+import sys
+import numpy
+
+# Only sites on this chromosome are read, as getABABA does with the VCF
+CHROM = 'NC_045512v2'
+
+LEAF_END = re.compile('[:)]')
+
+SAMPLE_PATHS = 'filtering/data/sample_paths.txt'
+
+# Trees parsed by readTree(), by path
+TREES = {}
+
+NUC_IDS = {1:'A', 2:'C', 3:'M', 4:'G', 5:'R', 6:'S', 7:'V', 8:'T', 9:'W', 10:'Y', 11:'H', 12:'K', 13:'D', 14:'B', 15:'N'}
+
+
+def readMat(matPath):
+    """Parse a MAT protobuf, gzipped or not."""
+    # parsimony_pb2.py is at the top of the usher repository
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+    import parsimony_pb2
+    with open(matPath, 'rb') as f:
+        isGzip = (f.read(2) == b'\x1f\x8b')
+    with (gzip.open(matPath, 'rb') if isGzip else open(matPath, 'rb')) as f:
+        myMat = parsimony_pb2.data()
+        myMat.ParseFromString(f.read())
+    return(myMat)
+
+def readTree(matPath, samplePaths=SAMPLE_PATHS):
+    """
+    The parsed MAT with its parseNewick() index, uncondensed, as (mat,
+    parents, internalToIndex, names); parsed once per process and shared by
+    the filtration stages that read the MAT.
+    """
+    if not matPath in TREES:
+        TREES[matPath] = indexTree(readMat(matPath), samplePaths)
+    return(TREES[matPath])
+
+def indexTree(myMat, samplePaths=SAMPLE_PATHS):
+    """The readTree() tuple of a parsed MAT."""
+    (myParents, internalToIndex, myNames) = parseNewick(myMat.newick)
+    uncondense(myMat, myParents, internalToIndex, myNames, samplePaths)
+    return(myMat, myParents, internalToIndex, myNames)
+
+def parseNewick(newick):
+    """
+    Returns the parent of each node (-1 for the root), in preorder, the
+    preorder index of each internal node id and the name of each node (None
+    for internal nodes), following UShER's newick parser: the string is
+    split on commas, each piece opens its '(' as new internal nodes, then adds
+    its leaf, named by what precedes the first ':' or ')', and closes its ')'.
+    """
+    myParents = []
+    internalToIndex = {}
+    myNames = []
+    myStack = []
+    for piece in newick.split(','):
+        for j in range(0, piece.count('(')):
+            internalToIndex[len(internalToIndex)+1] = len(myParents)
+            myParents.append(myStack[-1] if myStack else -1)
+            myNames.append(None)
+            myStack.append(len(myParents)-1)
+        myParents.append(myStack[-1] if myStack else -1)
+        myNames.append(LEAF_END.split(piece.replace('(', ''), 1)[0])
+        for j in range(0, piece.count(')')):
+            myStack.pop()
+    return(myParents, internalToIndex, myNames)
+
+def uncondense(myMat, myParents, internalToIndex, myNames, samplePaths=None):
+    """
+    Replaces the condensed nodes of a parseNewick() index by their samples,
+    in place.  The samples are added after the nodes of the newick, so the
+    nodes of the newick keep their preorder indices.
+    """
+    nameToIndex = {}
+    for i in range(0, len(myNames)):
+        if myNames[i] is not None:
+            nameToIndex[myNames[i]] = i
+    myInternal = []
+    for cn in myMat.condensed_nodes:
+        if not cn.node_name in nameToIndex:
+            raise ValueError('condensed node %s is not a leaf of the tree' % cn.node_name)
+        i = nameToIndex[cn.node_name]
+        mySamples = list(cn.condensed_leaves)
+        if len(mySamples) > 1 and hasMutations(myMat, i):
+            myInternal.append((cn.node_name, i, mySamples))
+            myNames[i] = None
+            for mySample in mySamples:
+                myParents.append(i)
+                myNames.append(mySample)
+        elif len(mySamples) > 1:
+            myNames[i] = mySamples[0]
+            myParent = myParents[i] if myParents[i] != -1 else i
+            for mySample in mySamples[1:]:
+                myParents.append(myParent)
+                myNames.append(mySample)
+        elif len(mySamples) == 1:
+            myNames[i] = mySamples[0]
+    if len(myInternal) == 1:
+        myIds = {myInternal[0][0]: len(internalToIndex)+1}
+    elif len(myInternal) > 1:
+        myIds = readUncondensedIds(samplePaths, myInternal, len(internalToIndex))
+    for (myName, i, mySamples) in myInternal:
+        internalToIndex[myIds[myName]] = i
+
+def readUncondensedIds(samplePaths, myInternal, numInternal):
+    """
+    Internal node id of each condensed node of myInternal (name, index,
+    samples), from the last node on the path of its first sample in
+    sample_paths.txt.
+    """
+    if samplePaths is None or not os.path.exists(samplePaths):
+        raise ValueError('%d condensed nodes with mutations become internal nodes whose ids follow UShER\'s '
+                         'hash order; run ripplesUtils for %s first' % (len(myInternal), SAMPLE_PATHS))
+    sampleToName = {}
+    for (myName, i, mySamples) in myInternal:
+        sampleToName[mySamples[0]] = myName
+    myIds = {}
+    with open(samplePaths) as f:
+        for line in f:
+            splitLine = (line.strip()).split('\t')
+            if splitLine[0] in sampleToName and len(splitLine) > 1:
+                mySplit = (splitLine[1]).split('>')
+                if len(mySplit) > 1:
+                    myIds[sampleToName[splitLine[0]]] = int(mySplit[-2].strip().split()[-1][1:-1])
+    if sorted(myIds.values()) != list(range(numInternal+1, numInternal+len(myInternal)+1)):
+        raise ValueError('%s does not match the uncondensed tree of the MAT' % samplePaths)
+    return(myIds)
+
+def hasMutations(myMat, i):
+    """Whether node i keeps any mutation once loaded by UShER, masked ones included."""
+    for mut in myMat.node_mutations[i].mutation:
+        myNuc = 0
+        for n in mut.mut_nuc:
+            myNuc += (1 << n)
+        if mut.position < 0 or myNuc != (1 << mut.par_nuc):
+            return(True)
+    return(False)
+
+def getMutations(myMat, i):
+    """(position, parent nucleotide id, nucleotide id) of each unmasked mutation on node i on CHROM."""
+    myReturn = []
+    # Samples of condensed nodes are not in the MAT's node list and have no mutations
+    if i >= len(myMat.node_mutations):
+        return(myReturn)
+    for mut in myMat.node_mutations[i].mutation:
+        if mut.position < 0 or mut.chromosome != CHROM:
+            continue
+        myNuc = 0
+        for n in mut.mut_nuc:
+            myNuc += (1 << n)
+        myParNuc = (1 << mut.par_nuc)
+        # UShER drops mutations that do not change the nucleotide
+        if myNuc != myParNuc:
+            myReturn.append((mut.position, myParNuc, myNuc))
+    return(myReturn)
+
+def readGenotypes(matPath, myNodes):
+    """
+    Returns the internal nodes of myNodes that are in the tree, in preorder,
+    the position of each site where one of them differs from the reference,
+    the label of each nucleotide id at each site (e.g. 'C241T'
+    for T, 'C241C' for the reference) and a nodes x sites matrix of their
+    nucleotide ids.
+    """
+    (myMat, myParents, internalToIndex, myNames) = readTree(matPath)
+    myCols = sorted([(internalToIndex[n], n) for n in myNodes if n in internalToIndex])
+    indexToNode = [n for (i, n) in myCols]
+
+    nodeToMutations = {}
+    siteToRef = {}
+    myNodeSites = []
+    for (i, n) in myCols:
+        myPath = []
+        k = i
+        while k != -1:
+            myPath.append(k)
+            k = myParents[k]
+        # Later mutations on the path overwrite earlier ones at the same site
+        mySites = {}
+        for k in reversed(myPath):
+            if not k in nodeToMutations:
+                nodeToMutations[k] = getMutations(myMat, k)
+            for (pos, parNuc, nuc) in nodeToMutations[k]:
+                # As matUtils, the first mutation seen at a site gives its reference
+                if not pos in siteToRef:
+                    siteToRef[pos] = parNuc
+                mySites[pos] = nuc
+        myNodeSites.append(mySites)
+
+    myPositions = sorted(siteToRef.keys())
+    posToSite = {}
+    for s in range(0, len(myPositions)):
+        posToSite[myPositions[s]] = s
+    myRefs = numpy.array([siteToRef[p] for p in myPositions], dtype=numpy.int16)
+    myGenotypes = numpy.tile(myRefs, (len(indexToNode), 1))
+    for c in range(0, len(myNodeSites)):
+        for pos in myNodeSites[c]:
+            myGenotypes[c, posToSite[pos]] = myNodeSites[c][pos]
+
+    # Sites where every node has the reference are not in the VCF either
+    myKeep = numpy.flatnonzero((myGenotypes != myRefs).any(axis=0))
+    myGenotypes = numpy.ascontiguousarray(myGenotypes[:, myKeep])
+    myAlleles = []
+    for s in range(0, len(myKeep)):
+        pos = myPositions[myKeep[s]]
+        myRefNuc = NUC_IDS[siteToRef[pos]]
+        myAlleles.append(dict([(g, myRefNuc+str(pos)+NUC_IDS[g]) for g in set(myGenotypes[:, s].tolist())]))
+    return(indexToNode, numpy.array(myPositions, dtype=numpy.int64)[myKeep], myAlleles, myGenotypes)
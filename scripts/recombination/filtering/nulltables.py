@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#
+# Survival tables for the rob and russ parsimony-improvement nulls.
+#
+# rob_null.txt and russ_null.txt list, for each original parsimony, how many
+# null trials reached each parsimony improvement.  They are compiled into one
+# int64 array per null, stored next to the text file as <name>.npy and
+# memory-mapped on load:
+#   table[p, 0]  total number of trials for original parsimony p (-1 if p is not in the null)
+#   table[p, m]  number of trials with an improvement of at least m, for m >= 1
+# so the p-value of improvement m is table[p, m]/table[p, 0].  The .npy file is
+# rebuilt whenever the text file is newer.
+#
+#   python3 filtering/nulltables.py filtering/rob_null.txt filtering/russ_null.txt
+
+import os
+import sys
+import numpy
+
+
+class NullTable:
+
+    def __init__(self, txtPath):
+        self.txtPath = txtPath
+        self.npyPath = os.path.splitext(txtPath)[0]+'.npy'
+        self.table = None
+
+    def load(self):
+        if self.table is None:
+            if not os.path.exists(self.npyPath) or os.path.getmtime(self.npyPath) < os.path.getmtime(self.txtPath):
+                compileNull(self.txtPath, self.npyPath)
+            self.table = numpy.load(self.npyPath, mmap_mode='r')
+        return self.table
+
+    def pVals(self, origPars, improvements):
+        """
+        P-values of the given improvements over the given original parsimonies:
+        a float, '0/<total>' if no trial was as good, or 'NA' if the original
+        parsimony is not in the null.
+        """
+        table = self.load()
+        origPars = numpy.asarray(origPars, dtype=numpy.int64)
+        improvements = numpy.asarray(improvements, dtype=numpy.int64)
+        inNull = (origPars >= 0) & (origPars < table.shape[0])
+        rows = numpy.where(inNull, origPars, 0)
+        totals = numpy.where(inNull, table[rows, 0], -1)
+        survivors = table[rows, numpy.clip(improvements, 0, table.shape[1]-1)]
+        myReturn = []
+        for myTotal, mySurvivors in zip(totals.tolist(), survivors.tolist()):
+            if myTotal < 0:
+                myReturn.append('NA')
+            elif mySurvivors == 0:
+                myReturn.append('0/'+str(myTotal))
+            else:
+                myReturn.append(float(mySurvivors)/float(myTotal))
+        return(myReturn)
+
+
+def readNull(txtPath):
+    """Return ({origPars: {improvement: count}}, {origPars: total}) as listed in a null file."""
+    myNull = {}
+    origParsToTotal = {}
+    with open(txtPath) as f:
+        for line in f:
+            splitLine = (line.strip()).split()
+            if len(splitLine) == 1 and splitLine[0].isdigit():
+                myOrigPars = int(splitLine[0])
+                myNull[myOrigPars] = {}
+                origParsToTotal[myOrigPars] = 0
+            elif len(splitLine) == 2:
+                (myNull[myOrigPars])[int(splitLine[0])] = int(splitLine[1])
+                origParsToTotal[myOrigPars] += int(splitLine[1])
+    return(myNull, origParsToTotal)
+
+def compileNull(txtPath, npyPath):
+    myNull, origParsToTotal = readNull(txtPath)
+    maxPars = max(myNull.keys(), default=0)
+    maxImprovement = max([max(d.keys(), default=0) for d in myNull.values()], default=0)
+    table = numpy.full((maxPars+1, maxImprovement+2), -1, dtype=numpy.int64)
+    for p in myNull:
+        counts = numpy.zeros(maxImprovement+2, dtype=numpy.int64)
+        for k in myNull[p]:
+            counts[max(k, 0)] += myNull[p][k]
+        # Trials with an improvement of at least m: the total less those below m
+        table[p, 1:] = origParsToTotal[p]-numpy.cumsum(counts)[:-1]
+        table[p, 0] = origParsToTotal[p]
+    tmp = npyPath+'.tmp.npy'
+    numpy.save(tmp, table)
+    os.replace(tmp, npyPath)
+
+
+def main():
+    for txtPath in sys.argv[1:]:
+        NullTable(txtPath).load()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+# Persistent cache of 3SEQ p-values, keyed by (m, n, k), shared across runs.
+#
+# The same common (m, n, k) triples come up in every partition of every daily
+# run.  PValueCache answers a batch of triples from an SQLite file first and
+# only passes the misses to the underlying p-value source (a
+# threeseq.PValueTable), storing their results.  The file lives outside the
+# run directory, by default ~/.cache/ripples/3seq_pvals.sqlite (or
+# $RIPPLES_PVAL_CACHE; an empty value disables the cache), so it outlives a
+# run and is shared by the parallel partitions on one host: the database is
+# in WAL mode, so lookups are plain reads that never wait for a writer, and
+# writers take the lock up front and wait for each other.  Each entry records
+# when it was last used; once the cache holds more than maxEntries triples
+# the least recently used ones are evicted.  The entries are counted once,
+# when the cache is opened, and the count is kept up to date with the
+# entries this process adds and evicts, so those added meanwhile by other
+# processes are only counted by the next run.  Marking hits as used is a
+# write too, so it is skipped while another process holds the lock and done
+# with a later batch instead.
+
+import os
+import sqlite3
+import time
+import numpy
+from sqlitetransaction import Transaction
+
+# Defaults, unless $RIPPLES_PVAL_CACHE and $RIPPLES_PVAL_CACHE_SIZE are set when a cache is opened
+CACHE_PATH = os.path.expanduser('~/.cache/ripples/3seq_pvals.sqlite')
+# About 50 bytes per entry
+MAX_ENTRIES = 2000000
+
+
+class PValueCache:
+
+    def __init__(self, source, path=None, maxEntries=None):
+        # source: object with pVals(m, n, k) returning a float array, e.g. a threeseq.PValueTable
+        if path is None:
+            path = os.environ.get('RIPPLES_PVAL_CACHE', CACHE_PATH)
+        if maxEntries is None:
+            maxEntries = int(os.environ.get('RIPPLES_PVAL_CACHE_SIZE', str(MAX_ENTRIES)))
+        self.source = source
+        self.maxEntries = maxEntries
+        self.db = None
+        # Hits not yet marked as used, because another process held the write lock
+        self.unmarked = set()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS pvals (m INTEGER, n INTEGER, k INTEGER, p REAL, used REAL, "
+                            "PRIMARY KEY (m, n, k))")
+            self.db.execute("CREATE INDEX IF NOT EXISTS pvals_used ON pvals (used)")
+            self.db.execute("CREATE TEMP TABLE query (m INTEGER, n INTEGER, k INTEGER)")
+            self.db.execute("CREATE TEMP TABLE hits (m INTEGER, n INTEGER, k INTEGER)")
+            self.entries = self.db.execute("SELECT COUNT(*) FROM pvals").fetchone()[0]
+
+    def pVals(self, m, n, k):
+        """P-values of the given (m, n, k) triples, as a float64 array; only cache misses are computed."""
+        m = numpy.asarray(m, dtype=numpy.int64)
+        n = numpy.asarray(n, dtype=numpy.int64)
+        k = numpy.asarray(k, dtype=numpy.int64)
+        if self.db is None:
+            return(self.source.pVals(m, n, k))
+        myTriples = list(zip(m.tolist(), n.tolist(), k.tolist()))
+        myCached = self.get(myTriples)
+        myMisses = [i for i in range(0, len(myTriples)) if not myTriples[i] in myCached]
+        myReturn = numpy.array([myCached.get(t, 0.0) for t in myTriples], dtype=numpy.float64)
+        if myMisses:
+            myMisses = numpy.array(myMisses, dtype=numpy.int64)
+            myReturn[myMisses] = self.source.pVals(m[myMisses], n[myMisses], k[myMisses])
+            self.put([myTriples[i] for i in myMisses.tolist()], myReturn[myMisses].tolist())
+        return(myReturn)
+
+    def get(self, triples):
+        """{(m, n, k): p} for the given triples that are cached; hits are then marked as used if the lock is free."""
+        # The query table is a temporary one, private to this connection, so filling it takes no lock
+        self.db.execute("DELETE FROM query")
+        self.db.executemany("INSERT INTO query VALUES (?, ?, ?)", set(triples))
+        myRows = self.db.execute("SELECT pvals.m, pvals.n, pvals.k, pvals.p FROM query "
+                                 "JOIN pvals ON pvals.m = query.m AND pvals.n = query.n AND pvals.k = query.k").fetchall()
+        self.unmarked.update([r[:3] for r in myRows])
+        self.db.execute("PRAGMA busy_timeout = 0")
+        try:
+            with Transaction(self.db):
+                self.markUsed()
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            self.db.execute("PRAGMA busy_timeout = 60000")
+        return(dict([((r[0], r[1], r[2]), r[3]) for r in myRows]))
+
+    def put(self, triples, pVals):
+        """Store the p-values of the given triples, then evict the least recently used beyond maxEntries."""
+        myNow = time.time()
+        with Transaction(self.db):
+            self.markUsed()
+            # Triples stored meanwhile by another process are left as they are, so only new entries are counted
+            myChanges = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO pvals VALUES (?, ?, ?, ?, ?)",
+                                [t+(p, myNow) for (t, p) in zip(triples, pVals)])
+            self.entries += self.db.total_changes-myChanges
+            myExtra = self.entries-self.maxEntries
+            if myExtra > 0:
+                myChanges = self.db.total_changes
+                self.db.execute("DELETE FROM pvals WHERE rowid IN (SELECT rowid FROM pvals ORDER BY used LIMIT ?)", (myExtra,))
+                self.entries -= self.db.total_changes-myChanges
+
+    def markUsed(self):
+        # Within a write transaction
+        if not self.unmarked:
+            return
+        self.db.execute("DELETE FROM hits")
+        self.db.executemany("INSERT INTO hits VALUES (?, ?, ?)", self.unmarked)
+        self.db.execute("UPDATE pvals SET used = ? WHERE rowid IN (SELECT pvals.rowid FROM hits "
+                        "JOIN pvals ON pvals.m = hits.m AND pvals.n = hits.n AND pvals.k = hits.k)", (time.time(),))
+        self.unmarked = set()
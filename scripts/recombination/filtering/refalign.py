@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+#
+# Align the trio FASTAs of filtering/fastas/OrderedRecombs against the
+# reference, reusing one alignment per unique sample.
+#
+# The same donor and acceptor samples appear in many trios, so instead of
+# running mafft on every trio file, each unique sample sequence is aligned to
+# the reference once (mafft --auto on the pair) and kept in a cache directory,
+# under a hash of the reference and sample sequences.  Each trio's MSA is
+# then assembled from its samples' pairwise alignments: reference bases stay
+# in one column each, and the insertions of the samples between two
+# reference bases get as many columns as the longest of them, with the
+# shorter ones padded with '-'.  The result is written to AlignedRecombs/,
+# in mafft's output format, for checkmutant.py.  A trio with a sample whose
+# alignment does not match the reference is aligned whole with mafft instead.
+#
+# The cache is ~/.cache/ripples/alignments (or $RIPPLES_ALIGNMENT_CACHE, or
+# --cache-dir), so later runs reuse it; an empty value keeps it in
+# filtering/fastas/ReferenceAligned.  After each run the least recently used
+# alignments are removed until the cache is at most
+# $RIPPLES_ALIGNMENT_CACHE_BYTES (or --max-cache-bytes, 1 GiB by default);
+# 0 keeps everything.
+#
+#   python3 filtering/refalign.py [-j <jobs>] [--cache-dir <dir>] [--max-cache-bytes <bytes>]
+
+import argparse
+import hashlib
+import os
+import subprocess
+import tempfile
+from multiprocessing.pool import ThreadPool
+import numpy
+
+ORDERED_DIR = 'filtering/fastas/OrderedRecombs'
+ALIGNED_DIR = 'filtering/fastas/AlignedRecombs'
+CACHE_DIR = os.environ.get('RIPPLES_ALIGNMENT_CACHE', os.path.expanduser('~/.cache/ripples/alignments')) or 'filtering/fastas/ReferenceAligned'
+MAX_CACHE_BYTES = int(os.environ.get('RIPPLES_ALIGNMENT_CACHE_BYTES', str(1 << 30)))
+# Line length of mafft's output
+LINE_LENGTH = 60
+
+
+def readFasta(path):
+    """(header, sequence) of each record of a FASTA file, in order."""
+    myRecords = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('>'):
+                myRecords.append((line[1:], []))
+            elif line and myRecords:
+                myRecords[-1][1].append(line)
+    return [(h, ''.join(s)) for (h, s) in myRecords]
+
+def writeFasta(path, records):
+    tmp = path+'.'+str(os.getpid())+'.tmp'
+    with open(tmp, 'w') as f:
+        for (h, s) in records:
+            f.write('>'+h+'\n')
+            for k in range(0, len(s), LINE_LENGTH):
+                f.write(s[k:k+LINE_LENGTH]+'\n')
+    os.replace(tmp, path)
+
+def writeText(path, text):
+    tmp = path+'.'+str(os.getpid())+'.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class AlignmentCache:
+
+    def __init__(self, reference, cacheDir=CACHE_DIR):
+        self.reference = reference
+        self.cacheDir = cacheDir
+        os.makedirs(cacheDir, exist_ok=True)
+
+    def path(self, seq):
+        return os.path.join(self.cacheDir, hashlib.sha1((self.reference+'\n'+seq).encode()).hexdigest()+'.fa')
+
+    def get(self, seq):
+        """
+        (aligned reference, aligned sample) of a sample sequence, from the
+        cache.  An alignment whose rows are not the reference and the sample
+        once their gaps are removed (e.g. a damaged file) is done again, and
+        ValueError is raised if mafft's output still does not match.
+        """
+        if not seq:
+            return (self.reference, '-'*len(self.reference))
+        myPair = self.read(seq)
+        if myPair is None:
+            self.align(seq, True)
+            myPair = self.read(seq)
+            if myPair is None:
+                raise ValueError('mafft alignment of a sample to the reference does not match them: %s' % self.path(seq))
+        # Recently used alignments are the last to be pruned
+        os.utime(self.path(seq))
+        return myPair
+
+    def read(self, seq):
+        if not os.path.exists(self.path(seq)):
+            return None
+        myRecords = readFasta(self.path(seq))
+        if (len(myRecords) != 2 or len(myRecords[0][1]) != len(myRecords[1][1])
+                or myRecords[0][1].replace('-', '') != self.reference or myRecords[1][1].replace('-', '') != seq):
+            return None
+        return (myRecords[0][1], myRecords[1][1])
+
+    def align(self, seq, force=False):
+        """Align a sample sequence to the reference with mafft, unless it is cached."""
+        myPath = self.path(seq)
+        if not seq or (os.path.exists(myPath) and not force):
+            return
+        with tempfile.NamedTemporaryFile('w', suffix='.fa') as f:
+            f.write('>reference\n'+self.reference+'\n>sample\n'+seq+'\n')
+            f.flush()
+            myOut = subprocess.run(['mafft', '--auto', '--quiet', '--thread', '1', f.name],
+                                   check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        writeText(myPath, myOut)
+
+    def prune(self, maxBytes):
+        """Remove the least recently used alignments until the cache takes at most maxBytes (0 for no limit)."""
+        if maxBytes <= 0:
+            return
+        myFiles = []
+        for f in os.listdir(self.cacheDir):
+            if f.endswith('.fa'):
+                myStat = os.stat(os.path.join(self.cacheDir, f))
+                myFiles.append((myStat.st_mtime, myStat.st_size, f))
+        myFiles.sort()
+        mySize = sum([size for (t, size, f) in myFiles])
+        for (t, size, f) in myFiles:
+            if mySize <= maxBytes:
+                break
+            try:
+                os.remove(os.path.join(self.cacheDir, f))
+            except FileNotFoundError:
+                # Pruned by another run sharing the cache
+                pass
+            mySize -= size
+
+
+def mergeAlignments(reference, pairs):
+    """
+    Reference-anchored MSA of pairwise alignments to the same reference, as
+    (aligned reference, [aligned samples]).  Insertions before each
+    reference base (and after the last one) are left-aligned and padded to
+    the longest insertion of any sample at that point.
+    """
+    myLength = len(reference)
+    mySlots = []
+    myInsertions = numpy.zeros(myLength+1, dtype=numpy.int64)
+    for (refAligned, sampleAligned) in pairs:
+        if refAligned.replace('-', '') != reference or len(sampleAligned) != len(refAligned):
+            raise ValueError('pairwise alignment does not have the reference as its first row')
+        isBase = numpy.frombuffer(refAligned.encode(), dtype=numpy.uint8) != ord('-')
+        # Insertion slot of each column: the number of reference bases before it
+        mySlot = numpy.cumsum(isBase)-isBase
+        mySlots.append((isBase, mySlot))
+        myInsertions = numpy.maximum(myInsertions, numpy.bincount(mySlot[~isBase], minlength=myLength+1))
+    # First column of each slot's insertions, and column of each reference base
+    mySlotStart = numpy.arange(myLength+1)+numpy.concatenate([[0], numpy.cumsum(myInsertions)[:-1]])
+    myBaseColumn = mySlotStart[:-1]+myInsertions[:-1]
+    myWidth = myLength+int(myInsertions.sum())
+
+    myRef = numpy.full(myWidth, ord('-'), dtype=numpy.uint8)
+    myRef[myBaseColumn] = numpy.frombuffer(reference.encode(), dtype=numpy.uint8)
+    mySamples = []
+    for ((refAligned, sampleAligned), (isBase, mySlot)) in zip(pairs, mySlots):
+        sampleChars = numpy.frombuffer(sampleAligned.encode(), dtype=numpy.uint8)
+        myRow = numpy.full(myWidth, ord('-'), dtype=numpy.uint8)
+        myRow[myBaseColumn] = sampleChars[isBase]
+        # k-th inserted character of a slot goes k columns after the slot start
+        insertCols = numpy.flatnonzero(~isBase)
+        if len(insertCols) > 0:
+            firstOfSlot = numpy.searchsorted(mySlot[insertCols], mySlot[insertCols])
+            myRank = numpy.arange(len(insertCols))-firstOfSlot
+            myRow[mySlotStart[mySlot[insertCols]]+myRank] = sampleChars[insertCols]
+        mySamples.append(myRow.tobytes().decode())
+    return (myRef.tobytes().decode(), mySamples)
+
+
+def alignTrios(jobs=os.cpu_count(), orderedDir=ORDERED_DIR, alignedDir=ALIGNED_DIR, cacheDir=CACHE_DIR, maxCacheBytes=MAX_CACHE_BYTES):
+    myFiles = sorted(os.listdir(orderedDir))
+    if not myFiles:
+        return
+    # Every trio file starts with the same reference, as written by analyzerecomb.py
+    myReference = readFasta(os.path.join(orderedDir, myFiles[0]))[0][1].lower()
+    myCache = AlignmentCache(myReference, cacheDir)
+    mySeqs = set()
+    for f in myFiles:
+        for (h, s) in readFasta(os.path.join(orderedDir, f))[1:]:
+            mySeqs.add(s.lower())
+    with ThreadPool(jobs) as pool:
+        pool.map(myCache.align, sorted(mySeqs))
+    mySeqs = None
+
+    os.makedirs(alignedDir, exist_ok=True)
+    for f in myFiles:
+        myRecords = readFasta(os.path.join(orderedDir, f))
+        try:
+            (myRef, mySamples) = mergeAlignments(myReference, [myCache.get(s.lower()) for (h, s) in myRecords[1:]])
+        except ValueError as e:
+            print('WARNING: %s; aligning %s with mafft instead' % (e, f))
+            alignTrio(os.path.join(orderedDir, f), os.path.join(alignedDir, f))
+            continue
+        writeFasta(os.path.join(alignedDir, f), [(myRecords[0][0], myRef)]+[(myRecords[k+1][0], mySamples[k]) for k in range(len(mySamples))])
+    myCache.prune(maxCacheBytes)
+
+
+def alignTrio(orderedPath, alignedPath):
+    """Align a whole trio file with mafft --auto, as generate_report.sh did before the cache."""
+    try:
+        myOut = subprocess.run(['mafft', '--auto', '--quiet', orderedPath],
+                               check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    except subprocess.CalledProcessError as e:
+        print('WARNING: %s; skipping %s' % (e, os.path.basename(orderedPath)))
+        return
+    writeText(alignedPath, myOut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Align the trio FASTAs against the reference from cached per-sample alignments.')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='concurrent mafft runs')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='directory of the per-sample alignments')
+    parser.add_argument('--max-cache-bytes', type=int, default=MAX_CACHE_BYTES,
+                        help='size the cache is pruned to after the run, least recently used first (0: no limit)')
+    args = parser.parse_args()
+    alignTrios(args.jobs, cacheDir=args.cache_dir, maxCacheBytes=args.max_cache_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,22 +11,22 @@ from numpy import random
 import gzip
 import math
 import re
+from datastore import DataStore
 
 ##########################
 ##### MAIN FUNCTIONS #####
 ##########################
 
-def removeRedundantTrios():
+def removeRedundantTrios(store=None):
+    if store is None:
+        store = DataStore()
     nodeToLeaves = {}
     # NOTE: Replaced "optimized-large-radius-pruneCatExcludeB30.usher.no-long-branches.leaves.txt.gz" with "leaves.txt",
     # which the pipeline generated by the input protobuf 
     #with gzip.open('filtering/data/leaves.txt') as f:
-    with open('filtering/data/leaves.txt') as f:
-        for line in f:
-            #splitLine = (line.decode('utf8').strip()).split('\t')
-            splitLine = (line.strip()).split('\t')
-            if splitLine[0].isdigit():
-                nodeToLeaves[int(splitLine[0])] = int(splitLine[1])
+    for splitLine in store.getRows('leaves.txt'):
+        if splitLine[0].isdigit():
+            nodeToLeaves[int(splitLine[0])] = int(splitLine[1])
 
     myTrios = []
     trioToPVal = {}
@@ -34,40 +34,41 @@ def removeRedundantTrios():
     trioToLeaves = {}
     trioToLine = {}
     lc = 0
-    with open('filtering/data/combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt') as f:
-        for line in f:
-            splitLine = (line.strip()).split('\t')
-            myTrios.append([int(splitLine[0]),int(splitLine[3]),int(splitLine[6])])
-            trioToLine[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])] = splitLine
-            if splitLine[13].startswith('0/'):
-                splitLine[13] = (1.0/float(splitLine[13][2:]))
-            trioToPVal[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])] = float(splitLine[13])
-            trioToSites[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])] = len(splitLine[16])
-            trioToLeaves[str(splitLine[0])+'_'+str(splitLine[3])+'_'+str(splitLine[6])] = nodeToLeaves[int(splitLine[3])]+nodeToLeaves[int(splitLine[6])]
-            lc += 1
+    newTiebreak = store.getTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt')
+    for i in range(0, len(newTiebreak)):
+        splitLine = list(newTiebreak.rows[i])
+        myTrio = newTiebreak.trios()[i]
+        myTrios.append(myTrio)
+        trioToLine[myTrio] = splitLine
+        if splitLine[13].startswith('0/'):
+            splitLine[13] = (1.0/float(splitLine[13][2:]))
+        trioToPVal[myTrio] = float(splitLine[13])
+        trioToSites[myTrio] = len(splitLine[16])
+        trioToLeaves[myTrio] = nodeToLeaves[myTrio[1]]+nodeToLeaves[myTrio[2]]
+        lc += 1
 
     toRemove = {}
     for i in range(0,len(myTrios)):
         for j in range(i+1,len(myTrios)):
             if checkTwo(myTrios[i],myTrios[j]) == True: # if circular logic:
-                if trioToPVal[joinerU(myTrios[i])] < trioToPVal[joinerU(myTrios[j])]: # remove case with lower pval
-                    toRemove[joinerU(myTrios[j])] = True
-                elif trioToPVal[joinerU(myTrios[i])] > trioToPVal[joinerU(myTrios[j])]:
-                    toRemove[joinerU(myTrios[i])] = True
-                elif trioToPVal[joinerU(myTrios[i])] == trioToPVal[joinerU(myTrios[j])]:
-
-                    if trioToSites[joinerU(myTrios[i])] > trioToSites[joinerU(myTrios[j])]: # remove case with more informative sites
-                        toRemove[joinerU(myTrios[i])] = True
-                    elif trioToSites[joinerU(myTrios[i])] < trioToSites[joinerU(myTrios[j])]:
-                        toRemove[joinerU(myTrios[j])] = True
-                    elif trioToSites[joinerU(myTrios[i])] == trioToSites[joinerU(myTrios[j])]:
-
-                        if trioToLeaves[joinerU(myTrios[i])] < trioToLeaves[joinerU(myTrios[j])]:
-                             toRemove[joinerU(myTrios[i])] = True
-                        if trioToLeaves[joinerU(myTrios[i])] > trioToLeaves[joinerU(myTrios[j])]:
-                             toRemove[joinerU(myTrios[j])] = True
-                        elif trioToLeaves[joinerU(myTrios[i])] == trioToLeaves[joinerU(myTrios[j])]:
-                            print(myTrios[i], myTrios[j], trioToPVal[joinerU(myTrios[i])])
+                if trioToPVal[myTrios[i]] < trioToPVal[myTrios[j]]: # remove case with lower pval
+                    toRemove[myTrios[j]] = True
+                elif trioToPVal[myTrios[i]] > trioToPVal[myTrios[j]]:
+                    toRemove[myTrios[i]] = True
+                elif trioToPVal[myTrios[i]] == trioToPVal[myTrios[j]]:
+
+                    if trioToSites[myTrios[i]] > trioToSites[myTrios[j]]: # remove case with more informative sites
+                        toRemove[myTrios[i]] = True
+                    elif trioToSites[myTrios[i]] < trioToSites[myTrios[j]]:
+                        toRemove[myTrios[j]] = True
+                    elif trioToSites[myTrios[i]] == trioToSites[myTrios[j]]:
+
+                        if trioToLeaves[myTrios[i]] < trioToLeaves[myTrios[j]]:
+                             toRemove[myTrios[i]] = True
+                        if trioToLeaves[myTrios[i]] > trioToLeaves[myTrios[j]]:
+                             toRemove[myTrios[j]] = True
+                        elif trioToLeaves[myTrios[i]] == trioToLeaves[myTrios[j]]:
+                            print(myTrios[i], myTrios[j], trioToPVal[myTrios[i]])
 
     myOutString = ''
     for t in trioToLine:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+#
+# Run the RIPPLES filtration pipeline in a single Python process.
+#
+# The Python stages share one DataStore, so each stage receives the tables of
+# the previous stages already parsed instead of re-reading filtering/data/.
+# External tools (ripplesUtils, generate_report.sh) still run as
+# subprocesses, and the tables they read are always written to disk.  Every
+# other intermediate table is only written with --write-intermediates.
+#
+# With --resume, a content-hashed manifest of completed stages is kept in
+# filtering/data/stage_manifest.json and a rerun restarts at the first stage
+# whose inputs, parameters or outputs have changed.
+#
+# Run from "usher/scripts/recombination", like run_ripples_filtration.sh:
+#   python3 filtering/run_filtration.py <mat.pb> <raw_sequences.fa> <reference.fa>
+
+import argparse
+import os
+import subprocess
+import numpy
+
+from datastore import DataStore
+from stagecache import StageManifest
+import combineAndGetPVals
+import getABABA
+import makeMNK
+import getDescendants
+import makeSampleInfo
+import finish_MNK
+import checkClusters
+import doNewTieBreakers
+import removeRedundant
+
+# Tables read by ripplesUtils, analyzerecomb.py or checkmutant.py
+EXTERNAL_TABLES = ['combinedCatOnlyBestWithPVals.txt', 'sampleInfo.txt', 'allRelevantNodesInfSites.txt']
+
+
+def run(cmd, cwd=None):
+    print(' '.join(cmd))
+    subprocess.run(cmd, cwd=cwd, check=True)
+
+
+def applyThreeSeqCutoff(store):
+    """
+    Keep trios with a 3seq p-value (column 21) of at most 0.2, replacing
+    awk '$21 <= .20' in run_ripples_filtration.sh.
+    """
+    noClusters = store.getTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters.txt')
+    myRows = numpy.flatnonzero(noClusters.column(20, float, numpy.float64) <= 0.20)
+    store.putTable('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3SeqP02.txt', noClusters.select(myRows))
+
+
+# CPU budget set by LocalExecutor (run.py with 'executor: local')
+THREADS = os.environ.get('RIPPLES_THREADS', '10')
+
+
+def getStages(mat, raw_sequences, reference, store, useVcf=False):
+    """
+    Filtration stages in order, each as (name, run, inputs, outputs, params).
+    Inputs and outputs are file paths; the source of each stage script is
+    listed as an input so that code changes invalidate the stage.  With
+    useVcf, getABABA reads the relevant nodes' genotypes from a VCF written by
+    matUtils extract instead of from the MAT.
+    """
+    d = store.path
+    pvals = d('combinedCatOnlyBestWithPVals.txt')
+    stages = [
+        ('combineAndGetPVals', lambda: combineAndGetPVals.catOnlyBest(store),
+            ['filtering/combineAndGetPVals.py', 'filtering/nulltables.py', 'filtering/triotable.py', d('recombination.tsv'), d('descendants.tsv'),
+             'filtering/rob_null.txt', 'filtering/russ_null.txt'],
+            [d('catRecombinationReplacedMinStartingPars.tsv'), d('catRecombOnlyBestScoresBeforeCombining.txt'),
+             d('combinedCatOnlyBest.txt'), pvals], []),
+        # filtering/data/sample_paths.txt is also generated by ripplesUtils
+        # with same format as matUtils in UShER commit a6f65ade7a6606ef75902ee290585c6db23aeba6
+        ('ripplesUtils', lambda: run(['ripplesUtils', mat]),
+            [mat, pvals],
+            [d('sample_paths.txt'), d('nodeToParent.txt'), d('nodeToParent_no_underscore.txt'),
+             d('allRelevantNodeNames.txt'), d('leaves.txt')], ['ripplesUtils', mat]),
+    ]
+    if useVcf:
+        stages += [
+            # Generates allRelevantNodes.vcf
+            ('matUtils extract', lambda: run(['matUtils', 'extract', '-i', mat, '-s', d('allRelevantNodeNames.txt'),
+                                              '-v', d('allRelevantNodes.vcf'), '-T', THREADS]),
+                [mat, d('allRelevantNodeNames.txt')],
+                [d('allRelevantNodes.vcf')], ['matUtils', 'extract', mat]),
+            ('getABABA', lambda: getABABA.getABABA(store),
+                ['filtering/getABABA.py', 'filtering/vcfreader.py', pvals, d('nodeToParent_no_underscore.txt'), d('allRelevantNodes.vcf')],
+                [d('count.txt'), d('allRelevantNodesInfSites.txt'), d('allRelevantNodesInfSeq.txt'),
+                 d('allRelevantNodesSiteChanges.txt')], []),
+        ]
+    else:
+        stages += [
+            # Reads the genotypes of the relevant nodes from the MAT itself
+            ('getABABA', lambda: getABABA.getABABA(store, mat),
+                ['filtering/getABABA.py', 'filtering/matreader.py', pvals, d('nodeToParent_no_underscore.txt'), mat,
+                 d('sample_paths.txt')],
+                [d('count.txt'), d('allRelevantNodesInfSites.txt'), d('allRelevantNodesInfSeq.txt'),
+                 d('allRelevantNodesSiteChanges.txt')], []),
+        ]
+    stages += [
+        ('makeMNK', lambda: (makeMNK.makeMNK(store), makeMNK.removeDups(store)),
+            ['filtering/makeMNK.py', 'filtering/triotable.py', d('allRelevantNodesInfSeq.txt')],
+            [d('allRelevantNodesMNK.txt'), d('mnk_no_dups.txt')], []),
+        # Samples below each relevant node, from the MAT's tree (or sample_paths.txt with --vcf)
+        ('getDescendants', lambda: getDescendants.getNClosest(store, None if useVcf else mat),
+            ['filtering/getDescendants.py', 'filtering/treeindex.py', d('allRelevantNodeNames.txt'), d('sample_paths.txt')]
+            + ([] if useVcf else ['filtering/matreader.py', mat]),
+            [d('allRelevantNodesToDescendants.txt'), d('allDescendants.txt')], []),
+        ('makeSampleInfo', lambda: makeSampleInfo.makeSampleInfo(store),
+            ['filtering/makeSampleInfo.py', 'filtering/triotable.py', d('allRelevantNodesToDescendants.txt'), pvals,
+             d('allRelevantNodesInfSites.txt')],
+            [d('sampleInfo.txt')], []),
+        # Get raw sequences for all descendant nodes, align them to reference
+        # and perform QC steps to generate final_report.txt
+        ('generate_report', lambda: run(['./filtering/generate_report.sh', raw_sequences, reference]),
+            ['filtering/generate_report.sh', 'filtering/analyzerecomb.py', 'filtering/fastaindex.py', 'filtering/refalign.py',
+             'filtering/checkmutant.py',
+             raw_sequences, reference, pvals, d('sampleInfo.txt'), d('allRelevantNodesInfSites.txt')],
+            [d('report.txt'), d('final_report.txt')], []),
+        ('finish_MNK', lambda: (finish_MNK.addPVals(store), finish_MNK.combinePValueFiles(store),
+                                finish_MNK.addInfSites(store)),
+            # 3seq p-values of mnk_no_dups.txt are computed in-process by filtering/threeseq.py,
+            # through the cross-run cache of filtering/pvalcache.py
+            ['filtering/finish_MNK.py', 'filtering/threeseq.py', 'filtering/pvalcache.py', 'filtering/sqlitetransaction.py', 'filtering/triotable.py',
+             d('mnk_no_dups.txt'), d('allRelevantNodesMNK.txt'), pvals, d('final_report.txt'),
+             d('allRelevantNodesInfSites.txt'), d('allRelevantNodesInfSeq.txt')],
+            [d('allRelevantNodesMNKPval.txt'), d('combinedCatOnlyBestWithAll3PValsTiesBroken.txt'),
+             d('combinedCatOnlyBestWithAll3PValsRealTiesBroken.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSites.txt')], []),
+        ('checkClusters', lambda: (checkClusters.checkClusters(store), applyThreeSeqCutoff(store)),
+            ['filtering/checkClusters.py', 'filtering/triotable.py', 'filtering/run_filtration.py', d('allRelevantNodesMNKPval.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSites.txt')],
+            [d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3SeqP02.txt')], []),
+        ('doNewTieBreakers', lambda: (doNewTieBreakers.applyPval(store), doNewTieBreakers.doNewTiebreakers(store)),
+            ['filtering/doNewTieBreakers.py', 'filtering/triotable.py', d('leaves.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3SeqP02.txt')],
+            [d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClusters3seqP02RussPval005.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt')], []),
+        ('removeRedundant', lambda: (os.makedirs('results', exist_ok=True), removeRedundant.removeRedundantTrios(store)),
+            ['filtering/removeRedundant.py', d('leaves.txt'),
+             d('combinedCatOnlyBestWithPValsFinalReportWithInfSitesNoClustersNewTiebreak3seqP02RussPval005.txt')],
+            ['results/final_recombinants.txt'], []),
+    ]
+    return stages
+
+
+def runFiltration(mat, raw_sequences, reference, store, manifest=None, useVcf=False):
+    """
+    Run every stage in order.  With a manifest, skip stages whose recorded
+    inputs, parameters and outputs are unchanged, up to the first stage
+    that is invalid; that stage and every later one are run again.
+    """
+    resuming = manifest is not None
+    for name, runStage, inputs, outputs, params in getStages(mat, raw_sequences, reference, store, useVcf):
+        if resuming and manifest.isValid(name, inputs, params, outputs):
+            print("Skipping {}: inputs and outputs unchanged since last run.".format(name))
+            continue
+        resuming = False
+        if manifest is not None:
+            manifest.invalidate(name)
+        print("Running {}.".format(name))
+        runStage()
+        if manifest is not None:
+            manifest.record(name, inputs, params, outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the RIPPLES filtration pipeline in one process.')
+    parser.add_argument('mat', help='input MAT protobuf')
+    parser.add_argument('raw_sequences', help='raw sequence fasta')
+    parser.add_argument('reference', help='reference fasta')
+    parser.add_argument('--write-intermediates', action='store_true',
+                        help='write every intermediate table to filtering/data, not only those read by external tools')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip stages unchanged since the last run, as recorded in filtering/data/stage_manifest.json '
+                        '(implies --write-intermediates)')
+    parser.add_argument('--vcf', action='store_true',
+                        help='read genotypes from allRelevantNodes.vcf, written by matUtils extract, instead of from the MAT')
+    args = parser.parse_args()
+
+    store = DataStore(writeAll=args.write_intermediates or args.resume, alwaysWrite=EXTERNAL_TABLES)
+    manifest = None
+    if args.resume:
+        manifest = StageManifest(store.path('stage_manifest.json'))
+    runFiltration(args.mat, args.raw_sequences, args.reference, store, manifest, args.vcf)
+
+
+if __name__ == "__main__":
+    main()
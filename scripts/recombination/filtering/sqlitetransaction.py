@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+#
+# Write transaction for the SQLite files that parallel ripples jobs share:
+# pvalcache.py's cache of 3SEQ p-values and workqueue.py's queue of long
+# branch chunks.  Both connect with isolation_level=None, so statements
+# outside a Transaction run in autocommit mode.
+
+
+class Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+    # wait for each other instead of failing on a lock upgrade, and what a
+    # writer reads (e.g. the next pending chunk) can not change before it
+    # writes
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+# Content-hashed manifest of completed filtration stages.
+#
+# For each stage the manifest records a sha256 of every input file, the stage
+# parameters and a sha256 of every output file.  A stage is still valid on a
+# rerun when all of these match, so run_filtration.py --resume can skip the
+# stages that completed before a failure and restart at the first invalid one.
+
+import hashlib
+import json
+import os
+
+
+class StageManifest:
+
+    def __init__(self, path='filtering/data/stage_manifest.json'):
+        self.path = path
+        self.stages = {}
+        # (path, size, mtime) -> sha256, so each file is hashed once per run
+        self.hashes = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.stages = json.load(f)
+
+    def fileHash(self, path):
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        myKey = (path, st.st_size, st.st_mtime_ns)
+        if myKey not in self.hashes:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            self.hashes[myKey] = h.hexdigest()
+        return self.hashes[myKey]
+
+    def isValid(self, name, inputs, params, outputs):
+        entry = self.stages.get(name)
+        if entry is None or entry['params'] != params:
+            return False
+        for p in inputs:
+            if entry['inputs'].get(p) != self.fileHash(p):
+                return False
+        if sorted(entry['inputs']) != sorted(inputs) or sorted(entry['outputs']) != sorted(outputs):
+            return False
+        for p in outputs:
+            if self.fileHash(p) is None or entry['outputs'][p] != self.fileHash(p):
+                return False
+        return True
+
+    def invalidate(self, name):
+        """Drop a stage before it runs, so a failure part way leaves it invalid."""
+        if name in self.stages:
+            del self.stages[name]
+            self.save()
+
+    def record(self, name, inputs, params, outputs):
+        self.stages[name] = {
+            'inputs': {p: self.fileHash(p) for p in inputs},
+            'params': params,
+            'outputs': {p: self.fileHash(p) for p in outputs},
+        }
+        self.save()
+
+    def save(self):
+        tmp = self.path+'.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.stages, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
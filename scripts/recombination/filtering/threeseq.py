@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#
+# 3SEQ p-values of (m, n, k) triples, computed in-process.
+#
+# The 3SEQ statistic of a trio is the maximum descent k of the walk over its
+# informative sites that steps up on the m sites matching one parent and down
+# on the n sites matching the other.  Its p-value is the probability that a
+# walk of m up and n down steps in uniformly random order has a maximum
+# descent of at least k, which is what 3seq -c reads from its p-value table.
+#
+# PValueTable keeps one table per k, table[m, n] for m, n <= size, as
+# <tableDir>/k<k>.npy.  A table is computed the first time its k is queried,
+# written atomically (so parallel partitions sharing filtering/3seq can build
+# them concurrently) and memory-mapped afterwards.  Triples with m or n
+# beyond size are computed directly, without a table.
+#
+#   python3 filtering/threeseq.py <maxK>    precomputes the tables for k <= maxK
+
+import os
+import sys
+import numpy
+
+TABLE_DIR = 'filtering/3seq/pvalues'
+# Same size as the 3seq -g table that 3seq -c used to read
+TABLE_SIZE = 700
+
+
+class PValueTable:
+
+    def __init__(self, tableDir=TABLE_DIR, size=TABLE_SIZE):
+        self.tableDir = tableDir
+        self.size = size
+        self.tables = {}
+
+    def table(self, k):
+        if k not in self.tables:
+            myPath = os.path.join(self.tableDir, 'k'+str(k)+'.npy')
+            if not os.path.exists(myPath):
+                os.makedirs(self.tableDir, exist_ok=True)
+                tmp = myPath+'.'+str(os.getpid())+'.tmp.npy'
+                numpy.save(tmp, computePVals(k, self.size, self.size))
+                os.replace(tmp, myPath)
+            self.tables[k] = numpy.load(myPath, mmap_mode='r')
+        return self.tables[k]
+
+    def pVals(self, m, n, k):
+        """P-values of the given (m, n, k) triples, as a float64 array."""
+        m = numpy.asarray(m, dtype=numpy.int64)
+        n = numpy.asarray(n, dtype=numpy.int64)
+        k = numpy.asarray(k, dtype=numpy.int64)
+        myReturn = numpy.zeros(len(k), dtype=numpy.float64)
+        # A descent of at least 0 is certain; one longer than n is impossible
+        myReturn[k <= 0] = 1.0
+        myTodo = (k > 0) & (k <= n)
+        for myK in numpy.unique(k[myTodo]).tolist():
+            myRows = numpy.flatnonzero(myTodo & (k == myK))
+            inTable = (m[myRows] <= self.size) & (n[myRows] <= self.size)
+            myTabled = myRows[inTable]
+            myReturn[myTabled] = self.table(myK)[m[myTabled], n[myTabled]]
+            myUntabled = myRows[~inTable]
+            if len(myUntabled) > 0:
+                myPVals = computePVals(myK, int(m[myUntabled].max()), int(n[myUntabled].max()))
+                myReturn[myUntabled] = myPVals[m[myUntabled], n[myUntabled]]
+        return(myReturn)
+
+
+def computePVals(k, maxM, maxN):
+    """
+    P(maximum descent >= k) for every m <= maxM and n <= maxN, as a
+    (maxM+1) x (maxN+1) array.
+
+    g(a, b, D), the probability of reaching a descent of k from a current
+    descent D with a up and b down steps left, satisfies
+        g(a, b, D) = a/(a+b) g(a-1, b, max(D-1, 0)) + b/(a+b) g(a, b-1, D+1)
+    with g = 1 once D reaches k and g(0, 0, D) = 0 below k.  It is computed
+    for all (a, b) on one anti-diagonal a+b = s at a time, from the previous
+    one; the p-value of (m, n) is g(m, n, 0).  Only sums of non-negative
+    terms are taken, so small p-values keep their precision.
+    """
+    myPVals = numpy.zeros((maxM+1, maxN+1), dtype=numpy.float64)
+    myUp = numpy.maximum(numpy.arange(k)-1, 0)
+    # Diagonal 0: no steps left, descent below k
+    myPrev = numpy.zeros((1, k), dtype=numpy.float64)
+    for s in range(1, maxM+maxN+1):
+        a = numpy.arange(s+1, dtype=numpy.float64)
+        # Row a of the up term is g(a-1, s-a, .), row a of the down term g(a, s-a-1, .)
+        up = numpy.vstack([numpy.zeros((1, k)), myPrev])[:, myUp]
+        down = numpy.hstack([numpy.vstack([myPrev, numpy.zeros((1, k))])[:, 1:], numpy.ones((s+1, 1))])
+        myPrev = (a/s)[:, None]*up+((s-a)/s)[:, None]*down
+        myRows = numpy.arange(max(0, s-maxN), min(s, maxM)+1)
+        myPVals[myRows, s-myRows] = myPrev[myRows, 0]
+    return(myPVals)
+
+
+def main():
+    myTable = PValueTable()
+    for k in range(1, int(sys.argv[1])+1):
+        myTable.table(k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+# Children index of the tree, for walking down from the relevant nodes only.
+#
+# A TreeIndex stores the children of every node as one array sorted by
+# parent (with an offset per node), so the nodes k levels below a node are
+# found by expanding only its own subtree.  It is built from the MAT
+# (through matreader.readTree(), which getABABA shares and which uncondenses
+# the condensed nodes as ripplesUtils does, so their samples sit at their own
+# depth); or, without a MAT, from the root-to-sample paths of sample_paths.txt.
+
+import numpy
+
+
+class TreeIndex:
+
+    def __init__(self, parents, names, internalToIndex):
+        # parents: parent index of each node (-1 for the root); names: sample
+        # name of each leaf, None for internal nodes; internalToIndex: internal
+        # node id (e.g. '123' for node_123) -> node index
+        self.names = names
+        self.internalToIndex = internalToIndex
+        parents = numpy.asarray(parents, dtype=numpy.int64)
+        self.childOrder = numpy.argsort(parents, kind='stable')
+        # Children of node i are childOrder[offsets[i+1]:offsets[i+2]]; the root comes first
+        self.offsets = numpy.concatenate([[0], numpy.cumsum(numpy.bincount(parents+1, minlength=len(parents)+1))])
+
+    def children(self, i):
+        return self.childOrder[self.offsets[i+1]:self.offsets[i+2]]
+
+    def leavesAt(self, i, depth):
+        """Names of the samples exactly depth levels below node i, in tree order."""
+        myLevel = numpy.array([i], dtype=numpy.int64)
+        for d in range(0, depth):
+            myLevel = numpy.concatenate([self.children(j) for j in myLevel.tolist()]+[numpy.zeros(0, dtype=numpy.int64)])
+        for j in myLevel.tolist():
+            if self.names[j] is not None:
+                yield self.names[j]
+
+    @classmethod
+    def fromMat(cls, matPath):
+        import matreader
+        (myMat, myParents, internalToIndex, myNames) = matreader.readTree(matPath)
+        return cls(myParents, myNames, dict([(str(k), v) for (k, v) in internalToIndex.items()]))
+
+    @classmethod
+    def fromSamplePaths(cls, samplePaths):
+        """
+        Index of the nodes on the paths of sample_paths.txt, where a line reads
+        sample_id, a tab, then "<mutations> (<node id>) > ... > <mutations>".
+        """
+        myParents = []
+        myNames = []
+        internalToIndex = {}
+        with open(samplePaths) as f:
+            for line in f:
+                splitLine = (line.strip()).split('\t')
+                if splitLine[0] == 'sample_id' or len(splitLine) < 2:
+                    continue
+                mySplit = (splitLine[1]).split('>')
+                myParent = -1
+                for myNode in mySplit[:-1]:
+                    myId = myNode.strip().split()[-1][1:-1]
+                    if not myId in internalToIndex:
+                        internalToIndex[myId] = len(myParents)
+                        myParents.append(myParent)
+                        myNames.append(None)
+                    myParent = internalToIndex[myId]
+                myParents.append(myParent)
+                myNames.append(splitLine[0])
+        return cls(myParents, myNames, internalToIndex)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#
+# Typed view of the filtration tables that hold one recombinant trio per row.
+#
+# recombination.tsv and the combinedCatOnlyBest* family have the trio in
+# columns 1, 4 and 7 and the breakpoint intervals, e.g. "(123,456)", in
+# columns 2 and 3; the allRelevantNodes* tables, final_report.txt and
+# descendants.tsv have the recombinant node (and trio) in the first columns.
+# A TrioTable keeps the string rows, so tables are written back exactly as
+# read, and parses each typed column once, on first use: node ids and
+# breakpoints as numpy int64 arrays and trio keys as tuples of ints, with a
+# trio index for joins between tables.  DataStore.getTable() caches one
+# TrioTable per table, so later stages reuse the parsed columns.
+
+import numpy
+
+# Trio columns of the combinedCatOnlyBest* family and of the allRelevantNodes* tables
+COMBINED_TRIO = (0, 3, 6)
+NODES_TRIO = (0, 1, 2)
+
+
+class TrioTable:
+
+    def __init__(self, rows, trioCols=COMBINED_TRIO):
+        # Comment rows (e.g. the '#recomb_node_id' header) are kept apart and written first
+        self.header = [r for r in rows if r[0].startswith('#')]
+        self.rows = [r for r in rows if not r[0].startswith('#')]
+        self.trioCols = trioCols
+        self.columns = {}
+        self.trioIndex = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def allRows(self):
+        return self.header+self.rows
+
+    def column(self, i, parse=int, dtype=numpy.int64):
+        """Column i parsed with parse, as a numpy array of dtype (or a list if dtype is None)."""
+        myKey = (i, parse, dtype)
+        if myKey not in self.columns:
+            myValues = [parse(r[i]) for r in self.rows]
+            self.columns[myKey] = myValues if dtype is None else numpy.array(myValues, dtype=dtype)
+        return self.columns[myKey]
+
+    def nodes(self, k):
+        """Node ids of trio member k (0 recombinant, 1 donor, 2 acceptor)."""
+        return self.column(self.trioCols[k], parseNodeId)
+
+    def breakpoints(self):
+        """(bp1Start, bp1End, bp2Start, bp2End) int arrays, from columns 2 and 3."""
+        return (self.column(1, parseStart), self.column(1, parseEnd),
+                self.column(2, parseStart), self.column(2, parseEnd))
+
+    def trios(self):
+        """Trio of each row as a (recomb, donor, acceptor) tuple of ints."""
+        myKey = ('trios',)
+        if myKey not in self.columns:
+            self.columns[myKey] = list(zip(self.nodes(0).tolist(), self.nodes(1).tolist(), self.nodes(2).tolist()))
+        return self.columns[myKey]
+
+    def index(self):
+        """Trio -> row number; for a repeated trio, its last row, as a dict built row by row would keep."""
+        if self.trioIndex is None:
+            self.trioIndex = {}
+            for i, t in enumerate(self.trios()):
+                self.trioIndex[t] = i
+        return self.trioIndex
+
+    def lookup(self, trios):
+        """Row number of each given trio in this table, or -1 where it is missing."""
+        myIndex = self.index()
+        return numpy.array([myIndex.get(t, -1) for t in trios], dtype=numpy.int64)
+
+    def join(self, other):
+        """For every row of this table, the row of other with the same trio (or -1)."""
+        return other.lookup(self.trios())
+
+    def select(self, rowNums, extraColumns=()):
+        """
+        New table with the given rows, in order, each extended by the values
+        of extraColumns (lists parallel to rowNums).  Typed columns already
+        parsed are carried over instead of being parsed again.
+        """
+        rowNums = list(rowNums)
+        myRows = []
+        for k, i in enumerate(rowNums):
+            myRow = self.rows[i]
+            if extraColumns:
+                myRow = myRow+[str(c[k]) for c in extraColumns]
+            myRows.append(myRow)
+        myTable = TrioTable([], self.trioCols)
+        myTable.rows = myRows
+        myInds = numpy.array(rowNums, dtype=numpy.int64)
+        for myKey, myValues in self.columns.items():
+            if isinstance(myValues, numpy.ndarray):
+                myTable.columns[myKey] = myValues[myInds]
+            else:
+                myTable.columns[myKey] = [myValues[i] for i in rowNums]
+        return myTable
+
+
+def parseNodeId(s):
+    return int(s.replace('node_', '')) if s.startswith('node_') else int(s)
+
+def parseStart(s):
+    return int(s.split(',')[0][1:])
+
+def parseEnd(s):
+    return int(s.split(',')[1][:-1])
+
+def parseSites(s):
+    return [int(k) for k in s.split(',')] if s else []
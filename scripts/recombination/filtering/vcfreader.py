@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+# Streaming reader for the haploid VCFs written by matUtils extract.
+#
+# The sample columns are resolved once from the #CHROM header; each record
+# then yields its fixed fields (CHROM to FORMAT) and the genotypes of the
+# selected columns only.  When every genotype is a single character, as for
+# matUtils VCFs with fewer than ten alleles per site, the selected genotypes
+# are read straight out of the record bytes at their fixed offsets instead of
+# splitting the whole row; other records fall back to a split.  Gzipped VCFs
+# are detected from their magic number, so .vcf.gz files work unchanged.
+
+import gzip
+import numpy
+
+
+class VcfReader:
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            isGzip = (f.read(2) == b'\x1f\x8b')
+        self.f = gzip.open(path, 'rb') if isGzip else open(path, 'rb')
+        self.samples = []
+        self.firstRecord = None
+        for line in self.f:
+            if line.startswith(b'#CHROM'):
+                self.samples = [s.decode() for s in (line.strip()).split(b'\t')[9:]]
+                break
+            elif not line.startswith(b'#'):
+                self.firstRecord = line
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+    def records(self, columns):
+        """
+        Yield (fixed fields, genotypes) for each record, where genotypes is an
+        int16 array of the genotypes of the given sample columns (indices into
+        self.samples), in the given order.
+        """
+        columns = numpy.array(columns, dtype=numpy.int64)
+        offsets = 2*columns
+        rowLength = 2*len(self.samples)-1
+        if self.firstRecord is not None:
+            yield parseRecord(self.firstRecord, columns, offsets, rowLength)
+        for line in self.f:
+            if not line.startswith(b'#'):
+                yield parseRecord(line, columns, offsets, rowLength)
+
+
+def parseRecord(line, columns, offsets, rowLength):
+    splitLine = (line.strip()).split(b'\t', 9)
+    myFields = [s.decode() for s in splitLine[:9]]
+    myGTs = None
+    if len(splitLine) > 9:
+        rest = splitLine[9]
+        if len(rest) == rowLength:
+            myBytes = numpy.frombuffer(rest, dtype=numpy.uint8)
+            # Single-character genotypes, one tab apart
+            if (myBytes[1::2] == ord('\t')).all():
+                myGTs = myBytes[offsets].astype(numpy.int16)-ord('0')
+                if ((myGTs < 0) | (myGTs > 9)).any():
+                    myGTs = None
+        if myGTs is None:
+            splitRest = rest.split(b'\t')
+            myGTs = numpy.array([int(splitRest[i]) for i in columns.tolist()], dtype=numpy.int16)
+    else:
+        myGTs = numpy.zeros(0, dtype=numpy.int16)
+    return(myFields, myGTs)
@@ -0,0 +1,63 @@
+#!/bin/python3
+#
+# Asynchronous monitor for the jobs launched by run.py.
+#
+# Each pending job is polled on its own schedule: the interval between polls
+# starts at min_interval and grows by backoff (with some jitter) up to
+# max_interval, and a job is not polled again once it is done.  At most
+# max_concurrent polls (e.g. gcloud describe calls) run at once.  When a job
+# finishes, on_done(job) is called in a worker thread so that polling of the
+# other jobs continues; calls to on_done never overlap.  A job whose status
+# cannot be checked max_errors times in a row is given up on: it is marked
+# with job['failed'] = True and on_done is not called for it.
+import asyncio
+import random
+
+
+class JobMonitor:
+
+    def __init__(self, poll, max_concurrent=16, min_interval=1, max_interval=60, backoff=1.5, max_errors=10):
+        # poll: coroutine function taking a job and returning True once it is done
+        self.poll = poll
+        self.max_errors = max_errors
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def run(self, jobs, on_done=None):
+        """Wait for all jobs to finish, calling on_done(job) as each one does."""
+        asyncio.run(self.watch_all(jobs, on_done))
+
+    async def watch_all(self, jobs, on_done):
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.callback_lock = asyncio.Lock()
+        self.pending = len(jobs)
+        await asyncio.gather(*[self.watch(job, on_done) for job in jobs])
+
+    async def watch(self, job, on_done):
+        interval = self.min_interval
+        errors = 0
+        while True:
+            async with self.semaphore:
+                try:
+                    done = await self.poll(job)
+                    errors = 0
+                except Exception as e:
+                    errors += 1
+                    print("partition: {}, error checking status ({} of {}): {}".format(job['partition'], errors, self.max_errors, e))
+                    done = False
+            if done or errors >= self.max_errors:
+                break
+            await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+            interval = min(interval * self.backoff, self.max_interval)
+        self.pending -= 1
+        if not done:
+            job['failed'] = True
+            print("partition: {}, failed: could not check its status ({} jobs still running)".format(job['partition'], self.pending))
+            return
+        print("partition: {}, done: True ({} jobs still running)".format(job['partition'], self.pending))
+        if on_done is not None:
+            async with self.callback_lock:
+                # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+                await asyncio.get_running_loop().run_in_executor(None, on_done, job)
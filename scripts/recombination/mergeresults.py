@@ -0,0 +1,48 @@
+#!/bin/python3
+#
+# K-way merge of the final_recombinants.txt files of all partitions.
+#
+# As each partition finishes, run.py sorts its final recombinants by trio
+# (recomb node id, donor node id, acceptor node id) into a small run file.
+# merge_runs() then streams all run files through heapq.merge into
+# recombinants_<date>.txt in one pass, dropping trios already written by an
+# earlier partition.
+import heapq
+import os
+
+
+def trio_key(line):
+    fields = line.split('\t', 7)
+    return (int(fields[0]), int(fields[3]), int(fields[6]))
+
+def run_start(path):
+    """Start of the long branch range of a run file named <start>_<end>.txt, for ordering runs by partition."""
+    return int(os.path.basename(path).split('_', 1)[0])
+
+def write_sorted_run(lines, path):
+    rows = [line if line.endswith('\n') else line + '\n' for line in lines if line.strip()]
+    rows.sort(key=trio_key)
+    with open(path, 'w') as f:
+        f.writelines(rows)
+    return len(rows)
+
+def merge_runs(paths, out):
+    """Merge sorted run files into the open file out; return (trios written, duplicates dropped)."""
+    files = [open(path) for path in paths]
+    written = 0
+    duplicates = 0
+    last = None
+    try:
+        # heapq.merge is stable, so of equal trios the one from the earliest run is kept
+        for line in heapq.merge(*files, key=trio_key):
+            key = trio_key(line)
+            if key == last:
+                duplicates += 1
+                continue
+            out.write(line)
+            last = key
+            written += 1
+    finally:
+        for f in files:
+            f.close()
+    return written, duplicates
@@ -1,6 +1,7 @@
 #!/bin/python3
 #
-# Script to run ripples and filtration pipeline on remote GCP machine.
+# Script to run ripples and filtration pipeline on remote GCP machine,
+# or in a local working directory set up by executors.LocalExecutor.
 
 import time
 import random
@@ -18,10 +19,12 @@ end_range = sys.argv[4]
 # Subdir within "results" directory to place results
 out = sys.argv[5]
 bucket_id = sys.argv[6]
-# Remote GCP Storage Bucket location to put end results
+# Remote GCP Storage Bucket location (or local directory) to put end results
 results = sys.argv[7]
 reference = sys.argv[8]
 raw_sequences = sys.argv[9]
+# CPU budget for this job, set by LocalExecutor; ripples uses all cores by default
+threads = os.environ.get("RIPPLES_THREADS")
 
 pipeline_dir = os.getcwd()
 
@@ -32,6 +35,8 @@ def parse_ripples_command(version, mat, start, end):
     # Expecting ripples output (recombination.txt and descendents.txt)
     # in recombination/filtering to start this pipeline
     command = [version, "-i", mat, "-n", "2", "-S", start, "-E", end, "-d", "filtering/data"]
+    if threads:
+        command += ["-T", threads]
     return command
 
 # Check starting directory is correct
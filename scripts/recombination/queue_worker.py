@@ -0,0 +1,66 @@
+#!/bin/python3
+#
+# Work-queue worker: claim long branch chunks from a WorkQueue and run
+# process.py on each one until the queue is empty.
+#
+# python3 queue_worker.py <queue.db> <worker> <version> <tree.pb> <bucket_id> <results> <reference> <raw_sequences>
+import sys
+import os
+import shutil
+import subprocess
+from workqueue import WorkQueue
+
+queue_path = sys.argv[1]
+worker = sys.argv[2]
+version, mat, bucket_id, results, reference, raw_sequences = sys.argv[3:9]
+
+def clean(directory):
+    # Remove a directory of the previous chunk; a symlink is removed itself,
+    # never the shared directory it points to
+    if os.path.islink(directory):
+        os.unlink(directory)
+    elif os.path.exists(directory):
+        shutil.rmtree(directory)
+
+queue = WorkQueue(queue_path)
+while True:
+    chunk = queue.claim(worker)
+    if chunk is None:
+        break
+    start, end = str(chunk[0]), str(chunk[1])
+    print("{}: running chunk {}-{}".format(worker, start, end), flush=True)
+
+    # Each chunk starts from a clean pipeline directory
+    for directory in ["filtering/data", "filtering/fastas", "results"]:
+        clean(directory)
+    os.makedirs("filtering/data")
+    os.makedirs("results")
+    # and without the output of an earlier attempt at it
+    out = "{}_{}".format(start, end)
+    if not results.startswith("gs://"):
+        clean(os.path.join(results, out))
+
+    command = ["python3", "process.py", version, mat, start, end, out,
+            bucket_id, results, reference, raw_sequences]
+    proc = subprocess.Popen(command)
+    # Renew the lease on the chunk while it runs, so that it is only taken
+    # back from a worker that is gone
+    while True:
+        try:
+            returncode = proc.wait(timeout=queue.lease / 10)
+            break
+        except subprocess.TimeoutExpired:
+            if not queue.renew(chunk, worker):
+                # Another worker has taken the chunk over and now owns its output
+                print("{}: lost the lease on chunk {}-{}".format(worker, start, end), flush=True)
+                proc.kill()
+                proc.wait()
+                returncode = None
+                break
+    if returncode is None:
+        continue
+    if returncode == 0 and os.path.exists("{}/{}/final_recombinants.txt".format(results, out)):
+        queue.complete(chunk, worker)
+    else:
+        print("{}: chunk {}-{} failed".format(worker, start, end), flush=True)
+        queue.fail(chunk, worker)
@@ -1,6 +1,7 @@
 #!/bin/python3
 #
-# Launch script to run parallel ripples jobs on GCP
+# Launch script to run parallel ripples jobs on GCP, or on the local machine
+# with 'executor: local' in ripples.yaml
 import subprocess
 import sys
 import time
@@ -12,6 +13,11 @@ import json
 import time
 import datetime
 import yaml
+import bisect
+from executors import GCPExecutor, LocalExecutor
+from workqueue import WorkQueue, get_chunks
+from jobmonitor import JobMonitor
+from mergeresults import write_sorted_run, merge_runs, run_start
 
 
 def get_config():
@@ -39,6 +45,51 @@ def get_partitions(long_branches, instances):
         k += per_instance + 1
     return partitions
 
+def load_branch_costs(filename, long_branches):
+    # Each line: <start> <end> <cost> for the long branch index range [start, end),
+    # e.g. descendant counts per branch or partition_costs_<date>.tsv from a previous run.
+    # The cost of a range is spread evenly over its indices; indices not covered
+    # by the file get the mean cost of the covered ones.
+    costs = [None] * long_branches
+    with open(filename) as f:
+      for line in f:
+        fields = line.split()
+        if len(fields) != 3 or not fields[0].isdigit():
+          continue
+        start, end, cost = int(fields[0]), int(fields[1]), float(fields[2])
+        if end <= start:
+          continue
+        for i in range(start, min(end, long_branches)):
+          costs[i] = cost / (end - start)
+    known = [c for c in costs if c is not None]
+    mean = sum(known) / len(known) if known else 1.0
+    return [mean if c is None else c for c in costs]
+
+def get_weighted_partitions(costs, instances):
+    # Cut long branch indices [0, len(costs)) into contiguous, half-open ranges
+    # of roughly equal total cost, one per instance (ripples -E is exclusive).
+    long_branches = len(costs)
+    instances = max(1, min(instances, long_branches))
+    prefix = [0.0]
+    for c in costs:
+      prefix.append(prefix[-1] + c)
+    total = prefix[-1]
+    partitions = []
+    start = 0
+    for i in range(1, instances):
+      target = total * i / instances
+      end = bisect.bisect_left(prefix, target)
+      # Take the cut point whose cumulative cost is closest to the target
+      if end > 0 and target - prefix[end-1] < prefix[end] - target:
+        end -= 1
+      # Leave at least one branch for this and every remaining partition
+      end = max(end, start + 1)
+      end = min(end, long_branches - (instances - i))
+      partitions.append((start, end))
+      start = end
+    partitions.append((start, long_branches))
+    return partitions
+
 def convert(n):
     return str(datetime.timedelta(seconds = n))
 
@@ -47,55 +98,36 @@ def parse_command(mat, start, end, out):
             mat, start, end, out, bucket_id, results, reference, raw_sequences)
     return command
 
+def parse_worker_command(queue_path, worker):
+    command = "python3 queue_worker.py {} {} {} {} {} {} {} {}".format(queue_path, worker,
+            version, mat, bucket_id, results, reference, raw_sequences)
+    return command
+
 # Takes in .gz newick and metadata 
 def parse_chron_command(newick, metadata, steps):
     comand = "chronumental --tree {} --dates {} --steps {}".format(newick, metadata, steps)
     return command
 
-def gcloud_run(command):
-    cmd = ["gcloud", "beta", "lifesciences", "pipelines", "run",
-        "--location", "us-central1",
-        "--regions", "us-central1",
-        "--machine-type", machine_type, 
-        "--boot-disk-size", boot_disk_size,
-        "--logging", logging,
-        "--docker-image", docker_image,
-        "--command-line", command,
-        #"--outputs", results,
-        "--format=json"]
-
-    print(" ".join(cmd))
-    out = subprocess.check_output(cmd)
-    result = json.loads(out)
-    name = result['name']
-    id = re.search("operations\/(\d+)", name).groups()[0]
-    return {'operation_id': id, 'result': result}
-
-def gcloud_describe(operation_id):
-     cmd = ["gcloud", "beta", "lifesciences",
-            "operations", "describe", "--format=json", operation_id]
-     out = subprocess.check_output(cmd)
-     result = json.loads(out)
-     done = 'done' in result and result['done'] == True
-     return {'done': done, 'result': result}
-
 # Configs and credentials from yaml
 config = get_config()
 
+# Backend to run partitions on: "gcp" (default) or "local"
+executor_type = config.get("executor") or "gcp"
+if executor_type not in ("gcp", "local"):
+    print("Check ripples.yaml file configuration for executor. Use 'gcp' or 'local'.")
+    exit(1)
+
 # Authenticate GCP account
 bucket_id = config["bucket_id"]
 project_id = config["project_id"]  
 key_file = config["key_file"]
 
 # Activate credentials for GCP Console and gcloud util
-auth()
+if executor_type == "gcp":
+  auth()
 
 # Set ripples job config options
-docker_image = "mrkylesmith/ripples_pipeline:latest"
-boot_disk_size = str(config["boot_disk_size"])
-instances = config["instances"] # Number of remote machines to parallelize ripples across 
-machine_type = config["machine_type"]
-logging = "gs://{}/logging/{}".format(bucket_id, config["logging"])
+instances = config["instances"] # Number of partitions (remote machines or local jobs) to parallelize ripples across 
 version = config["version"]
 mat = config["mat"]
 newick = config["newick"]
@@ -109,6 +141,22 @@ num_descendants = config["num_descendants"]
 #NOTE: Make sure this folder is created in Storage bucket ahead of time.
 results = "gs://{}/{}".format(bucket_id, config["results"])
 
+if executor_type == "local":
+  # Run partitions here, with up to local_cores CPUs split into cpus_per_job per partition
+  local_cores = config.get("local_cores") or os.cpu_count()
+  cpus_per_job = config.get("cpus_per_job") or max(1, local_cores // instances)
+  executor = LocalExecutor(local_cores, cpus_per_job, private=[config["results"]])
+  results = executor.results
+else:
+  executor = GCPExecutor(config, results)
+
+# Optional work-queue mode: cut the long branches into chunks of chunk_size
+# that workers claim from a shared queue, instead of one partition per instance
+chunk_size = config.get("chunk_size")
+if chunk_size and executor_type != "local":
+    print("Check ripples.yaml file configuration for chunk_size. The work queue is only supported with 'executor: local'.")
+    exit(1)
+
 # Copy over protobuf from GCP storage bucket to local container
 current = str(os.getcwd())
 if not os.path.isfile("{}/{}".format(current,mat)):
@@ -138,41 +186,29 @@ print("Found {} long branches in {} to split across {} instances (number of inst
 # Num of long branches to search per instance
 branches_per_instance = long_branches//instances        
 
-partitions = get_partitions(long_branches, instances)
-print("long branches: {}, instances: {}, branches_per_instance: {}".format(long_branches, instances, branches_per_instance))
-print("partitions: {}".format(partitions))
-
-
-processes = []
-completed = []
-for partition in partitions:
-
-    start = str(partition[0])
-    end = str(partition[1])
-    out = "{}_{}".format(start, end)
+# Optional per-branch cost estimates to balance partitions by cost instead of by count
+branch_costs = config.get("branch_costs")
+if chunk_size:
+  num_chunks = -(-long_branches // chunk_size)
+  if branch_costs:
+    print("Balancing chunks by branch costs in {}.".format(branch_costs))
+    chunks = get_weighted_partitions(load_branch_costs(branch_costs, long_branches), num_chunks)
+  else:
+    chunks = get_chunks([(0, long_branches)], chunk_size)
+  queue = WorkQueue(executor.workdir + "/queue.db")
+  queue.fill(chunks)
+  # One queue worker per instance
+  partitions = [("worker", i) for i in range(instances)]
+  print("long branches: {}, instances: {}, chunks: {}".format(long_branches, instances, len(chunks)))
+elif branch_costs:
+  print("Balancing partitions by branch costs in {}.".format(branch_costs))
+  partitions = get_weighted_partitions(load_branch_costs(branch_costs, long_branches), instances)
+else:
+  partitions = get_partitions(long_branches, instances)
+if not chunk_size:
+  print("long branches: {}, instances: {}, branches_per_instance: {}".format(long_branches, instances, branches_per_instance))
+  print("partitions: {}".format(partitions))
 
-    # The following command gets executed on remote machine: 
-    # python3 process.py <version> <tree.pb> <start> <end> <bucket_id> <output_dir> <reference> <raw_sequences>
-    command = parse_command(mat, start, end, out)
-
-    info = gcloud_run(command)
-    processes.append({'partition': partition, 'operation_id': info['operation_id']})
-    completed.append(False)
-
-while not all(completed):
-   i = 0
-   for process in processes:
-     partition = process['partition']
-     operation_id = process['operation_id']
-     info = gcloud_describe(operation_id)
-     done = info['done']
-     if done:
-       completed[i] = True
-     print("partition: {}, operation_id: {}, done: {}".format(partition, operation_id, done))
-     i+=1
-   time.sleep(1)
-
-print("All instance jobs have finished.  Aggregating results from remote machines.")
 
 current = str(os.getcwd())
 
@@ -180,7 +216,7 @@ local_results = current + "/{}".format(config["results"])
 # Create local output directory 
 subprocess.run(["mkdir", "-p", local_results])
 
-# Create local temporary directory to copy remote results and aggregate 
+# Create local temporary directory for the sorted final recombinants of each partition
 temp = current + "/merge_results/"
 subprocess.run(["mkdir", "-p", temp])
 
@@ -189,38 +225,89 @@ if (os.path.isdir(temp) == False):
     print("Local results directory not created. Check naming error")
     raise FileNotFoundError
 
-# Copy over all subdirectories from GCP Bucket to local temp directory
-remote_results = "gs://{}/{}/*".format(bucket_id, config["results"])
-subprocess.run(["gsutil", "cp", "-r", remote_results, temp])
-
-# File to aggregate all detected recombination events
-recombinants = open(local_results + "/recombinants_{}.txt".format(date), "w")
+# File to aggregate all unfiltered recombination events, appended to as partitions finish
 unfiltered_recombinants = open(local_results + "/unfiltered_recombinants_{}.txt".format(date), "w")
+sorted_runs = []
+
+def aggregate(out):
+    # Stream the results of one finished partition (or chunk) from its results subdirectory
+    print("Aggregating results of partition: {}".format(out))
+    for line in executor.read_result(out, "recombination.tsv"):
+      # One detected recombinant per line, aggregate all lines in each file
+      unfiltered_recombinants.write(line)
+    # Final recombinants are sorted by trio here and k-way merged once all partitions are done
+    run_file = temp + out + ".txt"
+    write_sorted_run(executor.read_result(out, "final_recombinants.txt"), run_file)
+    sorted_runs.append(run_file)
+
+def on_done(process):
+    process['runtime'] = executor.runtime(process)
+    if chunk_size:
+      # Aggregate the chunks this worker finished
+      print("chunks: {}".format(queue.counts()))
+      for start, end, runtime in queue.runtimes():
+        out = "{}_{}".format(start, end)
+        if temp + out + ".txt" not in sorted_runs:
+          aggregate(out)
+      return
+    aggregate("{}_{}".format(process['partition'][0], process['partition'][1]))
+
+processes = []
+for partition in partitions:
+
+    start = str(partition[0])
+    end = str(partition[1])
+    out = "{}_{}".format(start, end)
+
+    # The following command gets executed on remote machine (or locally): 
+    # python3 process.py <version> <tree.pb> <start> <end> <bucket_id> <output_dir> <reference> <raw_sequences>
+    if chunk_size:
+      command = parse_worker_command(queue.path, out)
+    else:
+      command = parse_command(mat, start, end, out)
+
+    process = executor.submit(partition, command)
+    process['runtime'] = None
+    processes.append(process)
+
+# Poll only the jobs still running, with at most poll_concurrency status checks at once,
+# backing off from 1 second up to poll_max_interval seconds between checks of a job,
+# and giving up on a job after poll_max_errors failed checks in a row
+monitor = JobMonitor(executor.poll, max_concurrent=config.get("poll_concurrency") or 16,
+                     max_interval=config.get("poll_max_interval") or 60,
+                     max_errors=config.get("poll_max_errors") or 10)
+monitor.run(processes, on_done)
+lost = [process['partition'] for process in processes if process.get('failed')]
+if lost:
+    print("WARNING: gave up on {} jobs whose status could not be checked: {}".format(len(lost), lost))
+
+print("All instance jobs have finished.")
 
-# Aggregate the results from all remote machines and combine into one final file in 'results/' dir
-for directory in os.listdir(temp):
-    subdir = temp + directory 
-    print("SUBDIR: ", subdir)
-    # Guarantee to be only 2 files in each subdirectory
-    files = os.listdir(subdir)
-    for file in files:
-      # Skip over descendents.tsv files for aggregating recombination events
-      if "final_recombinants.txt" in file:
-        f1 = open(subdir + "/" +  file, "r")
-        for line in f1:
-          # One detected recombinant per line, aggregate all lines in each file
-          recombinants.write(line)
-        f1.close()
-      if "recombination.tsv" in file:
-        f2 = open(subdir + "/" +  file, "r")
-        for line in f2:
-          # One detected recombinant per line, aggregate all lines in each file
-          unfiltered_recombinants.write(line)
-        f2.close()
-recombinants.close()
 unfiltered_recombinants.close()
 
+# Merge the sorted final recombinants of all partitions in one pass, in
+# partition order, dropping trios found by more than one partition
+recombinants = open(local_results + "/recombinants_{}.txt".format(date), "w")
+written, duplicates = merge_runs(sorted(sorted_runs, key=run_start), recombinants)
+recombinants.close()
+print("{} recombinants written, {} duplicate trios removed.".format(written, duplicates))
+
 # Remove temp directory 
 subprocess.run(["rm", "-r", temp])
 
+# Measured runtime of each partition (or chunk), usable as 'branch_costs' for the next run
+if chunk_size:
+  runtimes = queue.runtimes()
+  # Every worker has exited: chunks still pending or claimed were never finished
+  unfinished = queue.unfinished()
+  if unfinished:
+    print("WARNING: {} chunks are not done ({}), their long branches are missing from the results; "
+          "see {}/queue.db and the worker logs.".format(len(unfinished),
+          ", ".join("{}-{} {}".format(start, end, status) for start, end, status in unfinished), executor.workdir))
+else:
+  runtimes = [(process['partition'][0], process['partition'][1], process['runtime']) for process in processes if not process.get('failed')]
+with open(local_results + "/partition_costs_{}.tsv".format(date), "w") as costs_file:
+  for start, end, runtime in runtimes:
+    costs_file.write("{}\t{}\t{:.0f}\n".format(start, end, runtime))
+
 print("Final recombination event results written to {}/recombinants_{}.txt".format(local_results,date))
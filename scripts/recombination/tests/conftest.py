@@ -0,0 +1,11 @@
+# Tests of the recombination scripts, run from scripts/recombination:
+#
+#   python3 -m pytest tests
+#
+# The scripts import their siblings, so both directories are on sys.path.
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', 'filtering'))
@@ -0,0 +1,186 @@
+import os
+import sys
+import random
+import shutil
+import subprocess
+import pytest
+import checkmutant
+
+FILTERING = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'filtering')
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def reportRow(**kwargs):
+    # A checked row that passes the QC filters
+    myRow = [100, 101, 102, True, False, False, False, 0.1, 0.2, 0.3,
+            False, 0, 0, False, 2, 150, 'recomb', 0, False, 3, 200, False,
+            '(50,60)', '(400,410)', 10, 10, 3, 27]
+    for k, v in kwargs.items():
+        myRow[int(k[1:])] = v
+    return myRow
+
+def oldFinalReport(reportText):
+    # generate_report.sh's awk '$19 == "False"' | awk '$14 == "False"' | awk '$11 == "False"'
+    return [line for line in reportText.splitlines(True) if len(line.split()) > 18 and
+            line.split()[18] == 'False' and line.split()[13] == 'False' and line.split()[10] == 'False']
+
+def test_final_report_kept():
+    assert checkmutant.final_report_kept(reportRow())
+    assert not checkmutant.final_report_kept(reportRow(c10=True))
+    assert not checkmutant.final_report_kept(reportRow(c13=True))
+    assert not checkmutant.final_report_kept(reportRow(c18=True))
+    # An empty column shifts the awk fields, which left the row out
+    assert not checkmutant.final_report_kept(reportRow(c16=''))
+    assert not checkmutant.final_report_kept(reportRow(c16=None, c18=None))
+
+def test_report_writer_final_report_matches_awk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('filtering/data')
+    shutil.copy(os.path.join(FILTERING, 'empty_report.txt'), 'filtering/empty_report.txt')
+    myRows = [(True, reportRow()), (True, reportRow(c13=True)), (True, reportRow(c16='')),
+            (True, reportRow(c0=103, c16='donor')), (False, [104, 105, 106] + [None]*23 + [28, 'Missing all recomb samples'])]
+    myWriter = checkmutant.ReportWriter()
+    for checked, row in myRows:
+        myWriter.write(checked, row)
+    myWriter.close()
+    with open('filtering/data/report.txt') as f:
+        myReport = f.read()
+    with open('filtering/data/final_report.txt') as f:
+        myFinal = f.read()
+    assert len(myReport.splitlines()) == len(myRows) + 1
+    assert myFinal.splitlines(True) == oldFinalReport(myReport)
+    assert [line.split('\t')[0] for line in myFinal.splitlines()] == ['100', '103']
+
+TRIO_HEADER = ('#recomb_node_id\tbreakpoint-1_interval\tbreakpoint-2_interval\tdonor_node_id\tdonor_is_sibling\t'
+        'donor_parsimony\tacceptor_node_id\tacceptor_is_sibling\tacceptor_parsimony\toriginal_parsimony\t'
+        'min_starting_parsimony\trecomb_parsimony\trob_pval\truss_pval\tdescendants\n')
+
+def writeTrios(directory, seed):
+    """
+    Writes the checkmutant.py inputs of a few random trios under directory:
+    mutations clumped within 20 bases, informative sites clumps, gaps in the
+    reference and deletions and Ns next to mutations, and samples missing
+    from the alignment.  Returns the number of trios.
+    """
+    myRandom = random.Random(seed)
+    os.makedirs(os.path.join(directory, 'filtering', 'data'))
+    os.makedirs(os.path.join(directory, 'filtering', 'fastas', 'AlignedRecombs'))
+    shutil.copy(os.path.join(FILTERING, 'empty_report.txt'), os.path.join(directory, 'filtering', 'empty_report.txt'))
+    myLength = myRandom.choice([300, 600, 1000])
+    myReference = ''.join(myRandom.choice('acgt') for _ in range(myLength))
+    myTrios = myRandom.randint(1, 5)
+    myRows, mySampleInfo, myInfSites = [], ['node\tsamples\tmuts\n'], []
+    for t in range(myTrios):
+        myNodes = (100+3*t, 101+3*t, 102+3*t)
+        b1 = myRandom.randint(50, myLength//3)
+        b2 = myRandom.randint(myLength//2, myLength-50)
+        # Distinct parsimony changes, so that trio t has rank t
+        myRows.append('%d\t(%d,%d)\t(%d,%d)\t%d\tn\t3\t%d\tn\t3\t10\t10\t%d\t0.01\t0.02\tS%d\n' % (myNodes[0],
+                b1, b1+myRandom.randint(0, 20), b2, b2+myRandom.randint(0, 20), myNodes[1], myNodes[2], t+1, myNodes[0]))
+        myMutations, mySamples = {}, {}
+        for n in myNodes:
+            mySites = [myRandom.randint(55, myLength-55) for _ in range(myRandom.randint(1, 6))]
+            if myRandom.random() < 0.3:
+                mySites += [mySites[0]+myRandom.randint(-10, 10) for _ in range(myRandom.randint(3, 8))]
+            myMutations[n] = sorted(set(mySites))
+            mySamples[n] = myRandom.randint(1, 4)
+            mySampleInfo.append('%d\t%s\t%s\n' % (n, ','.join('s%d_%d' % (n, j) for j in range(mySamples[n])),
+                    ','.join(str(x) for x in myMutations[n])))
+        if myRandom.random() < 0.7:
+            mySites = [myRandom.randint(55, myLength-55) for _ in range(myRandom.randint(1, 15))]
+            if myRandom.random() < 0.4:
+                mySites += [mySites[0]+myRandom.randint(1, 15) for _ in range(8)]
+            myInfSites.append('%d\t%d\t%d\tx\tx\tx\tx\t%s\n' % (myNodes + (','.join(str(x) for x in sorted(set(mySites))),)))
+
+        # The reference with gaps, some right next to mutations
+        mySites = sorted(set(x for n in myNodes for x in myMutations[n]))
+        myGaps = {}
+        for _ in range(myRandom.randint(0, 6)):
+            if mySites and myRandom.random() < 0.5:
+                p = myRandom.choice(mySites) + myRandom.randint(-3, 3)
+            else:
+                p = myRandom.randint(0, myLength)
+            myGaps[p] = myRandom.randint(1, 4)
+        myColumns = []
+        for p in range(myLength+1):
+            myColumns += ['-'] * myGaps.get(p, 0)
+            if p < myLength:
+                myColumns.append(p)
+        myRecords = [('reference', ''.join('-' if c == '-' else myReference[c] for c in myColumns))]
+        for n in myNodes:
+            # The node's sequence: its mutations, and deletions and Ns, most
+            # of them at or near a mutation, some long enough to cover it
+            myNode = []
+            for c in myColumns:
+                if c == '-':
+                    myNode.append(myRandom.choice('a-----'))
+                elif c+1 in myMutations[n]:
+                    myNode.append(myRandom.choice([b for b in 'acgt' if b != myReference[c]]))
+                else:
+                    myNode.append(myReference[c])
+            for _ in range(myRandom.choice([0, 0, 1, 2])):
+                myChar = myRandom.choice('--n')
+                if myRandom.random() < 0.5:
+                    myColumn = myColumns.index(myRandom.choice(mySites)-1) + myRandom.randint(-6, 3)
+                else:
+                    myColumn = myRandom.randint(0, len(myColumns)-7)
+                myEnd = myColumn + myRandom.choice([myRandom.randint(1, 6), myRandom.randint(10, 16)])
+                for q in range(max(0, myColumn), min(len(myColumns), myEnd)):
+                    myNode[q] = myChar
+            # Its samples, each with a few changes of its own; some are not aligned
+            for j in range(mySamples[n]):
+                if myRandom.random() < 0.15:
+                    continue
+                mySequence = [myRandom.choice('acgtn-') if myRandom.random() < 0.002 else b for b in myNode]
+                if myRandom.random() < 0.3:
+                    myColumn = myRandom.randint(0, len(myColumns)-7)
+                    myDeletion = myRandom.randint(1, 6)
+                    mySequence[myColumn:myColumn+myDeletion] = '-' * myDeletion
+                myRecords.append(('s%d_%d' % (n, j), ''.join(mySequence)))
+        myRecords[1:] = myRandom.sample(myRecords[1:], len(myRecords)-1)
+        myWidth = myRandom.choice([60, len(myColumns)])
+        with open(os.path.join(directory, 'filtering', 'fastas', 'AlignedRecombs', '%d.fa' % t), 'w') as f:
+            for name, sequence in myRecords:
+                f.write('>' + name + '\n')
+                for k in range(0, len(sequence), myWidth):
+                    f.write(sequence[k:k+myWidth] + '\n')
+    with open(os.path.join(directory, 'filtering', 'data', 'combinedCatOnlyBestWithPVals.txt'), 'w') as f:
+        f.write(TRIO_HEADER + ''.join(myRows))
+    with open(os.path.join(directory, 'filtering', 'data', 'sampleInfo.txt'), 'w') as f:
+        f.write(''.join(mySampleInfo))
+    with open(os.path.join(directory, 'filtering', 'data', 'allRelevantNodesInfSites.txt'), 'w') as f:
+        f.write(''.join(myInfSites))
+    return myTrios
+
+def runEach(script, directory, trios):
+    # Check the trios one process each, as generate_report.sh did, into a fresh report.txt
+    shutil.copy(os.path.join(directory, 'filtering', 'empty_report.txt'), os.path.join(directory, 'filtering', 'data', 'report.txt'))
+    myOutput = ''
+    for i in range(trios):
+        myOutput += subprocess.run([sys.executable, script, str(i), '-r'], cwd=directory,
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+    with open(os.path.join(directory, 'filtering', 'data', 'report.txt')) as f:
+        return myOutput, f.read()
+
+def reportLines(reportText):
+    # The old rows end in a tab
+    return [line.rstrip('\t') for line in reportText.splitlines()]
+
+@pytest.mark.parametrize('seed', range(20))
+def test_checkmutant_matches_baseline(tmp_path, seed):
+    myDirectory = str(tmp_path)
+    myTrios = writeTrios(myDirectory, seed)
+    myOldOutput, myOldReport = runEach(os.path.join(DATA, 'checkmutant_baseline.py'), myDirectory, myTrios)
+    myOutput, myReport = runEach(os.path.join(FILTERING, 'checkmutant.py'), myDirectory, myTrios)
+    assert myOutput == myOldOutput
+    assert reportLines(myReport) == reportLines(myOldReport)
+
+    # A batch with two workers prints and reports the trios as the one process per trio runs did
+    myBatch = subprocess.run([sys.executable, os.path.join(FILTERING, 'checkmutant.py'), '--batch', '-j', '2', '-r'],
+            cwd=myDirectory, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    assert myBatch.returncode == 0
+    assert myBatch.stdout == myOldOutput
+    with open(os.path.join(myDirectory, 'filtering', 'data', 'report.txt')) as f:
+        assert reportLines(f.read()) == reportLines(myOldReport)
+    with open(os.path.join(myDirectory, 'filtering', 'data', 'final_report.txt')) as f:
+        assert reportLines(f.read()) == reportLines(''.join(oldFinalReport(myOldReport)))
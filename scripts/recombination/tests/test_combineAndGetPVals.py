@@ -0,0 +1,69 @@
+import random
+from combineAndGetPVals import combineBreakpoints, joiner, toInt
+
+
+def oldCombine(r, lines):
+    # One round of the original pairwise combining loop, for recombinant r
+    keyToCombinedLines = {}
+    keyToIndices = {}
+    indicesToKeys = {}
+    for i in range(0,len(lines)):
+        justCombined = False
+        for j in range(i,len(lines)):
+            myKey = str(r)+'_'+str(i)+'_'+str(j)
+            l1 = lines[i]
+            keyToCombinedLines[str(r)+'_'+str(i)] = l1
+            keyToIndices[str(r)+'_'+str(i)] = [i]
+            l2 = lines[j]
+            keyToCombinedLines[str(r)+'_'+str(j)] = l2
+            keyToIndices[str(r)+'_'+str(j)] = [j]
+            if justCombined == True:
+                l1 = keyToCombinedLines[prevKey]
+                myKey = prevKey+'_'+str(j)
+            if l1[3:] == l2[3:]:
+                bp1a = toInt(l1[1][1:-1].split(','))
+                bp1b = toInt(l1[2][1:-1].split(','))
+                bp2a = toInt(l2[1][1:-1].split(','))
+                bp2b = toInt(l2[2][1:-1].split(','))
+                if (bp2a[0] >= bp1a[0] and bp2a[0] <= bp1a[1]+1) and (bp2b[0] >= bp1b[0] and bp2b[0] <= bp1b[1]+1):
+                    newBP1 = '('+str(min(bp1a[0],bp2a[0]))+','+str(max(bp1a[1],bp2a[1]))+')'
+                    newBP2 = '('+str(min(bp1b[0],bp2b[0]))+','+str(max(bp1b[1],bp2b[1]))+')'
+                    keyToCombinedLines[myKey] = l1[:1]+[newBP1,newBP2]+l1[3:]
+                    keyToIndices[myKey] = []
+                    for ind in myKey.split('_')[1:]:
+                        keyToIndices[myKey].append(int(ind))
+                    justCombined = True
+                    prevKey = myKey
+                else:
+                    justCombined = False
+    alreadyPrinted = {}
+    myKeepKeys = {}
+    for k in sorted(keyToIndices, key=lambda k: len(keyToIndices[k]), reverse=True):
+        keep = True
+        for ind in keyToIndices[k]:
+            if ind in alreadyPrinted:
+                keep = False
+        if keep == True:
+            myKeepKeys[k] = [str(keyToCombinedLines[k][3]), str(keyToCombinedLines[k][6]), int(keyToCombinedLines[k][1][1:-1].split(',')[0]), int(keyToCombinedLines[k][2][1:-1].split(',')[0])]
+            for ind in keyToIndices[k]:
+                alreadyPrinted[ind] = True
+    return [keyToCombinedLines[k] for k in sorted(myKeepKeys, key=lambda k: tuple(myKeepKeys[k]))]
+
+def randomLines(myRandom, r):
+    myLines = []
+    for i in range(myRandom.randrange(1, 25)):
+        a = myRandom.randrange(0, 40)
+        b = myRandom.randrange(50, 90)
+        myLines.append([r, '(%d,%d)' % (a, a+myRandom.randrange(0, 8)), '(%d,%d)' % (b, b+myRandom.randrange(0, 8)),
+                        myRandom.choice(['5', '6']), 'n', '3', myRandom.choice(['7', '8']), 'n', '3', '12', '12', '8'])
+    if myRandom.random() < 0.5:
+        # Sorted breakpoint starts take the early exit
+        myLines.sort(key=lambda l: int(l[1][1:-1].split(',')[0]))
+    return myLines
+
+def test_combine_breakpoints_matches_pairwise_loop():
+    myRandom = random.Random(8)
+    for r in range(400):
+        myLines = randomLines(myRandom, str(r))
+        assert [joiner(l) for l in combineBreakpoints(myLines)] == [joiner(l) for l in oldCombine(str(r), myLines)], r
+
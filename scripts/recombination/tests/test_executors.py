@@ -0,0 +1,36 @@
+import os
+import sys
+import executors
+from executors import LocalExecutor
+
+AFFINITY = "import os; print(' '.join(str(cpu) for cpu in sorted(os.sched_getaffinity(0))))"
+
+
+def runPinned(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('filtering')
+    myCpus = sorted(os.sched_getaffinity(0))
+    myExecutor = LocalExecutor(cores=len(myCpus), cpus_per_job=1, workdir='runs')
+    myCommand = '{} -c "{}"'.format(sys.executable, AFFINITY)
+    myJobs = [myExecutor.submit((i, i+1), myCommand) for i in range(2)]
+    myExecutor.pool.shutdown()
+    myPinned = []
+    for job in myJobs:
+        assert job['future'].result() == 0
+        with open(os.path.join(job['rundir'], 'ripples.log')) as f:
+            myPinned.append([int(cpu) for cpu in f.read().split()])
+    return myCpus, myPinned
+
+def test_jobs_pinned_to_their_cpus(tmp_path, monkeypatch):
+    myCpus, myPinned = runPinned(tmp_path, monkeypatch)
+    for pinned in myPinned:
+        assert len(pinned) == 1 and pinned[0] in myCpus
+    if len(myCpus) > 1:
+        assert myPinned[0] != myPinned[1]
+
+def test_jobs_pinned_without_taskset(tmp_path, monkeypatch):
+    monkeypatch.setattr(executors.shutil, 'which', lambda name: None)
+    myCpus, myPinned = runPinned(tmp_path, monkeypatch)
+    # Pinned once started, so the command only sees its CPU set
+    for pinned in myPinned:
+        assert len(pinned) == 1 and pinned[0] in myCpus
@@ -0,0 +1,103 @@
+import gzip
+import os
+import random
+import struct
+import zlib
+import pytest
+import fastaindex
+
+
+def sequentialRecords(data):
+    """(header, sequence) of each record, parsing the whole file in order."""
+    myRecords = []
+    for line in data.split(b'\n'):
+        line = line.rstrip(b'\r')
+        if line.startswith(b'>'):
+            myRecords.append([line[1:].decode(), ''])
+        elif myRecords:
+            myRecords[-1][1] += line.decode()
+    return [tuple(r) for r in myRecords]
+
+def randomFasta(myRandom, newline=b'\n'):
+    myData = b''
+    for i in range(60):
+        # Repeated names and names with spaces, as in GISAID exports
+        myName = 'hCoV-19/s%d/2021 |EPI_%d' % (myRandom.randrange(40), i)
+        mySeq = ''.join(myRandom.choice('ACGTN') for k in range(myRandom.randrange(0, 300)))
+        myWidth = myRandom.choice([60, 70, 1000])
+        myData += b'>'+myName.encode()+newline
+        for k in range(0, len(mySeq), myWidth):
+            myData += mySeq[k:k+myWidth].encode()+newline
+    return myData
+
+def bgzip(data, blockSize=1000):
+    # BGZF blocks: gzip members with a BC extra field holding the block size, then an empty end block
+    myOut = b''
+    for i in list(range(0, len(data), blockSize))+[len(data)]:
+        myChunk = data[i:i+blockSize]
+        c = zlib.compressobj(6, zlib.DEFLATED, -15)
+        myCompressed = c.compress(myChunk)+c.flush()
+        myOut += (b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'+struct.pack('<H', 18+len(myCompressed)+8-1)
+                  +myCompressed+struct.pack('<II', zlib.crc32(myChunk) & 0xffffffff, len(myChunk)))
+    return myOut
+
+@pytest.mark.parametrize('newline,compress', [(b'\n', False), (b'\r\n', False), (b'\n', True)])
+def test_records_match_sequential_parse(tmp_path, newline, compress):
+    myData = randomFasta(random.Random(18), newline)
+    myPath = tmp_path / ('seqs.fa.gz' if compress else 'seqs.fa')
+    myPath.write_bytes(bgzip(myData) if compress else myData)
+    myIndex = fastaindex.FastaIndex(str(myPath))
+    myRecords = sequentialRecords(myData)
+    assert len(myIndex) == len(myRecords)
+    assert [(myIndex.names[i], myIndex.sequence(i)) for i in range(len(myIndex))] == myRecords
+    # Raw records put back together are the file
+    assert b''.join([myIndex.record(i) for i in range(len(myIndex))]) == myData
+    for myName in set([h for (h, s) in myRecords]):
+        assert myIndex.nameToRecords[myName] == [i for i in range(len(myRecords)) if myRecords[i][0] == myName]
+    myIndex.close()
+    # The index written next to the file is reused
+    assert (tmp_path / (myPath.name+'.ripples.fai')).exists()
+    assert [fastaindex.FastaIndex(str(myPath)).sequence(i) for i in range(len(myIndex))] == [s for (h, s) in myRecords]
+
+@pytest.mark.parametrize('newline', [b'\n', b'\r\n'])
+def test_records_without_sequence(tmp_path, newline):
+    myData = newline.join([b'>a', b'ACGT', b'AC', b'>empty', b'>also empty', b'>b', b'GG', b'>last empty', b''])
+    myPath = tmp_path / 'seqs.fa'
+    myPath.write_bytes(myData)
+    myIndex = fastaindex.FastaIndex(str(myPath))
+    assert [myIndex.record(i) for i in range(len(myIndex))] == [
+        b'>a'+newline+b'ACGT'+newline+b'AC'+newline, b'>empty'+newline, b'>also empty'+newline,
+        b'>b'+newline+b'GG'+newline, b'>last empty'+newline]
+    assert [myIndex.sequence(i) for i in range(len(myIndex))] == ['ACGTAC', '', '', 'GG', '']
+
+def test_index_without_header_offsets_rebuilt(tmp_path):
+    myPath = tmp_path / 'seqs.fa'
+    myPath.write_bytes(b'>a\r\nAC\r\n>empty\r\n>b\r\nGG\r\n')
+    # The five columns of an index written before the header offsets
+    myFai = tmp_path / 'seqs.fa.ripples.fai'
+    myFai.write_text('a\t2\t4\t2\t4\nempty\t0\t16\t0\t0\nb\t2\t20\t2\t4\n')
+    os.utime(str(myFai), (os.path.getmtime(str(myPath))+10,)*2)
+    myIndex = fastaindex.FastaIndex(str(myPath))
+    assert [myIndex.record(i) for i in range(len(myIndex))] == [b'>a\r\nAC\r\n', b'>empty\r\n', b'>b\r\nGG\r\n']
+    assert len(myFai.read_text().splitlines()[0].split('\t')) == 6
+
+def test_plain_gzip_rejected(tmp_path):
+    myPath = tmp_path / 'seqs.fa.gz'
+    myPath.write_bytes(gzip.compress(b'>a\nACGT\n'))
+    with pytest.raises(ValueError):
+        fastaindex.FastaIndex(str(myPath))
+
+def test_record_cache_reads_each_record_once():
+    class CountingIndex:
+        def __init__(self):
+            self.reads = []
+        def record(self, i):
+            self.reads.append(i)
+            return b'>%d\nACGT\n' % i
+    myIndex = CountingIndex()
+    myCache = fastaindex.RecordCache(myIndex, {0: 3, 1: 1, 2: 2}, maxBytes=1 << 20)
+    for i in [0, 2, 0, 1, 2, 0]:
+        assert myCache.record(i) == b'>%d\nACGT\n' % i
+    assert myIndex.reads == [0, 2, 1]
+    # Records are dropped after their last use
+    assert myCache.size == 0 and len(myCache.records) == 0
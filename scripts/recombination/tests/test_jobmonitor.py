@@ -0,0 +1,61 @@
+import os
+import stat
+import executors
+from jobmonitor import JobMonitor
+
+# Stand-in for gcloud: "operations describe" of operation <id> fails while
+# the file <id>.fail exists, and reports done once <id>.polls has counted
+# down to zero
+GCLOUD = '''#!/bin/sh
+id=$(eval echo \\${$#})
+cd "$(dirname "$0")"
+[ -e $id.fail ] && exit 1
+n=$(cat $id.polls)
+echo $((n - 1)) > $id.polls
+if [ "$n" -le 1 ]; then echo '{"done": true}'; else echo '{}'; fi
+'''
+
+
+def stubGcloud(tmp_path, monkeypatch):
+    myPath = tmp_path / 'gcloud'
+    myPath.write_text(GCLOUD)
+    myPath.chmod(myPath.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', str(tmp_path)+os.pathsep+os.environ['PATH'])
+
+def makeMonitor():
+    myExecutor = executors.GCPExecutor({'machine_type': 'm', 'boot_disk_size': 10, 'bucket_id': 'b', 'logging': 'l'}, 'gs://b/r')
+    return JobMonitor(myExecutor.poll, max_concurrent=2, min_interval=0.01, max_interval=0.02, max_errors=3)
+
+def test_jobs_finish(tmp_path, monkeypatch):
+    stubGcloud(tmp_path, monkeypatch)
+    for (myId, myPolls) in [('1', 1), ('2', 4), ('3', 2)]:
+        (tmp_path / (myId+'.polls')).write_text(str(myPolls))
+    myJobs = [{'partition': (i, i+1), 'operation_id': str(i)} for i in [1, 2, 3]]
+    myDone = []
+    makeMonitor().run(myJobs, lambda job: myDone.append(job['partition']))
+    assert sorted(myDone) == [(1, 2), (2, 3), (3, 4)]
+    assert not any([job.get('failed') for job in myJobs])
+
+def test_failing_polls_give_up(tmp_path, monkeypatch):
+    stubGcloud(tmp_path, monkeypatch)
+    (tmp_path / '1.polls').write_text('2')
+    (tmp_path / '2.polls').write_text('1')
+    (tmp_path / '2.fail').write_text('')
+    myJobs = [{'partition': (i, i+1), 'operation_id': str(i)} for i in [1, 2]]
+    myDone = []
+    makeMonitor().run(myJobs, lambda job: myDone.append(job['partition']))
+    assert myDone == [(1, 2)]
+    assert myJobs[1]['failed'] and not myJobs[0].get('failed')
+
+def test_on_done_without_to_thread(monkeypatch):
+    # The container's Python 3.8 has no asyncio.to_thread
+    monkeypatch.delattr('asyncio.to_thread', raising=False)
+    myPolls = {}
+
+    async def poll(job):
+        myPolls[job['partition']] = myPolls.get(job['partition'], 0)+1
+        return myPolls[job['partition']] >= 2
+    myJobs = [{'partition': (i, i+1)} for i in range(3)]
+    myDone = []
+    JobMonitor(poll, min_interval=0.01, max_interval=0.02).run(myJobs, lambda job: myDone.append(job['partition']))
+    assert sorted(myDone) == [(0, 1), (1, 2), (2, 3)]
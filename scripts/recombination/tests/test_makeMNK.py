@@ -0,0 +1,34 @@
+import random
+import makeMNK
+
+
+def getK(seq, a, b):
+    # The per-sequence walk getMNK replaced
+    myPath = []
+    currentPlace = 0
+    for k in seq:
+        if k == a:
+            currentPlace += 1
+        else:
+            currentPlace -= 1
+        myPath.append(currentPlace)
+    maxDesc = 0
+    for i in range(1,len(myPath)):
+        if max(myPath[:i])-myPath[i] > maxDesc:
+            maxDesc = max(myPath[:i])-myPath[i]
+    return(maxDesc)
+
+def oldMNK(seq):
+    if seq.startswith('A'):
+        return (seq.count('A'), seq.count('B'), getK(seq, 'A', 'B'))
+    return (seq.count('B'), seq.count('A'), getK(seq, 'B', 'A'))
+
+def test_mnk_matches_per_sequence_walk(monkeypatch):
+    myRandom = random.Random(14)
+    mySeqs = ['', 'A', 'B', 'AB', 'BA', 'AAAA', 'BBBBBBBB']
+    mySeqs += [''.join(myRandom.choice('AB') for i in range(myRandom.randrange(1, 200))) for k in range(300)]
+    # Small blocks, so sequences of different lengths share and span blocks
+    for myBlock in [makeMNK.MNK_BLOCK, 64]:
+        monkeypatch.setattr(makeMNK, 'MNK_BLOCK', myBlock)
+        (myM, myN, myK) = makeMNK.getMNK(mySeqs)
+        assert list(zip(myM.tolist(), myN.tolist(), myK.tolist())) == [oldMNK(seq) for seq in mySeqs]
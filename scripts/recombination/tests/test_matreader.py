@@ -0,0 +1,79 @@
+import types
+import numpy
+import pytest
+import matreader
+
+# Internal nodes node_1 (root), node_2 and node_3; c1 and c3 are condensed
+# nodes with mutations, c2 one without and c4 holds a single sample.
+NEWICK = '((A:1,c1:1):1,(B:1,c2:1,c3:1):1,c4:1);'
+PREORDER = ['node_1', 'node_2', 'A', 'c1', 'node_3', 'B', 'c2', 'c3', 'c4']
+MUTATIONS = {'node_2': [(10, 0, 1)], 'c1': [(20, 2, 3)], 'c3': [(30, 1, 0)]}
+CONDENSED = [('c1', ['s1', 's2']), ('c2', ['s3', 's4']), ('c3', ['s5', 's6']), ('c4', ['s7'])]
+
+# ripplesUtils' paths after uncondensing, with c3 numbered before c1
+SAMPLE_PATHS = '''sample_id\tpath_from_root
+A\t (1) > A10C (2) > 
+s1\t (1) > A10C (2) > G20T (5) > 
+s2\t (1) > A10C (2) > G20T (5) > 
+B\t (1) >  (3) > 
+s3\t (1) >  (3) > 
+s4\t (1) >  (3) > 
+s5\t (1) >  (3) > C30A (4) > 
+s6\t (1) >  (3) > C30A (4) > 
+s7\t (1) > 
+'''
+
+
+def makeMat(mutations=MUTATIONS, condensed=CONDENSED):
+    """A parsed MAT with the fields matreader reads."""
+    myMutations = []
+    for n in PREORDER:
+        myMutations.append(types.SimpleNamespace(mutation=[
+            types.SimpleNamespace(position=pos, par_nuc=par, mut_nuc=[nuc], chromosome=matreader.CHROM)
+            for (pos, par, nuc) in mutations.get(n, [])]))
+    return types.SimpleNamespace(newick=NEWICK, node_mutations=myMutations,
+        condensed_nodes=[types.SimpleNamespace(node_name=n, condensed_leaves=s) for (n, s) in condensed])
+
+def writeSamplePaths(tmp_path, text=SAMPLE_PATHS):
+    myPath = tmp_path / 'sample_paths.txt'
+    myPath.write_text(text)
+    return str(myPath)
+
+
+def test_uncondense_structure(tmp_path):
+    (myMat, myParents, internalToIndex, myNames) = matreader.indexTree(makeMat(), writeSamplePaths(tmp_path))
+    # Condensed nodes with mutations become internal nodes over their samples
+    assert internalToIndex == {1: 0, 2: 1, 3: 4, 4: 7, 5: 3}
+    assert myNames[3] is None and myNames[7] is None
+    # Without mutations, the first sample takes the node and the others become its siblings
+    assert myNames[6] == 's3' and myNames[8] == 's7'
+    assert list(zip(myNames[9:], myParents[9:])) == [('s1', 3), ('s2', 3), ('s4', 4), ('s5', 7), ('s6', 7)]
+
+def test_single_uncondensed_node_needs_no_sample_paths():
+    myMutations = dict(MUTATIONS)
+    del myMutations['c3']
+    (myMat, myParents, internalToIndex, myNames) = matreader.indexTree(makeMat(myMutations), None)
+    assert internalToIndex[4] == 3
+    assert myNames[7] == 's5'
+
+def test_ambiguous_ids_fail_without_sample_paths(tmp_path):
+    with pytest.raises(ValueError):
+        matreader.indexTree(makeMat(), str(tmp_path / 'missing.txt'))
+    with pytest.raises(ValueError):
+        matreader.indexTree(makeMat(), writeSamplePaths(tmp_path, SAMPLE_PATHS.replace('(5)', '(4)')))
+
+def test_unknown_condensed_node_fails():
+    with pytest.raises(ValueError):
+        matreader.indexTree(makeMat(condensed=[('c9', ['s1', 's2'])]), None)
+
+def test_genotypes_of_uncondensed_nodes(tmp_path):
+    matreader.TREES['condensed.pb'] = matreader.indexTree(makeMat(), writeSamplePaths(tmp_path))
+    try:
+        (indexToNode, myPositions, myAlleles, myGenotypes) = matreader.readGenotypes('condensed.pb', {1, 2, 3, 4, 5, 6})
+    finally:
+        del matreader.TREES['condensed.pb']
+    assert indexToNode == [1, 2, 5, 3, 4]
+    assert myPositions.tolist() == [10, 20, 30]
+    # A=1, C=2, G=4, T=8
+    assert myGenotypes.tolist() == [[1, 4, 2], [2, 4, 2], [2, 8, 2], [1, 4, 2], [1, 4, 1]]
+    assert myAlleles[1] == {4: 'G20G', 8: 'G20T'}
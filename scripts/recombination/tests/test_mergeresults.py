@@ -0,0 +1,33 @@
+import io
+import random
+from mergeresults import merge_runs, run_start, trio_key, write_sorted_run
+
+
+def row(recomb, donor, acceptor, tag):
+    return '\t'.join([str(recomb), 'b1', 'b2', str(donor), 'n', '1', str(acceptor), 'n', '1', tag])+'\n'
+
+def test_merge_matches_sort_and_keeps_earliest_partition(tmp_path):
+    myRandom = random.Random(1)
+    myRows = []
+    myPaths = []
+    # Partition starts whose string order differs from their numeric order
+    for start in [0, 9, 10, 100, 25]:
+        myPartRows = [row(myRandom.randrange(30), myRandom.randrange(5), myRandom.randrange(5), str(start)) for k in range(40)]
+        myPath = str(tmp_path / '{}_{}.txt'.format(start, start+5))
+        assert write_sorted_run(myPartRows + ['\n'], myPath) == len(myPartRows)
+        myPaths.append(myPath)
+        myRows.append(myPartRows)
+    myOut = io.StringIO()
+    (written, duplicates) = merge_runs(sorted(myPaths, key=run_start), myOut)
+
+    # Expected: every trio once, from the first partition (by start) that found it
+    myFirst = {}
+    for start, myPartRows in sorted(zip([0, 9, 10, 100, 25], myRows)):
+        for r in myPartRows:
+            myFirst.setdefault(trio_key(r), r)
+    assert myOut.getvalue() == ''.join([myFirst[k] for k in sorted(myFirst)])
+    assert written == len(myFirst)
+    assert written + duplicates == sum([len(r) for r in myRows])
+
+def test_run_start():
+    assert sorted(['/m/100_200.txt', '/m/20_99.txt', '/m/0_19.txt'], key=run_start) == ['/m/0_19.txt', '/m/20_99.txt', '/m/100_200.txt']
@@ -0,0 +1,52 @@
+import os
+import random
+from nulltables import NullTable
+
+FILTERING = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'filtering')
+
+
+def oldNullPVal(txtPath, origPars, improvement):
+    # The original scan of a null file
+    myNull = {}
+    origParsToTotal = {}
+    with open(txtPath) as f:
+        for line in f:
+            splitLine = (line.strip()).split()
+            if len(splitLine) == 1 and splitLine[0].isdigit():
+                myOrigPars = int(splitLine[0])
+                myNull[myOrigPars] = {}
+                origParsToTotal[myOrigPars] = 0
+            elif len(splitLine) == 2:
+                (myNull[myOrigPars])[int(splitLine[0])] = int(splitLine[1])
+                origParsToTotal[myOrigPars] += int(splitLine[1])
+    if origPars not in myNull:
+        return 'NA'
+    myTotal = origParsToTotal[origPars]
+    for k in sorted(myNull[origPars].keys()):
+        if k < improvement:
+            myTotal -= myNull[origPars][k]
+    if myTotal == 0:
+        return '0/'+str(origParsToTotal[origPars])
+    return float(myTotal)/float(origParsToTotal[origPars])
+
+def test_null_tables_match_scan(tmp_path):
+    myRandom = random.Random(9)
+    myText = ''
+    for p in [2, 3, 5, 6, 9]:
+        myText += str(p)+'\n'
+        for k in sorted(myRandom.sample(range(0, 12), myRandom.randrange(1, 8))):
+            myText += '%d %d\n' % (k, myRandom.randrange(1, 50))
+        myText += '\n'
+    myPath = str(tmp_path / 'null.txt')
+    open(myPath, 'w').write(myText)
+    myPars = [p for p in range(0, 12) for m in range(1, 16)]
+    myImprovements = [m for p in range(0, 12) for m in range(1, 16)]
+    assert NullTable(myPath).pVals(myPars, myImprovements) == [oldNullPVal(myPath, p, m) for (p, m) in zip(myPars, myImprovements)]
+
+def test_shipped_nulls(tmp_path):
+    for myName in ['rob_null.txt', 'russ_null.txt']:
+        myPath = str(tmp_path / myName)
+        open(myPath, 'w').write(open(os.path.join(FILTERING, myName)).read())
+        myPars = [p for p in range(0, 60) for m in range(3, 40, 3)]
+        myImprovements = [m for p in range(0, 60) for m in range(3, 40, 3)]
+        assert NullTable(myPath).pVals(myPars, myImprovements) == [oldNullPVal(myPath, p, m) for (p, m) in zip(myPars, myImprovements)]
@@ -0,0 +1,78 @@
+import sqlite3
+import numpy
+from pvalcache import PValueCache
+
+
+class CountingSource:
+    # p-value source that records which triples it was asked for
+    def __init__(self):
+        self.asked = []
+
+    def pVals(self, m, n, k):
+        self.asked.extend(zip(m.tolist(), n.tolist(), k.tolist()))
+        return (m*10000+n*100+k)/1e6
+
+def test_misses_computed_once(tmp_path):
+    mySource = CountingSource()
+    myCache = PValueCache(mySource, str(tmp_path / 'pvals.sqlite'))
+    m = numpy.array([1, 2, 1, 3])
+    n = numpy.array([4, 5, 4, 6])
+    k = numpy.array([0, 1, 0, 2])
+    assert myCache.pVals(m, n, k).tolist() == mySource.pVals(m, n, k).tolist()
+    mySource.asked = []
+    assert myCache.pVals([3, 7], [6, 7], [2, 7]).tolist() == [0.030602, 0.070707]
+    assert mySource.asked == [(7, 7, 7)]
+    # A new connection, as in the next run, sees the stored values
+    mySource.asked = []
+    assert PValueCache(mySource, str(tmp_path / 'pvals.sqlite')).pVals(m, n, k).tolist() == [0.010400, 0.020501, 0.010400, 0.030602]
+    assert mySource.asked == []
+
+def test_disabled_cache_passes_through():
+    mySource = CountingSource()
+    assert PValueCache(mySource, '').pVals([1], [2], [3]).tolist() == [0.010203]
+    assert mySource.asked == [(1, 2, 3)]
+
+def test_least_recently_used_evicted(tmp_path):
+    myCache = PValueCache(CountingSource(), str(tmp_path / 'pvals.sqlite'), maxEntries=3)
+    for m in [1, 2, 3]:
+        myCache.pVals([m], [0], [0])
+    myCache.pVals([1], [0], [0])
+    myCache.pVals([4], [0], [0])
+    assert sorted(myCache.get([(m, 0, 0) for m in range(1, 5)])) == [(1, 0, 0), (3, 0, 0), (4, 0, 0)]
+
+def test_reads_do_not_wait_for_a_writer(tmp_path):
+    myPath = str(tmp_path / 'pvals.sqlite')
+    myCache = PValueCache(CountingSource(), myPath)
+    myCache.pVals([1, 2], [0, 0], [0, 0])
+    myWriter = sqlite3.connect(myPath, isolation_level=None)
+    myWriter.execute("BEGIN IMMEDIATE")
+    try:
+        # Served from the cache while the other connection holds the write lock
+        assert myCache.get([(1, 0, 0), (5, 0, 0)]) == {(1, 0, 0): 0.01}
+        assert myCache.unmarked == {(1, 0, 0)}
+    finally:
+        myWriter.execute("ROLLBACK")
+    myCache.get([(2, 0, 0)])
+    assert myCache.unmarked == set()
+
+def test_settings_read_when_opened(tmp_path, monkeypatch):
+    monkeypatch.setenv('RIPPLES_PVAL_CACHE', str(tmp_path / 'env.sqlite'))
+    monkeypatch.setenv('RIPPLES_PVAL_CACHE_SIZE', '2')
+    myCache = PValueCache(CountingSource())
+    myCache.pVals([1, 2, 3], [0, 0, 0], [0, 0, 0])
+    assert (tmp_path / 'env.sqlite').exists()
+    assert myCache.maxEntries == 2 and myCache.entries == 2
+    monkeypatch.setenv('RIPPLES_PVAL_CACHE', '')
+    assert PValueCache(CountingSource()).db is None
+
+def test_entries_counted_once(tmp_path):
+    myPath = str(tmp_path / 'pvals.sqlite')
+    PValueCache(CountingSource(), myPath).pVals([1, 2], [0, 0], [0, 0])
+    myCache = PValueCache(CountingSource(), myPath, maxEntries=4)
+    assert myCache.entries == 2
+    myStatements = []
+    myCache.db.set_trace_callback(myStatements.append)
+    for m in range(1, 8):
+        myCache.pVals([m, m+1], [0, 0], [0, 0])
+    assert not [s for s in myStatements if 'COUNT' in s]
+    assert myCache.entries == myCache.db.execute("SELECT COUNT(*) FROM pvals").fetchone()[0] == 4
@@ -0,0 +1,96 @@
+import os
+import stat
+import pytest
+import refalign
+
+REFERENCE = 'acgtacgtac'
+
+# Stand-in for mafft on a reference and sample pair: the sample is the
+# reference with some bases deleted and some inserted, and this aligner only
+# handles the samples given in ALIGNMENTS.  A whole trio file is written back
+# as it is, in lower case.
+MAFFT = '''#!/usr/bin/env python3
+import sys
+ALIGNMENTS = %r
+myRecords = open(sys.argv[-1]).read().split('>')[1:]
+if len(myRecords) > 2:
+    print(''.join('>' + r.split('\\n', 1)[0] + '\\n' + r.split('\\n', 1)[1].lower() for r in myRecords), end='')
+    sys.exit()
+mySample = myRecords[1].split('\\n', 1)[1].replace('\\n', '')
+print('>reference\\n' + ALIGNMENTS[mySample][0] + '\\n>sample\\n' + ALIGNMENTS[mySample][1])
+'''
+ALIGNMENTS = {
+    'acgtttacgtac': ('acgt--acgtac', 'acgtttacgtac'),
+    'acgacgtac': ('acgtacgtac', 'acg-acgtac'),
+    'gacgtacgtacc': ('-acgtacgtac-', 'gacgtacgtacc'),
+    # Not an alignment to REFERENCE
+    'ttt': ('acgtacgtaa', 'ttt-------'),
+}
+
+
+def test_merge_alignments():
+    (myRef, mySamples) = refalign.mergeAlignments(REFERENCE, [
+        ('acgt--acgtac', 'acgtttacgtac'),
+        ('acgt-acgtac', 'acgtgacgtac'),
+        ('-acgtacgtac-', 'gacgtacgtacc'),
+        (REFERENCE, 'acg-acgtac')])
+    assert myRef == '-acgt--acgtac-'
+    assert mySamples == ['-acgtttacgtac-', '-acgtg-acgtac-', 'gacgt--acgtacc', '-acg---acgtac-']
+
+def test_merge_rejects_another_reference():
+    with pytest.raises(ValueError):
+        refalign.mergeAlignments(REFERENCE, [('acgtacgtaa', 'acgtacgtaa')])
+
+def stubMafft(tmp_path, monkeypatch):
+    myBin = tmp_path / 'bin'
+    myBin.mkdir()
+    myPath = myBin / 'mafft'
+    myPath.write_text(MAFFT % ALIGNMENTS)
+    myPath.chmod(myPath.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', str(myBin)+os.pathsep+os.environ['PATH'])
+
+def test_align_trios(tmp_path, monkeypatch):
+    stubMafft(tmp_path, monkeypatch)
+    myOrdered = tmp_path / 'ordered'
+    myOrdered.mkdir()
+    (myOrdered / 't1.fa').write_text('>ref\n'+REFERENCE.upper()+'\n>r\nACGTTTACGTAC\n>d\nACGACGTAC\n')
+    (myOrdered / 't2.fa').write_text('>ref\n'+REFERENCE.upper()+'\n>r\nGACGTACGTACC\n>d\nACGACGTAC\n')
+    refalign.alignTrios(2, str(myOrdered), str(tmp_path / 'aligned'), str(tmp_path / 'cache'), 0)
+    assert refalign.readFasta(str(tmp_path / 'aligned' / 't1.fa')) == [
+        ('ref', 'acgt--acgtac'), ('r', 'acgtttacgtac'), ('d', 'acg---acgtac')]
+    assert refalign.readFasta(str(tmp_path / 'aligned' / 't2.fa')) == [
+        ('ref', '-acgtacgtac-'), ('r', 'gacgtacgtacc'), ('d', '-acg-acgtac-')]
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 3
+
+def test_trio_with_unusable_alignment_aligned_whole(tmp_path, monkeypatch, capsys):
+    stubMafft(tmp_path, monkeypatch)
+    myOrdered = tmp_path / 'ordered'
+    myOrdered.mkdir()
+    (myOrdered / 't1.fa').write_text('>ref\n'+REFERENCE.upper()+'\n>r\nACGTTTACGTAC\n>d\nACGACGTAC\n')
+    (myOrdered / 't2.fa').write_text('>ref\n'+REFERENCE.upper()+'\n>r\nTTT\n>d\nACGACGTAC\n')
+    refalign.alignTrios(2, str(myOrdered), str(tmp_path / 'aligned'), str(tmp_path / 'cache'), 0)
+    assert refalign.readFasta(str(tmp_path / 'aligned' / 't1.fa')) == [
+        ('ref', 'acgt--acgtac'), ('r', 'acgtttacgtac'), ('d', 'acg---acgtac')]
+    assert refalign.readFasta(str(tmp_path / 'aligned' / 't2.fa')) == [
+        ('ref', REFERENCE), ('r', 'ttt'), ('d', 'acgacgtac')]
+    assert 'aligning t2.fa with mafft instead' in capsys.readouterr().out
+
+def test_damaged_alignment_is_redone(tmp_path, monkeypatch):
+    stubMafft(tmp_path, monkeypatch)
+    myCache = refalign.AlignmentCache(REFERENCE, str(tmp_path / 'cache'))
+    refalign.writeFasta(myCache.path('acgacgtac'), [('reference', 'acgtacgtaa'), ('sample', 'acg-acgtac')])
+    assert myCache.get('acgacgtac') == ALIGNMENTS['acgacgtac']
+    # mafft itself not returning the reference is an error
+    with pytest.raises(ValueError):
+        myCache.get('ttt')
+
+def test_prune_least_recently_used(tmp_path):
+    myCache = refalign.AlignmentCache(REFERENCE, str(tmp_path / 'cache'))
+    for (k, seq) in enumerate(['acgt', 'acgta', 'acgtac']):
+        refalign.writeFasta(myCache.path(seq), [('reference', REFERENCE), ('sample', seq+'-'*(10-len(seq)))])
+        os.utime(myCache.path(seq), (1000+k, 1000+k))
+    mySize = os.path.getsize(myCache.path('acgt'))
+    myCache.prune(0)
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 3
+    myCache.prune(2*mySize)
+    assert sorted(os.listdir(str(tmp_path / 'cache'))) == sorted([os.path.basename(myCache.path(s)) for s in ['acgta', 'acgtac']])
@@ -0,0 +1,32 @@
+import os
+import re
+import pytest
+import run_filtration
+from datastore import DataStore
+
+FILTERING = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'filtering')
+
+
+def localImports(script, seen=None):
+    """Modules of filtering/ that a filtering script imports, directly or through each other."""
+    seen = set() if seen is None else seen
+    with open(os.path.join(FILTERING, script)) as f:
+        for myModule in re.findall(r'^\s*(?:from|import) (\w+)', f.read(), re.M):
+            if os.path.exists(os.path.join(FILTERING, myModule+'.py')) and not myModule in seen:
+                seen.add(myModule)
+                localImports(myModule+'.py', seen)
+    return seen
+
+@pytest.mark.parametrize('useVcf', [False, True])
+def test_stages_list_the_modules_they_import(useVcf):
+    for (name, run, inputs, outputs, params) in run_filtration.getStages('tree.pb', 'seqs.fa', 'ref.fa', DataStore(), useVcf):
+        myScripts = [os.path.basename(p) for p in inputs if p.startswith('filtering/') and p.endswith('.py')]
+        if not myScripts:
+            continue
+        # The datastore (with the tables it reads) is shared by every stage
+        myModules = localImports(myScripts[0], {'datastore', 'run_filtration'}) - {'datastore', 'run_filtration'}
+        if name == 'getABABA':
+            myModules -= {'vcfreader'} if not useVcf else {'matreader'}
+        if name == 'getDescendants' and useVcf:
+            myModules -= {'matreader'}
+        assert set(['filtering/'+m+'.py' for m in myModules]) <= set(inputs), name
@@ -0,0 +1,39 @@
+import itertools
+import numpy
+import threeseq
+
+
+def bruteForce(m, n, k):
+    """Fraction of the orders of m up and n down steps whose walk, from 0, drops k below an earlier high point."""
+    myHits = 0
+    myTotal = 0
+    for myDowns in itertools.combinations(range(m+n), n):
+        myPlace = 0
+        myHigh = 0
+        myDescent = 0
+        for i in range(m+n):
+            myPlace += -1 if i in myDowns else 1
+            myHigh = max(myHigh, myPlace)
+            myDescent = max(myDescent, myHigh-myPlace)
+        myHits += (myDescent >= k)
+        myTotal += 1
+    return myHits/myTotal
+
+def test_pvals_match_brute_force():
+    for k in range(1, 6):
+        myPVals = threeseq.computePVals(k, 7, 6)
+        for m in range(0, 8):
+            for n in range(0, 7):
+                assert abs(myPVals[m, n]-bruteForce(m, n, k)) < 1e-12, (m, n, k)
+
+def test_table_lookup(tmp_path):
+    myTable = threeseq.PValueTable(str(tmp_path / 'pvalues'), size=5)
+    m = numpy.array([3, 5, 7, 2, 4, 6, 0])
+    n = numpy.array([4, 5, 3, 1, 6, 2, 3])
+    k = numpy.array([2, 3, 1, 0, 7, 2, 1])
+    myExpected = [bruteForce(a, b, c) if c > 0 else 1.0 for (a, b, c) in zip(m.tolist(), n.tolist(), k.tolist())]
+    # Triples beyond the table size are computed directly
+    numpy.testing.assert_allclose(myTable.pVals(m, n, k), myExpected, rtol=0, atol=1e-12)
+    assert sorted(p.name for p in (tmp_path / 'pvalues').iterdir()) == ['k1.npy', 'k2.npy', 'k3.npy']
+    # Tables written by an earlier run are reused
+    numpy.testing.assert_allclose(threeseq.PValueTable(str(tmp_path / 'pvalues'), size=5).pVals(m, n, k), myExpected, rtol=0, atol=1e-12)
@@ -0,0 +1,32 @@
+import matreader
+from treeindex import TreeIndex
+from test_matreader import makeMat, writeSamplePaths
+
+
+def test_pools_match_sample_paths(tmp_path):
+    mySamplePaths = writeSamplePaths(tmp_path)
+    matreader.TREES['condensed.pb'] = matreader.indexTree(makeMat(), mySamplePaths)
+    try:
+        fromMat = TreeIndex.fromMat('condensed.pb')
+    finally:
+        del matreader.TREES['condensed.pb']
+    fromPaths = TreeIndex.fromSamplePaths(mySamplePaths)
+    assert sorted(fromMat.internalToIndex) == sorted(fromPaths.internalToIndex) == ['1', '2', '3', '4', '5']
+    for n in fromMat.internalToIndex:
+        for depth in range(1, 5):
+            assert (sorted(fromMat.leavesAt(fromMat.internalToIndex[n], depth))
+                    == sorted(fromPaths.leavesAt(fromPaths.internalToIndex[n], depth))), (n, depth)
+
+def test_condensed_samples_one_level_below(tmp_path):
+    matreader.TREES['condensed.pb'] = matreader.indexTree(makeMat(), writeSamplePaths(tmp_path))
+    try:
+        myTree = TreeIndex.fromMat('condensed.pb')
+    finally:
+        del matreader.TREES['condensed.pb']
+    myRoot = myTree.internalToIndex['1']
+    assert list(myTree.leavesAt(myRoot, 1)) == ['s7']
+    assert sorted(myTree.leavesAt(myRoot, 2)) == ['A', 'B', 's3', 's4']
+    assert sorted(myTree.leavesAt(myRoot, 3)) == ['s1', 's2', 's5', 's6']
+    # c1's samples are grandchildren of node_2, not children
+    assert list(myTree.leavesAt(myTree.internalToIndex['2'], 1)) == ['A']
+    assert list(myTree.leavesAt(myTree.internalToIndex['5'], 1)) == ['s1', 's2']
@@ -0,0 +1,97 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from workqueue import WorkQueue, get_chunks, MAX_ATTEMPTS
+
+
+def test_get_chunks():
+    assert get_chunks([(0, 10), (20, 25)], 4) == [(0, 4), (4, 8), (8, 10), (20, 24), (24, 25)]
+
+def test_claim_complete_and_retry(tmp_path):
+    myQueue = WorkQueue(str(tmp_path / 'queue.db'))
+    myQueue.fill([(0, 5), (5, 10)])
+    assert myQueue.claim('a') == (0, 5)
+    assert myQueue.claim('b') == (5, 10)
+    assert myQueue.claim('a') is None
+    myQueue.complete((0, 5))
+    # A failed chunk goes back to the queue until it has used up its attempts
+    for k in range(0, MAX_ATTEMPTS-1):
+        myQueue.fail((5, 10))
+        assert myQueue.claim('a') == (5, 10)
+    myQueue.fail((5, 10))
+    assert myQueue.claim('a') is None
+    assert myQueue.counts() == {'done': 1, 'failed': 1}
+    assert [(start, end) for (start, end, seconds) in myQueue.runtimes()] == [(0, 5)]
+
+def test_concurrent_workers_claim_each_chunk_once(tmp_path):
+    myPath = str(tmp_path / 'queue.db')
+    WorkQueue(myPath).fill(get_chunks([(0, 200)], 1))
+    myClaimed = []
+
+    def work(worker):
+        # One connection per worker, as queue_worker.py processes have
+        myQueue = WorkQueue(myPath)
+        while True:
+            myChunk = myQueue.claim(worker)
+            if myChunk is None:
+                break
+            myClaimed.append(myChunk)
+            myQueue.complete(myChunk)
+    myThreads = [threading.Thread(target=work, args=(str(i),)) for i in range(4)]
+    for t in myThreads:
+        t.start()
+    for t in myThreads:
+        t.join()
+    assert sorted(myClaimed) == get_chunks([(0, 200)], 1)
+    assert WorkQueue(myPath).counts() == {'done': 200}
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    myQueue = WorkQueue(str(tmp_path / 'queue.db'), lease=0.2)
+    myQueue.fill([(0, 5)])
+    assert myQueue.claim('a') == (0, 5)
+    # A renewed lease is kept
+    time.sleep(0.1)
+    assert myQueue.renew((0, 5), 'a')
+    time.sleep(0.15)
+    assert myQueue.claim('b') is None
+    # an expired one is taken over, and the old worker can no longer finish it
+    time.sleep(0.25)
+    assert myQueue.claim('b') == (0, 5)
+    assert not myQueue.renew((0, 5), 'a')
+    myQueue.complete((0, 5), 'a')
+    assert myQueue.unfinished() == [(0, 5, 'claimed')]
+    # and a chunk that has used up its attempts is left as failed
+    time.sleep(0.25)
+    assert myQueue.claim('c') is None
+    assert myQueue.unfinished() == [(0, 5, 'failed')]
+
+def test_killed_worker_chunk_is_claimed_again(tmp_path):
+    myPath = str(tmp_path / 'queue.db')
+    WorkQueue(myPath).fill([(0, 5), (5, 10)])
+    # process.py stand-in that never finishes its chunk
+    (tmp_path / 'process.py').write_text(
+            "import time\nopen('started', 'w').close()\ntime.sleep(60)\n")
+    myWorker = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), 'queue_worker.py'), myPath, 'w1', 'v', 'tree.pb', 'bucket',
+            str(tmp_path / 'out'), 'reference.fa', 'sequences.fa'], cwd=str(tmp_path), start_new_session=True)
+    try:
+        myDeadline = time.time() + 30
+        while not (tmp_path / 'started').exists():
+            assert time.time() < myDeadline and myWorker.poll() is None
+            time.sleep(0.05)
+    finally:
+        # Kill the worker and its process.py mid-chunk
+        os.killpg(myWorker.pid, signal.SIGKILL)
+        myWorker.wait()
+    myQueue = WorkQueue(myPath, lease=0.2)
+    assert myQueue.unfinished() == [(0, 5, 'claimed'), (5, 10, 'pending')]
+    assert myQueue.claim('w2') == (5, 10)
+    time.sleep(0.3)
+    assert myQueue.claim('w2') == (0, 5)
+    assert myQueue.db.execute("SELECT attempts FROM chunks WHERE start = 0").fetchone() == (2,)
+    myQueue.complete((0, 5), 'w2')
+    myQueue.complete((5, 10), 'w2')
+    assert myQueue.unfinished() == []
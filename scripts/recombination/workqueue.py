@@ -0,0 +1,109 @@
+#!/bin/python3
+#
+# SQLite work queue of long branch chunks for run.py's work-queue mode.
+#
+# run.py cuts the long branch range into many small [start, end) chunks and
+# starts one queue_worker.py per instance.  Each worker claims the next
+# pending chunk, runs process.py on it and marks it done, until the queue is
+# empty, so faster workers end up processing more chunks.
+#
+# A claim is a lease: the worker renews it while its chunk runs, and a chunk
+# whose lease has not been renewed for lease seconds (its worker was killed,
+# or its machine lost) is claimed again by the next worker, within the same
+# MAX_ATTEMPTS as chunks that failed.
+import os
+import sqlite3
+import sys
+import time
+
+# The SQLite transaction is shared with filtering/pvalcache.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'filtering'))
+from sqlitetransaction import Transaction
+
+# Number of times a chunk is tried before it is left as failed
+MAX_ATTEMPTS = 2
+# Seconds without a renewal after which a claimed chunk is taken back
+LEASE_SECONDS = 600
+
+
+class WorkQueue:
+
+    def __init__(self, path, lease=LEASE_SECONDS):
+        self.path = path
+        self.lease = lease
+        # Workers on the same machine share the file; wait for each other's locks
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS chunks (
+            start INTEGER, end INTEGER, status TEXT, worker TEXT, attempts INTEGER,
+            claimed_at REAL, finished_at REAL, renewed_at REAL, PRIMARY KEY (start, end))""")
+        # Queues created before leases
+        if not 'renewed_at' in [row[1] for row in self.db.execute("PRAGMA table_info(chunks)")]:
+            self.db.execute("ALTER TABLE chunks ADD COLUMN renewed_at REAL")
+
+    def fill(self, chunks):
+        """Replace the contents of the queue with pending chunks."""
+        with self.transaction():
+            self.db.execute("DELETE FROM chunks")
+            self.db.executemany("INSERT INTO chunks VALUES (?, ?, 'pending', NULL, 0, NULL, NULL, NULL)",
+                    [(start, end) for start, end in chunks])
+
+    def claim(self, worker):
+        """
+        Claim the next pending chunk, or chunk whose lease has expired, for
+        worker; return None when there is none.
+        """
+        now = time.time()
+        with self.transaction():
+            # Expired chunks that have used up their attempts are not tried again
+            self.db.execute("UPDATE chunks SET status = 'failed', finished_at = ? WHERE status = 'claimed' "
+                    "AND renewed_at < ? AND attempts >= ?", (now, now - self.lease, MAX_ATTEMPTS))
+            row = self.db.execute("SELECT start, end FROM chunks WHERE status = 'pending' "
+                    "OR (status = 'claimed' AND renewed_at < ?) ORDER BY start LIMIT 1", (now - self.lease,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE chunks SET status = 'claimed', worker = ?, attempts = attempts + 1, "
+                    "claimed_at = ?, renewed_at = ? WHERE start = ? AND end = ?", (worker, now, now, row[0], row[1]))
+            return row
+
+    def renew(self, chunk, worker):
+        """Extend worker's lease on chunk; False if the chunk is no longer claimed by worker."""
+        return self.db.execute("UPDATE chunks SET renewed_at = ? WHERE start = ? AND end = ? "
+                "AND status = 'claimed' AND worker = ?", (time.time(), chunk[0], chunk[1], worker)).rowcount > 0
+
+    def complete(self, chunk, worker=None):
+        # With a worker, only if the chunk was not taken over after its lease expired
+        self.db.execute("UPDATE chunks SET status = 'done', finished_at = ? WHERE start = ? AND end = ?"
+                + (" AND worker = ?" if worker is not None else ""),
+                (time.time(), chunk[0], chunk[1]) + ((worker,) if worker is not None else ()))
+
+    def fail(self, chunk, worker=None):
+        """Put a failed chunk back in the queue, unless it has used up its attempts."""
+        self.db.execute("UPDATE chunks SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "finished_at = ? WHERE start = ? AND end = ? AND status = 'claimed'"
+                + (" AND worker = ?" if worker is not None else ""),
+                (MAX_ATTEMPTS, time.time(), chunk[0], chunk[1]) + ((worker,) if worker is not None else ()))
+
+    def unfinished(self):
+        """(start, end, status) of every chunk that is not done, in order of start."""
+        return self.db.execute("SELECT start, end, status FROM chunks WHERE status != 'done' ORDER BY start").fetchall()
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM chunks GROUP BY status").fetchall())
+
+    def runtimes(self):
+        """(start, end, seconds) of every completed chunk, in order of start."""
+        return self.db.execute("SELECT start, end, finished_at - claimed_at FROM chunks "
+                "WHERE status = 'done' ORDER BY start").fetchall()
+
+    def transaction(self):
+        # Taken up front, so two workers can not both select the same pending chunk
+        return Transaction(self.db)
+
+
+def get_chunks(partitions, chunk_size):
+    # Cut each partition into chunks of at most chunk_size long branches
+    chunks = []
+    for start, end in partitions:
+        for k in range(start, end, chunk_size):
+            chunks.append((k, min(k + chunk_size, end)))
+    return chunks